@@ -4,30 +4,19 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
 from alembic import context
-from dotenv import load_dotenv
-from models import User, Tache
-from database import Base
-
-# Charger les variables d'environnement
-load_dotenv()
 
 # Permet à Alembic d'importer les fichiers de ton projet
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-
+from models import User, Tache
+from database import Base, SQLALCHEMY_DATABASE_URL
 
 # Alembic Config object (lit alembic.ini)
 config = context.config
 
-# Injecte dynamiquement l’URL de connexion depuis .env
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_HOST = os.getenv("DB_HOST", "localhost")
-DB_PORT = os.getenv("DB_PORT", "3306")
-DB_NAME = os.getenv("DB_NAME")
-
-DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-config.set_main_option("sqlalchemy.url", DATABASE_URL)
+# Même URL que l'application (DATABASE_URL, ou variables DB_* du .env chargé par database.py).
+# Les "%" sont doublés car alembic.ini utilise l'interpolation de configparser.
+config.set_main_option("sqlalchemy.url", SQLALCHEMY_DATABASE_URL.replace("%", "%%"))
 
 # Configure le logger (facultatif mais utile)
 if config.config_file_name is not None:
@@ -36,6 +25,21 @@ if config.config_file_name is not None:
 # Metadata des modèles (pour autogenerate)
 target_metadata = Base.metadata
 
+# Tables gérées hors des modèles : index FTS5 de la recherche et ses tables internes
+# (taches_fts, taches_fts_data, taches_fts_idx...), créés par migration
+IGNORED_TABLE_PREFIX = "taches_fts"
+# Index FULLTEXT déclaré pour MySQL seulement (ddl_if), absent des autres bases
+MYSQL_ONLY_INDEXES = {"ix_taches_fulltext"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Exclut de l'autogenerate les tables FTS5 et, hors MySQL, les index propres à MySQL."""
+    if type_ == "table" and name and name.startswith(IGNORED_TABLE_PREFIX):
+        return False
+    if type_ == "index" and name in MYSQL_ONLY_INDEXES and context.get_context().dialect.name != "mysql":
+        return False
+    return True
+
 
 def run_migrations_offline() -> None:
     """Migration en mode hors ligne (génère le SQL mais ne l’exécute pas)."""
@@ -43,6 +47,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -63,6 +68,7 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection,
             target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,36 @@
+"""Index composites des tâches
+
+Revision ID: 3f1c9a7b2d64
+Revises: 5518b978d4e3
+Create Date: 2026-10-18 09:12:41.208317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7b2d64'
+down_revision: Union[str, None] = '5518b978d4e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Index couvrant les listes par propriétaire, statut et date de création.
+    # Il commence par owner_id et sert donc aussi d'index à la clé étrangère.
+    op.create_index('ix_taches_owner_status_created', 'taches', ['owner_id', 'status', 'created_at'], unique=False)
+    op.create_index('ix_taches_owner_due', 'taches', ['owner_id', 'due_date'], unique=False)
+
+    # Index redondants avec les clés primaires
+    op.drop_index(op.f('ix_taches_id'), table_name='taches')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_taches_id'), 'taches', ['id'], unique=False)
+    op.drop_index('ix_taches_owner_due', table_name='taches')
+    op.drop_index('ix_taches_owner_status_created', table_name='taches')
@@ -0,0 +1,26 @@
+"""Version des tâches (concurrence optimiste)
+
+Revision ID: 8d2e4b6a1c57
+Revises: 3f1c9a7b2d64
+Create Date: 2026-10-18 10:03:17.554102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2e4b6a1c57'
+down_revision: Union[str, None] = '3f1c9a7b2d64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('taches', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('taches', 'version')
@@ -0,0 +1,28 @@
+"""Date de dernière modification des tâches
+
+Revision ID: b71f0e93d2a8
+Revises: 8d2e4b6a1c57
+Create Date: 2026-10-18 10:41:52.906113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71f0e93d2a8'
+down_revision: Union[str, None] = '8d2e4b6a1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('taches', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # Les tâches existantes n'ont pas été modifiées depuis leur création
+    op.execute("UPDATE taches SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    op.drop_column('taches', 'updated_at')
@@ -0,0 +1,27 @@
+"""Index (owner_id, id) des tâches
+
+Revision ID: c4a9e2f71b30
+Revises: b71f0e93d2a8
+Create Date: 2026-10-18 11:27:03.518942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e2f71b30'
+down_revision: Union[str, None] = 'b71f0e93d2a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Listes d'un propriétaire triées par id (/tasks/mine) : parcours de l'index sans tri
+    op.create_index('ix_taches_owner_id', 'taches', ['owner_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_taches_owner_id', table_name='taches')
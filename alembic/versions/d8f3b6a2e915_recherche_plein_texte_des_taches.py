@@ -0,0 +1,57 @@
+"""Recherche plein texte des tâches
+
+Revision ID: d8f3b6a2e915
+Revises: c4a9e2f71b30
+Create Date: 2026-10-18 12:06:37.441802
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3b6a2e915'
+down_revision: Union[str, None] = 'c4a9e2f71b30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        # InnoDB construit l'index sur les lignes existantes
+        op.create_index('ix_taches_fulltext', 'taches', ['title', 'description'], mysql_prefix='FULLTEXT')
+    elif dialect == 'sqlite':
+        # Table FTS5 à contenu externe, tenue à jour par des triggers (voir models.py)
+        op.execute(
+            "CREATE VIRTUAL TABLE taches_fts USING fts5(title, description, content='taches', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER taches_fts_ai AFTER INSERT ON taches BEGIN "
+            "INSERT INTO taches_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER taches_fts_ad AFTER DELETE ON taches BEGIN "
+            "INSERT INTO taches_fts(taches_fts, rowid, title, description) "
+            "VALUES ('delete', old.id, old.title, old.description); END"
+        )
+        op.execute(
+            "CREATE TRIGGER taches_fts_au AFTER UPDATE OF title, description ON taches BEGIN "
+            "INSERT INTO taches_fts(taches_fts, rowid, title, description) "
+            "VALUES ('delete', old.id, old.title, old.description); "
+            "INSERT INTO taches_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+        )
+        # Indexation des tâches existantes
+        op.execute("INSERT INTO taches_fts(taches_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'mysql':
+        op.drop_index('ix_taches_fulltext', table_name='taches')
+    elif dialect == 'sqlite':
+        for trigger in ('taches_fts_au', 'taches_fts_ad', 'taches_fts_ai'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS taches_fts")
@@ -0,0 +1,41 @@
+"""Boîte d'envoi (outbox) des travaux après écriture
+
+Revision ID: e5b7c3d9a412
+Revises: d8f3b6a2e915
+Create Date: 2026-10-18 14:02:11.907315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7c3d9a412'
+down_revision: Union[str, None] = 'd8f3b6a2e915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('topic', sa.String(length=100), nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('status', sa.String(length=10), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('claimed_by', sa.String(length=32), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Prise des messages disponibles, dans l'ordre d'insertion
+    op.create_index('ix_outbox_status_available', 'outbox', ['status', 'available_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_outbox_status_available', table_name='outbox')
+    op.drop_table('outbox')
@@ -0,0 +1,27 @@
+"""Index (status, due_date) des tâches
+
+Revision ID: f2c8a4d6b173
+Revises: e5b7c3d9a412
+Create Date: 2026-10-18 15:41:37.204816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c8a4d6b173'
+down_revision: Union[str, None] = 'e5b7c3d9a412'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tâches ouvertes en retard ou à échéance proche : parcours d'intervalle par statut
+    op.create_index('ix_taches_status_due', 'taches', ['status', 'due_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_taches_status_due', table_name='taches')
@@ -3,27 +3,66 @@ Gère l'authentification, la génération de tokens JWT et la vérification des
 
 Ce module fournit les fonctions pour :
 - Vérifier les mots de passe,
-- Hacher les mots de passe,
+- Hacher les mots de passe (dans un pool de processus borné, voir `hashing`),
 - Créer des tokens JWT,
-- Extraire l'utilisateur courant à partir d'un token d'accès.
+- Extraire l'utilisateur courant à partir d'un token d'accès,
+- Extraire une identité légère (Principal) sans requête SQL, à partir des claims du token.
 """
 
+import hashlib
+import os
+import time
+from dataclasses import dataclass
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from database import get_db
+from typing import Optional, Tuple
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from database import get_read_db
 from models import User
+from hashing import HasherSaturated, PasswordHasher, pwd_context
+from cache import TTLCache
+from settings import env_bool
 
 SECRET_KEY = "my_secret_key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Mode sans état : l'identité (id, is_active) est lue dans le token, sans requête SQL.
+# Contrepartie : la désactivation d'un compte n'est prise en compte qu'à l'expiration du token.
+AUTH_STATELESS = env_bool("AUTH_STATELESS", False)
+
+# Cache des utilisateurs par nom d'utilisateur (0 pour désactiver)
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+
+# Cache des tokens décodés, conservés jusqu'à leur expiration (0 pour désactiver)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+password_hasher = PasswordHasher()
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Identité légère de l'utilisateur authentifié.
+
+    Attributs :
+        id (int) : Identifiant de l'utilisateur.
+        username (str) : Nom d'utilisateur.
+        is_active (bool) : Statut actif/inactif au moment de l'émission du token (ou de la lecture en base).
+    """
+
+    id: int
+    username: str
+    is_active: bool
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Vérifie si le mot de passe en clair correspond au mot de passe haché.
@@ -49,12 +88,68 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+def _hasher_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Service d'authentification saturé, réessayez plus tard",
+        headers={"Retry-After": "1"},
+    )
+
+async def hash_password_async(password: str) -> str:
+    """
+    Génère le hash d'un mot de passe dans le pool de hachage, sans bloquer la boucle d'événements.
+
+    Args:
+        password (str): Le mot de passe en clair.
+
+    Raises:
+        HTTPException: Erreur 503 si le pool de hachage est saturé.
+
+    Returns:
+        str: Le mot de passe haché.
+    """
+    try:
+        return await password_hasher.hash(password)
+    except HasherSaturated:
+        raise _hasher_unavailable()
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifie un mot de passe dans le pool de hachage, sans bloquer la boucle d'événements.
+
+    Args:
+        plain_password (str): Le mot de passe en clair fourni par l'utilisateur.
+        hashed_password (str): Le mot de passe stocké haché en base.
+
+    Raises:
+        HTTPException: Erreur 503 si le pool de hachage est saturé.
+
+    Returns:
+        tuple: (mot de passe valide, nouveau hash à enregistrer si le hash stocké est obsolète, sinon None).
+    """
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except HasherSaturated:
+        raise _hasher_unavailable()
+
+def user_claims(user: User) -> dict:
+    """
+    Construit les claims d'identité à placer dans le token d'un utilisateur.
+
+    Args:
+        user (User): Utilisateur authentifié.
+
+    Returns:
+        dict: Claims `sub` (nom d'utilisateur), `uid` (id) et `active` (is_active).
+    """
+    return {"sub": user.username, "uid": user.id, "active": bool(user.is_active)}
+
 def create_access_token(data: dict) -> str:
     """
     Crée un token JWT d'accès avec une durée d'expiration.
 
     Args:
-        data (dict): Données à encoder dans le token (ex: {'sub': username}).
+        data (dict): Données à encoder dans le token (ex: `user_claims(user)`).
 
     Returns:
         str: Token JWT encodé.
@@ -64,29 +159,123 @@ def create_access_token(data: dict) -> str:
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def decode_token(token: str) -> dict:
     """
-    Récupère l'utilisateur courant à partir du token JWT.
+    Décode et vérifie un token JWT, en passant par le cache des tokens décodés.
+
+    Un même token est réutilisé de nombreuses fois pendant sa durée de validité :
+    ses claims sont conservées, sous l'empreinte SHA-256 du token, jusqu'à leur `exp`.
+    Seuls les tokens valides sont mis en cache.
 
     Args:
-        token (str): Token JWT extrait via OAuth2.
-        db (Session): Session SQLAlchemy pour la base de données.
+        token (str): Token JWT.
 
     Raises:
-        HTTPException: Erreur 401 si le token est invalide, expiré ou si l'utilisateur n'existe pas.
+        HTTPException: Erreur 401 si le token est invalide, expiré ou sans sujet.
 
     Returns:
-        User: Objet utilisateur correspondant au token.
+        dict: Claims du token (à ne pas modifier : l'objet peut être partagé via le cache).
     """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        # L'entrée expire avec le token ; la vérification protège contre un décalage d'horloge
+        if payload["exp"] > time.time():
+            return payload
+        token_cache.delete(key)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if not username:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token expiré ou invalide")
+    if not payload.get("sub"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token invalide")
+    if "exp" in payload:
+        token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+    return payload
+
+async def load_user(username: str, db: AsyncSession) -> Optional[User]:
+    """
+    Charge un utilisateur par son nom, en passant par le cache des utilisateurs.
+
+    L'objet en cache est une copie détachée ; il est rattaché à la session courante
+    avec `merge(load=False)`, sans requête SQL.
+
+    Args:
+        username (str): Nom d'utilisateur.
+        db (AsyncSession): Session de la requête courante.
 
-    user = db.query(User).filter(User.username == username).first()
+    Returns:
+        User | None: Utilisateur rattaché à `db`, ou None s'il n'existe pas.
+    """
+    cached = user_cache.get(username)
+    if cached is not None:
+        return await db.merge(cached, load=False)
+
+    user = await db.scalar(select(User).where(User.username == username))
+    if user is not None:
+        snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+        make_transient_to_detached(snapshot)
+        user_cache.set(username, snapshot)
+    return user
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: User) -> None:
+    """Retire du cache un utilisateur modifié ou supprimé (y compris sous son ancien nom)."""
+    user_cache.delete(target.username)
+    for old_username in inspect(target).attrs.username.history.deleted or ():
+        user_cache.delete(old_username)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db)) -> User:
+    """
+    Récupère l'utilisateur courant à partir du token JWT.
+
+    Args:
+        token (str): Token JWT extrait via OAuth2.
+        db (AsyncSession): Session de lecture (réplica si configuré, voir `get_read_db`).
+
+    Raises:
+        HTTPException: Erreur 401 si le token est invalide, expiré ou si l'utilisateur n'existe pas.
+
+    Returns:
+        User: Objet utilisateur correspondant au token.
+    """
+    payload = decode_token(token)
+    user = await load_user(payload["sub"], db)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Utilisateur non trouvé")
     return user
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_read_db),
+) -> Principal:
+    """
+    Récupère l'identité de l'utilisateur courant, sans requête SQL en mode sans état.
+
+    Si AUTH_STATELESS est actif et que le token contient les claims `uid` et `active`,
+    l'identité est construite directement à partir du token. Sinon (mode désactivé
+    ou token émis avant l'ajout de ces claims), l'utilisateur est chargé via le cache.
+
+    Args:
+        token (str): Token JWT extrait via OAuth2.
+        db (AsyncSession): Session utilisée seulement si l'utilisateur doit être chargé.
+
+    Raises:
+        HTTPException: Erreur 401 si le token est invalide, si l'utilisateur n'existe pas ou est inactif.
+
+    Returns:
+        Principal: Identité de l'utilisateur courant.
+    """
+    payload = decode_token(token)
+    if AUTH_STATELESS and "uid" in payload and "active" in payload:
+        principal = Principal(id=payload["uid"], username=payload["sub"], is_active=payload["active"])
+    else:
+        user = await load_user(payload["sub"], db)
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Utilisateur non trouvé")
+        principal = Principal(id=user.id, username=user.username, is_active=bool(user.is_active))
+
+    if not principal.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Utilisateur inactif")
+    return principal
@@ -0,0 +1,255 @@
+"""
+Test de charge de l'API : débit et latences p50/p95/p99 par route, résultats en JSON.
+
+Le script prépare une base (SQLite temporaire par défaut, ou une base existante
+via --sync-url/--async-url, déjà migrée avec `alembic upgrade head`), y insère
+--users utilisateurs et --tasks tâches, puis envoie --requests requêtes par route
+avec --concurrency requêtes simultanées (--auth-requests et --auth-concurrency pour
+register et login, limitées par le coût de bcrypt) :
+
+    register, login, list, get, create, update, delete
+
+Par défaut l'application est servie en mémoire (client ASGI httpx) ; avec --url,
+les requêtes partent vers un serveur déjà lancé (par exemple
+`uvicorn main:app --workers 4`), qui doit utiliser la même base que le script.
+
+L'application en mémoire ne monte pas la limitation du débit. Un serveur visé par
+--url doit être lancé avec `RATE_LIMIT_ENABLED=false` : sinon register et login
+(quelques requêtes par minute et par adresse IP) mesurent surtout des réponses 429.
+
+Des PUT simultanés sur la même tâche peuvent répondre 412 (concurrence optimiste) :
+les erreurs sont comptées par code HTTP.
+
+Les résultats (avec le commit courant et les paramètres) sont écrits dans --output.
+Avec --compare, ils sont comparés à un fichier précédent : variation du débit et du p95.
+
+Usage :
+    python benchmarks/bench_api.py --tasks 100000 --requests 500 --concurrency 50 --output results.json
+    python benchmarks/bench_api.py --output new.json --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+import common
+
+from hashing import HASH_MAX_PENDING
+from response_cache import NullBackend, ResponseCache, get_task_cache
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROUTES = ("register", "login", "list", "get", "create", "update", "delete")
+PASSWORD = "bench-password"
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "inconnu"
+
+
+class Scenario:
+    """
+    Construit la requête numéro i de chaque route.
+
+    Attributs :
+        user_ids (list[int]) : Propriétaires des tâches créées.
+        task_ids (list[int]) : Tâches existantes, lues et modifiées.
+        deletable (list[int]) : Tâches supprimées par la route delete (une seule fois chacune).
+        logins (list[str]) : Utilisateurs créés avec un vrai mot de passe, pour login.
+    """
+
+    def __init__(self, user_ids, task_ids, deletable, seed_value: int = 42):
+        self.user_ids = user_ids
+        self.task_ids = task_ids
+        self.deletable = deletable
+        self.logins = []
+        self.rng = random.Random(seed_value)
+        self.run_id = f"{time.time_ns():x}"
+
+    def request(self, route: str, i: int):
+        if route == "register":
+            name = f"bench_{self.run_id}_{i}"
+            return "POST", "/auth/register", {"username": name, "email": f"{name}@example.com", "password": PASSWORD}
+        if route == "login":
+            return "POST", "/auth/login", {"username": self.logins[i % len(self.logins)], "password": PASSWORD}
+        if route == "list":
+            params = {"owner_id": self.rng.choice(self.user_ids), "limit": 50}
+            return "GET", "/tasks/", params
+        if route == "get":
+            return "GET", f"/tasks/{self.rng.choice(self.task_ids)}", None
+        if route == "create":
+            return "POST", "/tasks/", {"title": f"Tâche {i}", "owner_id": self.rng.choice(self.user_ids)}
+        if route == "update":
+            body = {"title": f"Modifiée {i}", "status": "done", "owner_id": self.rng.choice(self.user_ids)}
+            return "PUT", f"/tasks/{self.rng.choice(self.task_ids)}", body
+        if route == "delete":
+            return "DELETE", f"/tasks/{self.deletable[i]}", None
+        raise ValueError(route)
+
+
+async def send(client: httpx.AsyncClient, method: str, path: str, payload):
+    if method == "GET":
+        return await client.get(path, params=payload)
+    if payload is None:
+        return await client.request(method, path)
+    return await client.request(method, path, json=payload)
+
+
+async def run_route(client, scenario: Scenario, route: str, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors = [], {}
+
+    async def one(i: int):
+        method, path, payload = scenario.request(route, i)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await send(client, method, path, payload)
+            latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            # Par code HTTP : un 503 de register/login signale la saturation du pool bcrypt
+            code = str(response.status_code)
+            errors[code] = errors.get(code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed,
+        "p50_ms": common.percentile(latencies, 50),
+        "p95_ms": common.percentile(latencies, 95),
+        "p99_ms": common.percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else 0.0,
+    }
+
+
+async def run(args, async_url: str, scenario: Scenario) -> dict:
+    app = None
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        app = common.build_app(async_url, pool_size=args.pool_size)
+        if args.no_cache:
+            app.dependency_overrides[get_task_cache] = lambda: ResponseCache(NullBackend())
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    results = {}
+    async with client:
+        # Comptes avec un vrai mot de passe pour la route login (hors mesure)
+        setup = Scenario(scenario.user_ids, scenario.task_ids, [])
+        for i in range(min(args.login_users, args.requests)):
+            method, path, payload = setup.request("register", i)
+            response = await send(client, method, path, payload)
+            response.raise_for_status()
+            scenario.logins.append(payload["username"])
+
+        for route in args.routes:
+            if route in ("register", "login"):
+                count, concurrency = args.auth_requests, args.auth_concurrency
+            else:
+                count, concurrency = args.requests, args.concurrency
+            results[route] = await run_route(client, scenario, route, count, concurrency)
+            stats = results[route]
+            print(
+                f"{route:>9} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f}"
+                f" {stats['p99_ms']:>8.1f} {sum(stats['errors'].values()):>7}"
+                + (f"  {stats['errors']}" if stats["errors"] else "")
+            )
+    if app is not None:
+        await common.dispose(app)
+    if any(stats["errors"].get("429") for stats in results.values()):
+        print("\nattention : réponses 429, lancer le serveur avec RATE_LIMIT_ENABLED=false")
+    return results
+
+
+def compare(current: dict, previous: dict) -> None:
+    print(f"\ncomparaison avec {previous['meta']['commit']} :")
+    for route, stats in current["routes"].items():
+        before = previous["routes"].get(route)
+        if not before:
+            continue
+        rps = (stats["throughput_rps"] / before["throughput_rps"] - 1) * 100
+        p95 = (stats["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0.0
+        print(f"{route:>9}  débit {rps:+6.1f} %  p95 {p95:+6.1f} %")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=500, help="requêtes par route (hors register/login)")
+    parser.add_argument("--auth-requests", type=int, default=50, help="requêtes register et login (bcrypt)")
+    parser.add_argument("--login-users", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--auth-concurrency", type=int, default=HASH_MAX_PENDING,
+        help="au-delà de HASH_MAX_PENDING, register et login répondent 503 (saturation voulue)",
+    )
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    parser.add_argument("--no-cache", action="store_true", help="désactive le cache de lecture des tâches")
+    parser.add_argument("--url", help="serveur déjà lancé (sinon application en mémoire)")
+    parser.add_argument("--sync-url")
+    parser.add_argument("--async-url")
+    parser.add_argument("--output", default="bench_api.json")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    if args.sync_url and args.async_url:
+        from sqlalchemy import create_engine
+        engine, async_url = create_engine(args.sync_url), args.async_url
+    else:
+        engine, _, async_url = common.sqlite_database()
+    if "delete" in args.routes and args.tasks < 2 * args.requests:
+        parser.error("--tasks doit valoir au moins 2 × --requests (les tâches supprimées ne sont pas relues)")
+
+    user_ids = common.seed(engine, users=args.users, tasks=args.tasks)
+    with engine.connect() as conn:
+        task_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM taches ORDER BY id")]
+    engine.dispose()
+    # Les dernières tâches sont réservées à la suppression, les autres sont lues et modifiées
+    scenario = Scenario(user_ids, task_ids[:-args.requests], task_ids[-args.requests:])
+
+    print(f"{'route':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erreurs':>7}")
+    routes = asyncio.run(run(args, async_url, scenario))
+
+    result = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "target": args.url or "asgi",
+            "params": {
+                key: getattr(args, key)
+                for key in (
+                    "users", "tasks", "requests", "auth_requests", "concurrency", "auth_concurrency",
+                    "pool_size", "no_cache",
+                )
+            },
+        },
+        "routes": routes,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nrésultats écrits dans {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
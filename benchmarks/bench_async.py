@@ -0,0 +1,106 @@
+"""
+Test de charge : gestionnaires synchrones (threadpool) contre pile asynchrone.
+
+Le script sert GET /tasks/{id} de deux façons, sur la même base :
+- "sync" : route `def` et Session synchrone (pilote synchrone de --sync-url), comme
+  avant le passage en asynchrone ; chaque requête occupe un des 40 threads du
+  threadpool pendant l'attente de la base,
+- "async" : le routeur réel de `routes/tasks.py` avec AsyncSession (pilote de
+  --async-url), cache de lecture désactivé : chaque requête interroge la base.
+
+Les deux versions interrogent réellement la même base, avec leurs pilotes respectifs.
+Pour mesurer l'effet de l'attente réseau, passer `--sync-url` et `--async-url` vers
+le même serveur MySQL (par exemple `mysql+pymysql://...` et `mysql+aiomysql://...`) :
+sur la base SQLite locale par défaut, il n'y a pas d'aller-retour réseau.
+
+`--db-latency-ms` ajoute une attente artificielle à chaque session (time.sleep côté
+synchrone, asyncio.sleep côté asynchrone) ; les débits obtenus avec cette option
+sont synthétiques et signalés comme tels. Ils illustrent le plafond du threadpool
+(40 / latence requêtes par seconde en synchrone) mais ne mesurent pas les pilotes.
+
+Usage :
+    python benchmarks/bench_async.py --sync-url mysql+pymysql://... --async-url mysql+aiomysql://... --tasks 1000
+    python benchmarks/bench_async.py --requests 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import build_app, dispose, seed, sqlite_database
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Tache
+from response_cache import NullBackend, ResponseCache, get_task_cache
+from routes.tasks import TaskResponse
+
+
+def build_sync_app(sync_url: str, latency: float) -> FastAPI:
+    engine = create_engine(sync_url, pool_size=50, max_overflow=0)
+    session_factory = sessionmaker(bind=engine)
+    app = FastAPI()
+    app.state.engine = engine
+
+    @app.get("/tasks/{task_id}", response_model=TaskResponse)
+    def get_task(task_id: int):
+        with session_factory() as db:
+            if latency:
+                time.sleep(latency)
+            task = db.get(Tache, task_id)
+            if task is None:
+                raise HTTPException(status_code=404, detail="Tâche non trouvée")
+            return task
+
+    return app
+
+
+async def drive(app: FastAPI, total: int, concurrency: int, max_id: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one(i: int):
+            async with semaphore:
+                response = await client.get(f"/tasks/{i % max_id + 1}")
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+
+    await dispose(app)
+    return total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="attente artificielle (mesure synthétique)")
+    parser.add_argument("--sync-url")
+    parser.add_argument("--async-url")
+    args = parser.parse_args()
+
+    if args.sync_url and args.async_url:
+        sync_url, async_url = args.sync_url, args.async_url
+    else:
+        engine, sync_url, async_url = sqlite_database()
+        seed(engine, users=10, tasks=args.tasks)
+
+    latency = args.db_latency_ms / 1000
+    async_app = build_app(async_url, latency)
+    # Sans cache, la route asynchrone lit la base à chaque requête, comme la route synchrone
+    async_app.dependency_overrides[get_task_cache] = lambda: ResponseCache(NullBackend())
+    label = f"latence ajoutée {args.db_latency_ms} ms, mesure synthétique" if latency else "pilotes réels"
+    for name, app in (("sync", build_sync_app(sync_url, latency)), ("async", async_app)):
+        rate = asyncio.run(drive(app, args.requests, args.concurrency, args.tasks))
+        print(f"{name:>5}: {rate:8.1f} req/s  (concurrence {args.concurrency}, {label})")
+
+
+if __name__ == "__main__":
+    main()
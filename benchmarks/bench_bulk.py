@@ -0,0 +1,58 @@
+"""
+Benchmark : création de tâches une par une contre création groupée (POST /tasks/bulk).
+
+Le même nombre de tâches est créé de deux façons sur une base SQLite temporaire :
+- "unitaire" : une requête POST /tasks/ par tâche (un commit par ligne),
+- "bulk" : des requêtes POST /tasks/bulk de `--batch` tâches (INSERT multi-lignes, un commit par requête).
+
+Les requêtes passent par l'application ASGI complète (validation, sérialisation),
+comme pour un client d'import réel.
+
+Usage :
+    python benchmarks/bench_bulk.py --rows 5000 --batch 1000
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import build_app, dispose, seed, sqlite_database
+
+import httpx
+
+
+async def run(async_url: str, owner_id: int, rows: int, batch: int) -> dict:
+    app = build_app(async_url)
+    transport = httpx.ASGITransport(app=app)
+    items = [{"title": f"Import {i}", "description": "Tâche importée", "owner_id": owner_id} for i in range(rows)]
+    rates = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for item in items:
+            (await client.post("/tasks/", json=item)).raise_for_status()
+        rates["unitaire"] = rows / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for offset in range(0, rows, batch):
+            (await client.post("/tasks/bulk", json=items[offset:offset + batch])).raise_for_status()
+        rates["bulk"] = rows / (time.perf_counter() - start)
+    await dispose(app)
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    engine, _, async_url = sqlite_database()
+    owner_id = seed(engine, users=1, tasks=0)[0]
+    rates = asyncio.run(run(async_url, owner_id, args.rows, args.batch))
+    for name, rate in rates.items():
+        print(f"{name:>8}: {rate:10.0f} lignes/s")
+    print(f"gain : x{rates['bulk'] / rates['unitaire']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark : octets envoyés et temps CPU par représentation et par compression.
+
+Une base SQLite temporaire contient --tasks tâches ; une page de --rows lignes au
+format TaskResponse (colonnes LIST_COLUMNS, chemin de GET /tasks/) est lue une fois,
+puis, --repeat fois pour chaque combinaison :
+
+- représentation : JSON (`rows_json`) ou MessagePack (`rows_msgpack`),
+- codage : aucun, gzip, br ou zstd (aux niveaux configurés dans `compression` ;
+  br et zstd seulement si `brotli` et `zstandard` sont installés).
+
+Le tableau donne la taille du corps envoyé, le ratio par rapport au JSON non
+compressé, le temps médian de sérialisation + compression côté serveur et celui
+de décompression + décodage côté client.
+
+Usage :
+    python benchmarks/bench_compression.py --rows 100 --repeat 50
+    python benchmarks/bench_compression.py --rows 10000 --repeat 10
+"""
+
+import argparse
+import json
+import statistics
+import time
+import zlib
+
+import msgpack
+from sqlalchemy import select
+
+import common
+
+from compression import ENCODERS
+from models import Tache
+from msgpack_codec import rows_msgpack
+from routes.tasks import LIST_COLUMNS, rows_json
+
+
+def decoders():
+    # Décompression côté client, pour chaque codage disponible
+    result = {"identity": lambda data: data, "gzip": lambda data: zlib.decompress(data, 16 + zlib.MAX_WBITS)}
+    if "br" in ENCODERS:
+        import brotli
+        result["br"] = brotli.decompress
+    if "zstd" in ENCODERS:
+        import zstandard
+        result["zstd"] = lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return result
+
+
+def compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "identity":
+        return body
+    encoder = ENCODERS[encoding]()
+    return encoder.compress(body) + encoder.finish()
+
+
+def median_time(case, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine, _, _ = common.sqlite_database()
+    common.seed(engine, users=50, tasks=max(args.tasks, args.rows))
+    columns = [getattr(Tache, name) for name in LIST_COLUMNS]
+    with engine.connect() as conn:
+        rows = list(conn.execute(select(*columns).order_by(Tache.id).limit(args.rows)))
+    engine.dispose()
+
+    representations = {
+        "json": (lambda: rows_json(rows).encode(), json.loads),
+        "msgpack": (lambda: rows_msgpack(rows, LIST_COLUMNS), msgpack.unpackb),
+    }
+    # Les deux représentations portent exactement les mêmes documents
+    assert json.loads(rows_json(rows)) == msgpack.unpackb(rows_msgpack(rows, LIST_COLUMNS))
+    baseline = len(rows_json(rows).encode())
+
+    print(f"{args.rows} tâches, JSON non compressé : {baseline} octets")
+    print(f"{'représentation':>15} {'codage':>9} {'octets':>10} {'ratio':>7} {'serveur ms':>11} {'client ms':>10}")
+    for name, (serialize, parse) in representations.items():
+        for encoding, decompress in decoders().items():
+            body = compress(encoding, serialize())
+            server = median_time(lambda: compress(encoding, serialize()), args.repeat)
+            client = median_time(lambda: parse(decompress(body)), args.repeat)
+            print(f"{name:>15} {encoding:>9} {len(body):>10} {len(body) / baseline:>7.2f} "
+                  f"{server * 1000:>11.2f} {client * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Micro-benchmark : vérification des tokens JWT avec et sans le cache des tokens décodés.
+
+Le même token est vérifié N fois, comme un client qui le réutilise pendant sa durée
+de validité. Sans cache, chaque appel recalcule la signature HMAC et décode le JSON.
+
+Usage :
+    python benchmarks/bench_jwt.py --iterations 100000
+"""
+
+import argparse
+import time
+
+import common  # noqa: F401  (ajoute la racine du projet au sys.path)
+
+import auth
+from cache import TTLCache
+
+
+def measure(iterations: int, tokens: list) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        auth.decode_token(tokens[i % len(tokens)])
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=100_000)
+    parser.add_argument("--distinct-tokens", type=int, default=100)
+    args = parser.parse_args()
+
+    tokens = [
+        auth.create_access_token(data={"sub": f"user_{i}", "uid": i, "active": True})
+        for i in range(args.distinct_tokens)
+    ]
+
+    auth.token_cache = TTLCache(maxsize=0)
+    uncached = measure(args.iterations, tokens)
+
+    auth.token_cache = TTLCache(maxsize=auth.TOKEN_CACHE_SIZE)
+    cached = measure(args.iterations, tokens)
+
+    print(f"sans cache : {uncached:12.0f} vérifications/s")
+    print(f"avec cache : {cached:12.0f} vérifications/s  (x{cached / uncached:.1f}, {auth.token_cache.stats()})")
+
+
+if __name__ == "__main__":
+    main()
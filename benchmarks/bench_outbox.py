@@ -0,0 +1,81 @@
+"""
+Benchmark : débit du worker de la boîte d'envoi selon le nombre de consommateurs.
+
+Une base SQLite temporaire reçoit --messages messages ; le worker les traite
+jusqu'à épuisement avec 1, 2, 4... --max-consumers consommateurs concurrents, par
+lots de --batch-size. Le handler simule un appel externe de --handler-ms ms
+(notification, indexation) : c'est ce temps d'attente que les consommateurs
+concurrents recouvrent.
+
+Sous MySQL, les lots sont pris avec SKIP LOCKED et le débit dépend aussi de la
+base ; sous SQLite, la prise est sérialisée par le verrou d'écriture du fichier.
+
+Usage :
+    python benchmarks/bench_outbox.py --messages 5000 --handler-ms 2
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import common
+
+from models import OutboxMessage
+from outbox import OutboxStats, OutboxWorker
+
+
+def fill(engine, count: int) -> None:
+    now = datetime.utcnow()
+    rows = [
+        {"topic": "bench", "payload": json.dumps({"n": n}), "created_at": now, "available_at": now}
+        for n in range(count)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(OutboxMessage), rows)
+
+
+async def drain(async_url: str, consumers: int, batch_size: int, handler_ms: float) -> OutboxStats:
+    async def handle(payload):
+        await asyncio.sleep(handler_ms / 1000)
+
+    async_engine = create_async_engine(async_url)
+    stats = OutboxStats()
+    worker = OutboxWorker(
+        async_sessionmaker(async_engine, expire_on_commit=False),
+        handlers={"bench": handle}, batch_size=batch_size, stats=stats,
+    )
+    await asyncio.gather(*(worker.drain() for _ in range(consumers)))
+    await async_engine.dispose()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--handler-ms", type=float, default=2.0)
+    parser.add_argument("--max-consumers", type=int, default=8)
+    args = parser.parse_args()
+
+    engine, _, async_url = common.sqlite_database()
+    print(f"{'consommateurs':>14} {'messages/s':>11} {'lot moyen (ms)':>15}")
+    consumers = 1
+    while consumers <= args.max_consumers:
+        fill(engine, args.messages)
+        start = time.perf_counter()
+        stats = asyncio.run(drain(async_url, consumers, args.batch_size, args.handler_ms))
+        elapsed = time.perf_counter() - start
+        assert stats.processed.value == args.messages
+        batch_mean = stats.batches.sum / stats.batches.count * 1000 if stats.batches.count else 0.0
+        print(f"{consumers:>14} {args.messages / elapsed:>11.0f} {batch_mean:>15.1f}")
+        consumers *= 2
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
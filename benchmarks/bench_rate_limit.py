@@ -0,0 +1,50 @@
+"""
+Micro-benchmark : coût par requête du limiteur de débit en mémoire.
+
+Chaque itération applique la règle de connexion par adresse IP (seau à jetons) à
+une requête de l'un des --clients clients simulés. Le coût doit rester constant
+quel que soit le nombre de clients suivis : un seau est une entrée de dictionnaire
+recalculée à la demande, sans parcours ni tâche de fond.
+
+Usage :
+    python benchmarks/bench_rate_limit.py --iterations 200000
+"""
+
+import argparse
+import asyncio
+import time
+
+import common  # noqa: F401  (ajoute la racine du projet au sys.path)
+
+from rate_limit import MemoryBackend, RateLimiter, rule
+
+
+async def measure(iterations: int, clients: int) -> float:
+    limiter = RateLimiter(MemoryBackend(maxsize=clients), rules=[
+        rule("login_ip", "/auth/login", {"POST"}, "ip", "1000/second"),
+    ])
+    scopes = [
+        {"type": "http", "method": "POST", "path": "/auth/login", "client": (f"10.{n >> 16}.{n >> 8 & 255}.{n & 255}", 0)}
+        for n in range(clients)
+    ]
+    start = time.perf_counter()
+    for i in range(iterations):
+        scope = scopes[i % clients]
+        rules = limiter.match(scope["method"], scope["path"])
+        _, held = await limiter.admit(scope, rules, None)
+        limiter.release(held)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'clients':>10} {'µs / requête':>13}")
+    for clients in (1, 1_000, 100_000):
+        print(f"{clients:>10} {asyncio.run(measure(args.iterations, clients)):>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
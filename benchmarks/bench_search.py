@@ -0,0 +1,92 @@
+"""
+Benchmark : recherche plein texte (FTS5) contre des parcours LIKE '%mot%'.
+
+Une base SQLite temporaire est remplie de tâches dont le titre et la description
+sont tirés d'un vocabulaire synthétique (mots fréquents et mots rares). Chaque
+terme est recherché plusieurs fois avec les requêtes de `search` :
+- "fts" : table FTS5 tenue à jour par triggers (même principe que l'index FULLTEXT MySQL),
+- "like" : repli sans index, `lower(title) LIKE '%mot%' OR lower(description) LIKE '%mot%'`.
+
+Les deux requêtes renvoient la première page (50 résultats) ; le tableau donne
+les latences p50/p95 en millisecondes et le nombre de tâches correspondantes.
+
+Usage :
+    python benchmarks/bench_search.py --tasks 1000000 --repeat 5
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import func, insert, select
+
+import common
+
+from models import Tache
+from search import search_query
+
+COMMON_WORDS = ["rapport", "client", "projet", "réunion", "facture", "équipe", "livraison", "budget"]
+RARE_WORDS = [f"ref{i:04d}" for i in range(2000)]
+FILLER = ["préparer", "envoyer", "vérifier", "mettre", "à", "jour", "le", "la", "du", "pour", "avec", "semaine"]
+
+
+def sentence(rng: random.Random, length: int) -> str:
+    words = rng.choices(FILLER, k=length)
+    words[rng.randrange(length)] = rng.choice(COMMON_WORDS)
+    if rng.random() < 0.05:
+        words.append(rng.choice(RARE_WORDS))
+    return " ".join(words)
+
+
+def seed_texts(engine, user_ids, tasks: int, batch: int = 20_000, seed_value: int = 42):
+    rng = random.Random(seed_value)
+    with engine.begin() as conn:
+        for offset in range(0, tasks, batch):
+            conn.execute(insert(Tache), [
+                {
+                    "title": sentence(rng, 4)[:100],
+                    "description": sentence(rng, 20),
+                    "status": rng.choice(common.STATUSES),
+                    "owner_id": rng.choice(user_ids),
+                }
+                for _ in range(min(batch, tasks - offset))
+            ])
+
+
+def measure(engine, dialect: str, term: str, repeat: int, limit: int = 50):
+    query, rank = search_query(select(Tache.id), dialect, [term])
+    page = query.add_columns(rank.label("rank")).limit(limit)
+    count = select(func.count()).select_from(query.order_by(None).subquery())
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(page).fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+        matches = conn.execute(count).scalar()
+    return common.percentile(timings, 50), common.percentile(timings, 95), matches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, _, _ = common.sqlite_database()
+    start = time.perf_counter()
+    user_ids = common.seed(engine, users=10, tasks=0)
+    seed_texts(engine, user_ids, args.tasks)
+    print(f"{args.tasks} tâches insérées et indexées en {time.perf_counter() - start:.1f} s")
+
+    terms = ["rapport", "livraison", RARE_WORDS[7], "introuvable"]
+    print(f"{'terme':>12} {'résultats':>10} {'fts p50':>9} {'fts p95':>9} {'like p50':>9} {'like p95':>9}")
+    for term in terms:
+        fts_p50, fts_p95, matches = measure(engine, "sqlite", term, args.repeat)
+        like_p50, like_p95, _ = measure(engine, "like", term, args.repeat)
+        print(f"{term:>12} {matches:>10} {fts_p50:>9.1f} {fts_p95:>9.1f} {like_p50:>9.1f} {like_p95:>9.1f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark : coût par ligne de la lecture et de la sérialisation d'une page de tâches.
+
+Une base SQLite temporaire contient --tasks tâches ; une page de --rows lignes est
+lue puis sérialisée en JSON de plusieurs façons, --repeat fois chacune :
+
+- "orm + modèles" : objets ORM (carte d'identité), un TaskResponse validé par ligne
+  puis la sérialisation de FastAPI (`serialize_response` + JSONResponse),
+- "colonnes + modèles" : tuples de colonnes convertis en dict, puis le même chemin FastAPI,
+- "colonnes + TypeAdapter" : tuples de colonnes sérialisés directement en JSON par
+  pydantic-core (`rows_json`, chemin de GET /tasks/),
+- "export json.dumps" / "export TypeAdapter" : lignes NDJSON de l'export, avec
+  l'ancienne sérialisation (json.dumps ligne par ligne) et la nouvelle.
+
+Le tableau donne le temps médian par page et par ligne, lecture SQL comprise
+(sauf pour l'export, où seules les lignes déjà lues sont sérialisées).
+
+Usage :
+    python benchmarks/bench_serialization.py --rows 10000 --repeat 10
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import common
+
+from models import Tache
+from routes.tasks import EXPORT_COLUMNS, LIST_COLUMNS, TaskResponse, _ndjson_lines, rows_json
+
+RESPONSE_FIELD = create_model_field("Response", List[TaskResponse])
+
+
+def fastapi_body(content) -> bytes:
+    # Ce que fait FastAPI pour une route avec response_model=List[TaskResponse]
+    serialized = asyncio.run(serialize_response(field=RESPONSE_FIELD, response_content=content))
+    return JSONResponse(serialized).body
+
+
+def legacy_ndjson(rows) -> bytes:
+    # Sérialisation de l'export avant le passage à TypeAdapter
+    def value(item):
+        return item.isoformat() if hasattr(item, "isoformat") else item
+
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, map(value, row))), ensure_ascii=False) + "\n" for row in rows
+    ).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=20_000)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    engine, _, _ = common.sqlite_database()
+    common.seed(engine, users=50, tasks=max(args.tasks, args.rows))
+    list_columns = [getattr(Tache, name) for name in LIST_COLUMNS]
+    export_columns = [getattr(Tache, name) for name in EXPORT_COLUMNS]
+
+    def orm_models():
+        with Session(engine) as session:
+            tasks = list(session.scalars(select(Tache).order_by(Tache.id).limit(args.rows)))
+            return fastapi_body(tasks)
+
+    def column_models():
+        with engine.connect() as conn:
+            rows = conn.execute(select(*list_columns).order_by(Tache.id).limit(args.rows))
+            return fastapi_body([row._asdict() for row in rows])
+
+    def column_adapter():
+        with engine.connect() as conn:
+            rows = list(conn.execute(select(*list_columns).order_by(Tache.id).limit(args.rows)))
+            return rows_json(rows).encode()
+
+    with engine.connect() as conn:
+        export_rows = list(conn.execute(select(*export_columns).order_by(Tache.id).limit(args.rows)))
+
+    cases = {
+        "orm + modèles": orm_models,
+        "colonnes + modèles": column_models,
+        "colonnes + TypeAdapter": column_adapter,
+        "export json.dumps": lambda: legacy_ndjson(export_rows),
+        "export TypeAdapter": lambda: _ndjson_lines(export_rows),
+    }
+    # Les trois chemins de liste produisent exactement le même JSON
+    assert orm_models() == column_models() == column_adapter()
+    assert [json.loads(line) for line in legacy_ndjson(export_rows).splitlines()] == \
+        [json.loads(line) for line in _ndjson_lines(export_rows).splitlines()]
+
+    print(f"{'chemin':>24} {'ms/page':>9} {'µs/ligne':>9}")
+    for name, case in cases.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            case()
+            timings.append(time.perf_counter() - start)
+        median = statistics.median(timings)
+        print(f"{name:>24} {median * 1000:>9.1f} {median / args.rows * 1e6:>9.2f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark : temps de démarrage à froid d'un worker, selon le nombre de workers lancés ensemble.
+
+Pour chaque nombre de workers, autant de processus Python sont lancés en même
+temps, comme uvicorn/gunicorn au démarrage. Chacun importe `main` puis exécute le
+cycle de vie de l'application (vérification de la base et préchauffage du pool)
+et signale qu'il est prêt. Le temps mesuré va du lancement du processus à ce
+signal : démarrage de l'interpréteur, imports et lifespan.
+
+La base est un fichier SQLite temporaire. Avec --db-latency, chaque ouverture de
+connexion est ralentie pour simuler une base distante. Le code de sortie est 1 si
+le démarrage le plus lent dépasse --target-ms.
+
+Usage :
+    python benchmarks/bench_startup.py --workers 1 2 4 8 --target-ms 3000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import common
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import asyncio, json, os, sys, time
+start = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+latency = float(os.environ["BENCH_DB_LATENCY"])
+if latency:
+    from aiosqlite.core import Connection
+    connect = Connection._connect
+    async def slow_connect(self):
+        await asyncio.sleep(latency)
+        return await connect(self)
+    Connection._connect = slow_connect
+import main
+imported = time.perf_counter()
+
+async def run():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        print(json.dumps({
+            "import_ms": (imported - start) * 1000,
+            "lifespan_ms": (ready - imported) * 1000,
+            "database_ready": main.app.state.database_ready,
+        }), flush=True)
+
+asyncio.run(run())
+"""
+
+
+def start_workers(count: int, env: dict) -> list:
+    workers = []
+    for _ in range(count):
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-c", WORKER], cwd=ROOT, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        workers.append((started, process))
+    results = []
+    for started, process in workers:
+        line = process.stdout.readline()
+        total_ms = (time.perf_counter() - started) * 1000
+        process.wait()
+        if not line:
+            raise RuntimeError("un worker s'est arrêté sans démarrer")
+        results.append({"total_ms": total_ms, **json.loads(line)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--db-latency", type=float, default=0.0, help="délai par connexion, en secondes")
+    parser.add_argument("--pool-warmup", type=int, default=1, help="valeur de DB_POOL_WARMUP")
+    parser.add_argument("--target-ms", type=float, default=3000.0)
+    args = parser.parse_args()
+
+    _, sync_url, async_url = common.sqlite_database()
+    env = {
+        **os.environ,
+        "DATABASE_URL": sync_url,
+        "ASYNC_DATABASE_URL": async_url,
+        "DB_POOL_WARMUP": str(args.pool_warmup),
+        "BENCH_DB_LATENCY": str(args.db_latency),
+    }
+
+    slowest = 0.0
+    print(f"{'workers':>8} {'p50 (ms)':>10} {'max (ms)':>10} {'import':>10} {'lifespan':>10}")
+    for count in args.workers:
+        results = start_workers(count, env)
+        totals = sorted(result["total_ms"] for result in results)
+        imports = sorted(result["import_ms"] for result in results)
+        lifespans = sorted(result["lifespan_ms"] for result in results)
+        slowest = max(slowest, totals[-1])
+        print(
+            f"{count:>8} {common.percentile(totals, 50):>10.0f} {totals[-1]:>10.0f}"
+            f" {common.percentile(imports, 50):>10.0f} {common.percentile(lifespans, 50):>10.0f}"
+        )
+
+    status = "OK" if slowest <= args.target_ms else "DÉPASSÉ"
+    print(f"démarrage le plus lent : {slowest:.0f} ms (objectif {args.target_ms:.0f} ms) : {status}")
+    sys.exit(0 if slowest <= args.target_ms else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Outils partagés par les scripts de benchmark.
+
+Ce module fournit :
+- La création d'une base SQLite temporaire avec le schéma de l'application,
+- L'insertion rapide de volumes configurables d'utilisateurs et de tâches,
+- Une application de test branchée sur une base donnée (moteur asynchrone),
+- Le calcul de percentiles de latence.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database import Base, get_db, get_read_db, get_session_factory
+from models import Tache, User
+
+STATUSES = ("todo", "in_progress", "done")
+
+
+def sqlite_database(directory: str = None):
+    """
+    Crée une base SQLite temporaire contenant le schéma de l'application.
+
+    Args:
+        directory (str | None): Dossier où créer le fichier (dossier temporaire par défaut).
+
+    Returns:
+        tuple: (engine synchrone, URL synchrone, URL asynchrone aiosqlite).
+    """
+    directory = directory or tempfile.mkdtemp(prefix="bench_")
+    path = os.path.join(directory, "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine, f"sqlite:///{path}", f"sqlite+aiosqlite:///{path}"
+
+
+def seed(engine, users: int = 10, tasks: int = 1000, batch: int = 10_000, seed_value: int = 42):
+    """
+    Insère des utilisateurs et des tâches synthétiques par lots multi-lignes.
+
+    Args:
+        engine: Moteur SQLAlchemy synchrone.
+        users (int): Nombre d'utilisateurs à créer.
+        tasks (int): Nombre de tâches à répartir entre ces utilisateurs.
+        batch (int): Nombre de lignes par INSERT.
+        seed_value (int): Graine du générateur aléatoire, pour des jeux reproductibles.
+
+    Returns:
+        list[int]: Identifiants des utilisateurs créés.
+    """
+    rng = random.Random(seed_value)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {
+                "username": f"bench_user_{i}",
+                "email": f"bench_user_{i}@example.com",
+                "hashed_password": "x",
+                "is_active": True,
+            }
+            for i in range(users)
+        ])
+        user_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM users ORDER BY id")]
+
+        for offset in range(0, tasks, batch):
+            conn.execute(insert(Tache), [
+                {
+                    "title": f"Tâche {i}",
+                    "description": f"Description de la tâche {i}",
+                    "status": rng.choice(STATUSES),
+                    "created_at": start + timedelta(seconds=i),
+                    "due_date": start + timedelta(days=rng.randint(0, 365)),
+                    "owner_id": rng.choice(user_ids),
+                }
+                for i in range(offset, min(offset + batch, tasks))
+            ])
+    return user_ids
+
+
+def build_app(async_url: str, latency: float = 0.0, pool_size: int = 50) -> FastAPI:
+    """
+    Construit une application montant les routes de l'API sur la base indiquée.
+
+    Args:
+        async_url (str): URL asynchrone de la base (ex: sqlite+aiosqlite:///...).
+        latency (float): Attente simulée (secondes) à l'ouverture de chaque session,
+            pour reproduire l'aller-retour réseau d'un serveur distant.
+        pool_size (int): Taille du pool de connexions.
+
+    Returns:
+        FastAPI: Application prête à être servie ; son engine est dans `app.state.engine`.
+    """
+    from routes import auth_route, tasks
+
+    engine = create_async_engine(async_url, pool_size=pool_size, max_overflow=0)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    app = FastAPI()
+    app.state.engine = engine
+    app.include_router(auth_route.router, prefix="/auth")
+    app.include_router(tasks.router, prefix="/tasks")
+
+    async def override_get_db():
+        async with session_factory() as db:
+            if latency:
+                await asyncio.sleep(latency)
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    return app
+
+
+async def dispose(app: FastAPI) -> None:
+    """Ferme les connexions de l'engine de l'application (les connexions aiosqlite tiennent chacune un thread)."""
+    result = app.state.engine.dispose()
+    if asyncio.iscoroutine(result):
+        await result
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Calcule un percentile (méthode du rang le plus proche).
+
+    Args:
+        values (list): Mesures.
+        pct (float): Percentile entre 0 et 100.
+
+    Returns:
+        float: Valeur du percentile, 0 si la liste est vide.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
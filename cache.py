@@ -0,0 +1,111 @@
+"""
+Caches en mémoire du processus.
+
+Ce module fournit un cache LRU borné dont les entrées expirent après une durée
+de vie (TTL), avec des compteurs de succès et d'échecs. Il n'est pas partagé
+entre workers : chaque processus tient sa propre copie.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU borné avec expiration par entrée.
+
+    Attributs :
+        maxsize (int) : Nombre maximal d'entrées (les moins récemment utilisées sont évincées).
+        ttl (float) : Durée de vie par défaut d'une entrée, en secondes.
+        hits (int) : Nombre de lectures réussies.
+        misses (int) : Nombre de lectures sans résultat (absente ou expirée).
+        evictions (int) : Nombre d'entrées évincées faute de place.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Retourne la valeur associée à une clé si elle est présente et non expirée.
+
+        Args:
+            key (Hashable): Clé recherchée.
+            default (Any): Valeur retournée en cas d'absence.
+
+        Returns:
+            Any: Valeur en cache, ou `default`.
+        """
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Ajoute ou remplace une entrée.
+
+        Args:
+            key (Hashable): Clé.
+            value (Any): Valeur à mettre en cache.
+            ttl (float | None): Durée de vie spécifique, en secondes (TTL par défaut sinon).
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """
+        Supprime une entrée si elle existe.
+
+        Args:
+            key (Hashable): Clé à invalider.
+        """
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Vide le cache (les compteurs sont conservés)."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """
+        Retourne les statistiques du cache.
+
+        Returns:
+            dict: Taille, capacité, succès, échecs, évictions et taux de succès.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,226 @@
+"""
+Compression négociée des réponses HTTP (gzip, brotli, zstd).
+
+Ce module fournit :
+- La négociation de l'en-tête Accept-Encoding (valeurs q, préférence du serveur
+  à égalité) parmi les codages disponibles : gzip toujours, brotli et zstd si les
+  paquets `brotli` et `zstandard` sont installés,
+- Un middleware ASGI qui compresse les réponses d'un type compressible (JSON,
+  NDJSON, CSV, MessagePack, texte) au-delà de COMPRESSION_MIN_SIZE octets. Une
+  réponse en un seul morceau est compressée d'un bloc ; une réponse en flux (export)
+  est compressée morceau par morceau, chaque morceau étant vidé vers le client dès
+  qu'il est produit.
+
+Les petites réponses ne sont pas compressées : l'en-tête et le temps CPU coûtent
+alors plus que les octets gagnés. Les flux Server-Sent Events ne sont jamais
+compressés (chaque événement doit partir immédiatement). L'ETag d'une réponse
+compressée devient faible (`W/`), comme le fait nginx : la comparaison avec
+If-None-Match reste faible, les réponses 304 ne changent donc pas.
+"""
+
+import os
+import zlib
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from settings import env_bool
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépend de l'installation
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - dépend de l'installation
+    zstandard = None
+
+# Compression des réponses ("false" pour monter l'application sans le middleware)
+COMPRESSION_ENABLED = env_bool("COMPRESSION_ENABLED", True)
+# Taille minimale, en octets, d'une réponse compressée
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# Niveaux de compression : compromis entre octets envoyés et CPU du worker
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+ZSTD_LEVEL = int(os.getenv("ZSTD_LEVEL", "3"))
+
+# Types de contenu compressés (préfixes, paramètres comme charset ignorés)
+COMPRESSIBLE_TYPES = (
+    "application/json", "application/x-ndjson", "application/msgpack",
+    "text/csv", "text/plain", "text/html",
+)
+
+
+class Encoder:
+    """
+    Compresseur incrémental d'un corps de réponse.
+
+    Attributs :
+        compress (Callable) : Compresse un morceau (la sortie peut être retenue).
+        flush (Callable) : Vide la sortie retenue, sans terminer le flux.
+        finish (Callable) : Termine le flux compressé.
+    """
+
+    def __init__(self, compress: Callable[[bytes], bytes], flush: Callable[[], bytes], finish: Callable[[], bytes]):
+        self.compress = compress
+        self.flush = flush
+        self.finish = finish
+
+
+def _gzip_encoder() -> Encoder:
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return Encoder(compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush)
+
+
+def _brotli_encoder() -> Encoder:
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    return Encoder(compressor.process, compressor.flush, compressor.finish)
+
+
+def _zstd_encoder() -> Encoder:
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    return Encoder(compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), compressor.flush)
+
+
+# Codages disponibles, par ordre de préférence du serveur à valeur q égale
+ENCODERS: Dict[str, Callable[[], Encoder]] = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = _zstd_encoder
+if brotli is not None:
+    ENCODERS["br"] = _brotli_encoder
+ENCODERS["gzip"] = _gzip_encoder
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available=None) -> Optional[str]:
+    """
+    Choisit le codage de la réponse à partir de l'en-tête Accept-Encoding.
+
+    Args:
+        accept_encoding (str | None): Valeur de l'en-tête Accept-Encoding.
+        available: Codages proposés, par ordre de préférence (par défaut ENCODERS).
+
+    Returns:
+        str | None: Codage retenu, ou None pour une réponse non compressée.
+    """
+    if not accept_encoding:
+        return None
+    available = list(ENCODERS if available is None else available)
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, *params = item.strip().lower().split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip()] = weight
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in available:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def is_compressible(headers: Headers) -> bool:
+    """
+    Indique si une réponse peut être compressée d'après ses en-têtes.
+
+    Args:
+        headers (Headers): En-têtes de la réponse.
+
+    Returns:
+        bool: Vrai pour un type compressible sans Content-Encoding.
+    """
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type in COMPRESSIBLE_TYPES
+
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI de compression négociée.
+
+    Le début de la réponse est retenu jusqu'au premier morceau du corps : la décision
+    (compresser ou non) dépend du type, de la taille si le corps tient en un morceau,
+    et du codage accepté par le client.
+
+    Args:
+        app: Application ASGI.
+        min_size (int): Taille minimale d'une réponse compressée, en octets.
+        encoders (dict | None): Codages proposés (par défaut ENCODERS).
+    """
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE, encoders: Optional[dict] = None):
+        self.app = app
+        self.min_size = min_size
+        self.encoders = ENCODERS if encoders is None else encoders
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"), self.encoders)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder: Optional[Encoder] = None
+        decided = False
+
+        async def send_compressed(message):
+            nonlocal start, encoder, decided
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not decided:
+                decided = True
+                headers = MutableHeaders(raw=start["headers"])
+                if not is_compressible(headers):
+                    await send(start)
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.min_size:
+                    await send(start)
+                    await send(message)
+                    return
+                encoder = self.encoders[encoding]()
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    headers["ETag"] = "W/" + etag
+                if more_body:
+                    del headers["Content-Length"]
+                    await send(start)
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+            if encoder is None:
+                await send(message)
+                return
+            if more_body:
+                # Morceau vidé immédiatement : le client reçoit l'export au fil de l'eau
+                data = encoder.compress(body) + encoder.flush()
+            else:
+                data = encoder.compress(body) + encoder.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
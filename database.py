@@ -3,16 +3,37 @@ Gère la connexion à la base de données MySQL et l'initialisation des tables v
 
 Ce module :
 - Charge les variables d'environnement,
-- Crée l'engine SQLAlchemy,
-- Définit la session locale pour la gestion des transactions,
+- Crée l'engine SQLAlchemy synchrone (Alembic, scripts) et l'engine asynchrone (routes),
+- Crée les engines des réplicas en lecture éventuels et route les lectures vers eux
+  (tour à tour), avec lecture de ses propres écritures sur le primaire,
+- Configure le pool de connexions et mesure son utilisation,
+- Chronomètre les requêtes SQL de chaque requête HTTP (voir `instrumentation`),
+- Définit les sessions locales pour la gestion des transactions,
 - Fournit une base pour les modèles ORM,
-- Offre une fonction utilitaire pour obtenir une session DB.
+- Offre les dépendances fournissant une session DB asynchrone : `get_db` (primaire)
+  et `get_read_db` (réplica, pour les routes en lecture seule),
+- Fournit la vérification de connexion et le préchauffage du pool exécutés au démarrage.
+
+Le schéma n'est pas créé ici : il est géré uniquement par les migrations Alembic
+(`alembic upgrade head`).
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from dotenv import load_dotenv
+from typing import Optional
+from cache import TTLCache
+from instrumentation import instrument_engine
+from metrics import Counter, Histogram
+from settings import env_bool
+import asyncio
+import itertools
 import os
+import time
 
 # Charger les variables d’environnement depuis .env
 load_dotenv()
@@ -24,29 +45,440 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "3306")
 DB_NAME = os.getenv("DB_NAME")
 
-# Construction de l'URL de connexion MySQL avec le driver pymysql
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# Construction de l'URL de connexion MySQL avec le driver pymysql (synchrone)
+# et aiomysql (asynchrone). DATABASE_URL / ASYNC_DATABASE_URL permettent de
+# pointer vers une autre base, par exemple SQLite (sqlite:/// et sqlite+aiosqlite:///).
+SQLALCHEMY_DATABASE_URL = os.getenv(
+    "DATABASE_URL", f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", f"mysql+aiomysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+)
+
+
+# Configuration du pool de connexions.
+# DB_POOL_RECYCLE doit rester inférieur au wait_timeout de MySQL (8 h par défaut,
+# souvent bien moins derrière un proxy) pour éviter "MySQL server has gone away".
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+
+# Démarrage : vérification de la connexion (bornée dans le temps) et nombre de
+# connexions ouvertes à l'avance dans le pool. Si STARTUP_DB_REQUIRED est faux,
+# une base injoignable est signalée sans empêcher le worker de démarrer.
+STARTUP_DB_CHECK = env_bool("STARTUP_DB_CHECK", True)
+STARTUP_DB_TIMEOUT = float(os.getenv("STARTUP_DB_TIMEOUT", "5"))
+STARTUP_DB_REQUIRED = env_bool("STARTUP_DB_REQUIRED", False)
+DB_POOL_WARMUP = int(os.getenv("DB_POOL_WARMUP", "1"))
+
+# Réplicas en lecture (URLs asynchrones séparées par des virgules, aucune par défaut).
+# Après une écriture, les lectures d'un même client restent sur le primaire pendant
+# REPLICA_STICKY_SECONDS, pour qu'il relise ses propres écritures malgré le retard
+# de réplication.
+ASYNC_DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("ASYNC_DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_STICKY_SIZE = int(os.getenv("REPLICA_STICKY_SIZE", "100000"))
+
+
+class PoolMetrics:
+    """
+    Statistiques d'utilisation d'un pool de connexions.
+
+    Attributs :
+        wait_time (Histogram) : Temps d'attente pour obtenir une connexion, en secondes.
+        timeouts (Counter) : Nombre d'attentes ayant dépassé DB_POOL_TIMEOUT.
+    """
+
+    def __init__(self):
+        self.wait_time = Histogram()
+        self.timeouts = Counter()
+
+
+class _TimedPoolMixin:
+    """Mesure le temps d'attente de chaque emprunt de connexion au pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.metrics.timeouts.inc()
+            raise
+        finally:
+            self.metrics.wait_time.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() recrée le pool : les statistiques sont conservées
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool instrumenté, pour l'engine synchrone."""
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool instrumenté, pour l'engine asynchrone."""
+
+
+def pool_options(url: str, poolclass) -> dict:
+    """
+    Construit les options de pool passées à create_engine / create_async_engine.
+
+    Une base SQLite en mémoire n'utilise pas de pool à file d'attente : seules
+    les options génériques lui sont appliquées.
+
+    Args:
+        url (str): URL de connexion.
+        poolclass: Classe de pool instrumentée à utiliser.
+
+    Returns:
+        dict: Arguments nommés pour la création de l'engine.
+    """
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if url.startswith("sqlite") and (":memory:" in url or url.split("://", 1)[1] in ("", "/")):
+        return options
+    options.update(
+        poolclass=poolclass,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def pool_status(engine) -> dict:
+    """
+    Retourne l'état courant du pool d'un engine (synchrone ou asynchrone).
+
+    Args:
+        engine: Engine ou AsyncEngine SQLAlchemy.
+
+    Returns:
+        dict: Taille, connexions empruntées, débordement et histogramme des temps d'attente.
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(timeouts=metrics.timeouts.value, wait_seconds=metrics.wait_time.snapshot())
+    return status
+
+
+class ReplicaRouter:
+    """
+    Choix de la base des lectures : réplicas tour à tour, ou primaire après une écriture.
+
+    Attributs :
+        replicas (list[AsyncEngine]) : Engines des réplicas (vide : tout sur le primaire).
+        recent_writers (TTLCache) : Clients ayant écrit récemment, lus sur le primaire.
+        replica_reads (Counter) : Sessions de lecture envoyées à un réplica.
+        sticky_reads (Counter) : Sessions de lecture gardées sur le primaire après une écriture.
+    """
+
+    def __init__(self, replicas=(), sticky_seconds: float = REPLICA_STICKY_SECONDS):
+        self.replicas = list(replicas)
+        self._cycle = itertools.cycle(self.replicas)
+        self.recent_writers = TTLCache(maxsize=REPLICA_STICKY_SIZE, ttl=sticky_seconds)
+        self.replica_reads = Counter()
+        self.sticky_reads = Counter()
+
+    def read_engine(self, client: Optional[str]):
+        """
+        Choisit l'engine des lectures d'une requête.
+
+        Args:
+            client (str | None): Identifiant du client (voir `client_key`).
+
+        Returns:
+            AsyncEngine | None: Réplica suivant, ou None pour lire sur le primaire.
+        """
+        if not self.replicas:
+            return None
+        if client is not None and self.recent_writers.get(client):
+            self.sticky_reads.inc()
+            return None
+        self.replica_reads.inc()
+        return next(self._cycle)
+
+    def mark_write(self, client: Optional[str]) -> None:
+        """
+        Garde les lectures d'un client sur le primaire pendant REPLICA_STICKY_SECONDS.
+
+        Args:
+            client (str | None): Identifiant du client ayant écrit.
+        """
+        if client is not None and self.replicas:
+            self.recent_writers.set(client, True)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Nombre de réplicas, lectures routées vers un réplica et lectures gardées sur le primaire.
+        """
+        return {
+            "replicas": len(self.replicas),
+            "replica_reads": self.replica_reads.value,
+            "sticky_reads": self.sticky_reads.value,
+            "sticky_clients": len(self.recent_writers),
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session qui lit sur un réplica et écrit sur le primaire.
+
+    Le réplica est choisi à l'ouverture de la session (`info["replica"]`, voir
+    `get_read_db`) : toutes les lectures d'une requête voient le même état. Les
+    flushs, les instructions INSERT/UPDATE/DELETE et les SELECT ... FOR UPDATE
+    restent sur le primaire, tout comme toutes les requêtes d'une session sans réplica.
+    Une transaction validée après une écriture rend le client collant (`ReplicaRouter.mark_write`).
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        replica = self.info.get("replica")
+        if (
+            replica is not None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and getattr(clause, "_for_update_arg", None) is None
+        ):
+            return replica
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _executed(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _rolled_back(session):
+    # Écritures annulées : le client n'a rien à relire
+    session.info.pop("wrote", None)
 
-# Création du moteur SQLAlchemy (connexion à la base)
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-# Création d'une session locale pour les transactions avec la DB
+@event.listens_for(RoutingSession, "after_commit")
+def _committed(session):
+    if session.info.pop("wrote", False):
+        router = session.info.get("router")
+        if router is not None:
+            router.mark_write(session.info.get("client"))
+
+
+def make_session_factory(primary, router: ReplicaRouter):
+    """
+    Construit une fabrique de sessions asynchrones routées entre primaire et réplicas.
+
+    expire_on_commit=False évite un rechargement implicite (donc une E/S) des
+    objets après commit, ce qui est interdit en mode asynchrone.
+
+    Args:
+        primary (AsyncEngine): Engine du primaire (écritures, et lectures sans réplica).
+        router (ReplicaRouter): Choix des réplicas et suivi des écritures récentes.
+
+    Returns:
+        async_sessionmaker: Fabrique de sessions `RoutingSession`.
+    """
+    return async_sessionmaker(
+        primary, autoflush=False, expire_on_commit=False,
+        sync_session_class=RoutingSession, info={"router": router},
+    )
+
+
+def client_key(request: Request) -> Optional[str]:
+    """
+    Identifie le client d'une requête pour la lecture de ses propres écritures.
+
+    L'adresse du client est utilisée plutôt que l'utilisateur : les écritures
+    anonymes (POST /tasks/) sont couvertes, et un client qui vient de s'inscrire
+    relit son compte sur le primaire. Derrière un proxy, uvicorn doit être lancé
+    avec `--proxy-headers` (sinon tous les clients partagent une adresse).
+
+    Args:
+        request (Request): Requête HTTP.
+
+    Returns:
+        str | None: Adresse du client, ou None si inconnue.
+    """
+    return request.client.host if request.client else None
+
+
+# Création du moteur SQLAlchemy synchrone (migrations, scripts)
+engine = create_engine(SQLALCHEMY_DATABASE_URL, **pool_options(SQLALCHEMY_DATABASE_URL, TimedQueuePool))
+
+# Création du moteur asynchrone utilisé par les routes : les requêtes SQL
+# n'occupent ni un thread du threadpool ni la boucle d'événements.
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL, TimedAsyncQueuePool))
+
+# Réplicas en lecture, avec le même pool instrumenté que le primaire
+replica_engines = [
+    create_async_engine(url, **pool_options(url, TimedAsyncQueuePool)) for url in ASYNC_DATABASE_REPLICA_URLS
+]
+replica_router = ReplicaRouter(replica_engines)
+
+# Comptage et durée des requêtes SQL, requêtes lentes et motifs N+1 (exposés par /metrics)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica_engine in replica_engines:
+    instrument_engine(replica_engine.sync_engine)
+
+# Création des sessions locales pour les transactions avec la DB.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = make_session_factory(async_engine, replica_router)
 
 # Base déclarative pour définir les modèles ORM
 Base = declarative_base()
 
-def get_db():
+def get_session_factory():
+    """
+    Fournit la fabrique de sessions asynchrones.
+
+    À utiliser à la place de `get_db` lorsque la session doit vivre au-delà du
+    gestionnaire de route, par exemple dans le générateur d'une StreamingResponse :
+    FastAPI ferme les dépendances `yield` avant l'envoi du corps de la réponse.
+
+    Returns:
+        async_sessionmaker: Fabrique de sessions asynchrones.
+    """
+    return AsyncSessionLocal
+
+async def get_db(request: Request, session_factory=Depends(get_session_factory)):
     """
-    Fournit une session de base de données SQLAlchemy à utiliser dans les routes.
+    Fournit une session de base de données SQLAlchemy asynchrone à utiliser dans les routes.
+
+    Cette fonction est un générateur asynchrone qui ouvre une session et la ferme proprement après utilisation.
+    Toutes ses requêtes vont au primaire ; une écriture validée garde ensuite les
+    lectures du client sur le primaire (voir `get_read_db`).
 
-    Cette fonction est un générateur qui ouvre une session et la ferme proprement après utilisation.
+    Args:
+        request (Request): Requête HTTP, dont le client est noté pour la lecture de ses écritures.
+        session_factory: Fabrique de sessions (voir `get_session_factory`).
 
     Yields:
-        Session: Une session active SQLAlchemy liée à la base de données.
+        AsyncSession: Une session active SQLAlchemy liée à la base de données.
     """
-    db: Session = SessionLocal()
-    try:
+    async with session_factory() as db:
+        db.info["client"] = client_key(request)
         yield db
-    finally:
-        db.close()
+
+async def get_read_db(request: Request, session_factory=Depends(get_session_factory)):
+    """
+    Fournit une session dont les lectures vont à un réplica, pour les routes en lecture seule.
+
+    Les réplicas sont choisis tour à tour. Sans réplica configuré, ou si le client
+    a écrit depuis moins de REPLICA_STICKY_SECONDS, la session lit sur le primaire.
+    Une écriture faite par erreur dans cette session part quand même au primaire.
+
+    Args:
+        request (Request): Requête HTTP, dont le client détermine le maintien sur le primaire.
+        session_factory: Fabrique de sessions (voir `get_session_factory`).
+
+    Yields:
+        AsyncSession: Session routée.
+    """
+    async with session_factory() as db:
+        client = client_key(request)
+        db.info["client"] = client
+        router = db.info.get("router")
+        replica = router.read_engine(client) if router is not None else None
+        if replica is not None:
+            db.info["replica"] = replica.sync_engine
+        yield db
+
+def reads_replica(db) -> bool:
+    """
+    Indique si les lectures d'une session vont à un réplica (voir `get_read_db`).
+
+    Une valeur lue sur un réplica peut être en retard sur les dernières écritures :
+    le cache de lecture ne la conserve pas juste après une écriture.
+
+    Args:
+        db (AsyncSession): Session de la route.
+
+    Returns:
+        bool: True si la session lit sur un réplica.
+    """
+    return db.info.get("replica") is not None
+
+async def check_database(engine, timeout: float = STARTUP_DB_TIMEOUT) -> bool:
+    """
+    Vérifie que la base répond, en un temps borné.
+
+    Args:
+        engine (AsyncEngine): Moteur asynchrone à tester.
+        timeout (float): Délai maximal, en secondes.
+
+    Returns:
+        bool: True si "SELECT 1" a abouti dans le délai, False sinon.
+    """
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), timeout)
+        return True
+    except Exception:
+        return False
+
+async def warm_up_pool(engine, connections: int = DB_POOL_WARMUP, timeout: float = STARTUP_DB_TIMEOUT) -> int:
+    """
+    Ouvre des connexions à l'avance, pour que les premières requêtes n'en paient pas l'établissement.
+
+    Les connexions sont ouvertes en parallèle puis rendues au pool, où elles restent
+    disponibles. Le nombre est limité à la taille du pool (au-delà, elles seraient
+    fermées à leur retour).
+
+    Args:
+        engine (AsyncEngine): Moteur asynchrone dont le pool est préchauffé.
+        connections (int): Nombre de connexions à ouvrir.
+        timeout (float): Délai maximal, en secondes.
+
+    Returns:
+        int: Nombre de connexions effectivement ouvertes.
+    """
+    size = getattr(engine.sync_engine.pool, "size", None)
+    if callable(size):
+        connections = min(connections, size())
+    if connections <= 0:
+        return 0
+
+    async def open_connections():
+        results = await asyncio.gather(
+            *(engine.connect().start() for _ in range(connections)), return_exceptions=True
+        )
+        opened = [conn for conn in results if not isinstance(conn, BaseException)]
+        for conn in opened:
+            await conn.close()
+        return len(opened)
+
+    try:
+        return await asyncio.wait_for(open_connections(), timeout)
+    except Exception:
+        return 0
@@ -0,0 +1,456 @@
+"""
+Flux des changements de tâches (création, modification, suppression, échéance atteinte).
+
+Ce module fournit :
+- Un courtier de publication/abonnement asyncio en mémoire du processus : chaque
+  événement reçoit un identifiant croissant, est conservé dans un historique borné
+  et distribué aux abonnés dont le filtre (propriétaire) correspond,
+- Une file bornée par abonné : un abonné trop lent (file pleine) est déconnecté,
+  au lieu de ralentir les écritures ou de faire grossir la mémoire du worker,
+- La reprise après le dernier identifiant reçu (Last-Event-ID) depuis l'historique ;
+  si des événements manquent, l'abonné reçoit un événement "reset" et doit relire
+  les tâches,
+- Un backend Redis (pub/sub) optionnel, qui distribue les événements à tous les
+  workers : sans lui, un abonné ne voit que les écritures du worker qui le sert.
+  Une connexion perdue est journalisée puis rétablie avec un délai croissant ; les
+  abonnés reçoivent alors un événement "reset", les événements publiés pendant la
+  coupure n'ayant pas été reçus.
+
+Les événements sont publiés après le commit de l'écriture, comme l'invalidation du
+cache : un abonné ne reçoit jamais une modification annulée par un rollback.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Set
+
+from response_cache import REDIS_URL, dumps
+from settings import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Backend du flux : "memory" (par défaut, un seul worker) ou "redis" (REDIS_URL)
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "memory")
+# Événements en attente par abonné avant sa déconnexion
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+# Événements conservés pour la reprise après une déconnexion
+EVENT_HISTORY_SIZE = int(os.getenv("EVENT_HISTORY_SIZE", "10000"))
+# Intervalle, en secondes, des messages de maintien de connexion
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+# Délai avant de se réabonner au canal Redis après une coupure, doublé à chaque échec
+EVENT_RECONNECT_SECONDS = float(os.getenv("EVENT_RECONNECT_SECONDS", "0.5"))
+# Délai maximal entre deux tentatives de réabonnement, en secondes
+EVENT_RECONNECT_MAX_SECONDS = float(os.getenv("EVENT_RECONNECT_MAX_SECONDS", "30"))
+
+# "due" est publié par le planificateur des échéances (voir `scheduler`)
+EVENT_TYPES = ("created", "updated", "deleted", "due")
+RESET = "reset"
+
+
+@dataclass(frozen=True)
+class Event:
+    """
+    Événement distribué aux abonnés.
+
+    Attributs :
+        id (int) : Identifiant croissant, utilisé pour la reprise.
+        type (str) : "created", "updated", "deleted", "due" ou "reset".
+        owner_id (int | None) : Propriétaire de la tâche après l'écriture.
+        previous_owner_id (int | None) : Ancien propriétaire, si l'écriture l'a changé.
+        data (str) : Événement complet sérialisé en JSON, une seule fois pour tous les abonnés.
+    """
+
+    id: int
+    type: str
+    owner_id: Optional[int]
+    previous_owner_id: Optional[int]
+    data: str
+
+    @classmethod
+    def from_dict(cls, payload: dict) -> "Event":
+        return cls(
+            id=payload["id"],
+            type=payload["type"],
+            owner_id=payload.get("owner_id"),
+            previous_owner_id=payload.get("previous_owner_id"),
+            data=dumps(payload),
+        )
+
+
+def task_event(event_type: str, task_id: int, owner_id: Optional[int],
+               previous_owner_id: Optional[int] = None, task: Optional[dict] = None) -> dict:
+    """
+    Construit un événement de tâche, sans identifiant (attribué à la publication).
+
+    Args:
+        event_type (str): "created", "updated", "deleted" ou "due".
+        task_id (int): Tâche concernée.
+        owner_id (int | None): Propriétaire après l'écriture.
+        previous_owner_id (int | None): Ancien propriétaire, s'il a changé.
+        task (dict | None): Tâche après l'écriture, si elle est connue sans lecture
+            supplémentaire (None pour les écritures groupées, les suppressions et les échéances).
+
+    Returns:
+        dict: Événement à passer à `EventBroker.publish`.
+    """
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Type d'événement inconnu : {event_type}")
+    if previous_owner_id == owner_id:
+        previous_owner_id = None
+    return {
+        "type": event_type,
+        "task_id": task_id,
+        "owner_id": owner_id,
+        "previous_owner_id": previous_owner_id,
+        "task": task,
+    }
+
+
+class Subscription:
+    """
+    Abonnement d'un client au flux.
+
+    Les événements de reprise (historique) sont servis avant ceux de la file, qui
+    reçoit les événements publiés depuis l'abonnement. Lorsque la file est pleine,
+    son contenu est abandonné et l'abonnement est marqué comme déconnecté : `get`
+    renvoie alors None, et le client reprendra après le dernier événement reçu.
+
+    Attributs :
+        owner_id (int | None) : Propriétaire filtré, ou None pour toutes les tâches.
+        queue (asyncio.Queue) : Événements en attente d'envoi.
+        backlog (deque) : Événements de reprise, servis en premier.
+        dropped (bool) : Vrai si l'abonné a été déconnecté pour lenteur.
+    """
+
+    def __init__(self, owner_id: Optional[int], maxsize: int):
+        self.owner_id = owner_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.backlog: Deque[Event] = deque()
+        self.dropped = False
+
+    def matches(self, event: Event) -> bool:
+        """Vrai si l'événement concerne le propriétaire filtré (ancien ou nouveau)."""
+        return self.owner_id is None or self.owner_id in (event.owner_id, event.previous_owner_id)
+
+    def offer(self, event: Event) -> bool:
+        """
+        Ajoute un événement à la file sans attendre.
+
+        Returns:
+            bool: Faux si la file était pleine et que l'abonné vient d'être déconnecté.
+        """
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return False
+
+    async def get(self) -> Optional[Event]:
+        """
+        Attend le prochain événement.
+
+        Returns:
+            Event | None: Événement suivant, ou None si l'abonné a été déconnecté.
+        """
+        if self.backlog:
+            return self.backlog.popleft()
+        return await self.queue.get()
+
+
+class MemoryBackend:
+    """Distribution limitée au worker : les événements publiés sont livrés immédiatement."""
+
+    def __init__(self):
+        self.last_id = 0
+
+    async def allocate(self, count: int) -> int:
+        first = self.last_id + 1
+        self.last_id += count
+        return first
+
+    async def publish(self, broker: "EventBroker", payload: List[dict]) -> None:
+        broker.deliver(payload)
+
+    async def start(self, broker: "EventBroker") -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+
+class RedisBackend:
+    """
+    Distribution entre workers, au-dessus d'un client Redis asynchrone.
+
+    Les identifiants sont attribués par INCRBY sur une clé partagée ; chaque
+    publication est un message pub/sub contenant la liste de ses événements, que
+    chaque worker (y compris l'émetteur) livre à ses abonnés à réception.
+
+    Le client doit fournir `incrby`, `publish` et `pubsub` (API de `redis.asyncio.Redis`).
+
+    Si la réception échoue (connexion perdue...), l'erreur est journalisée et le
+    backend se réabonne après `reconnect_delay` secondes, délai doublé à chaque
+    échec consécutif jusqu'à `reconnect_max_delay`.
+
+    Attributs :
+        client : Client Redis asynchrone.
+        channel (str) : Canal pub/sub des événements.
+        counter_key (str) : Clé du compteur d'identifiants.
+        reconnect_delay (float) : Délai avant le premier réabonnement, en secondes.
+        reconnect_max_delay (float) : Délai maximal entre deux réabonnements, en secondes.
+        reconnects (int) : Réabonnements réussis après une coupure.
+    """
+
+    def __init__(self, client, channel: str = "tasks:events", counter_key: str = "tasks:events:id",
+                 reconnect_delay: float = EVENT_RECONNECT_SECONDS,
+                 reconnect_max_delay: float = EVENT_RECONNECT_MAX_SECONDS):
+        self.client = client
+        self.channel = channel
+        self.counter_key = counter_key
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.reconnects = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    async def allocate(self, count: int) -> int:
+        last = await self.client.incrby(self.counter_key, count)
+        return int(last) - count + 1
+
+    async def publish(self, broker: "EventBroker", payload: List[dict]) -> None:
+        await self.client.publish(self.channel, dumps(payload))
+
+    async def start(self, broker: "EventBroker") -> None:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(broker, pubsub))
+
+    async def _listen(self, broker: "EventBroker", pubsub) -> None:
+        failures = 0
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self.client.pubsub()
+                    await pubsub.subscribe(self.channel)
+                    self.reconnects += 1
+                    failures = 0
+                    logger.warning("Réabonné au canal %s", self.channel)
+                    # Les événements publiés pendant la coupure sont perdus pour ce worker
+                    broker.resync()
+                await self._receive(broker, pubsub)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                failures += 1
+                delay = min(self.reconnect_max_delay, self.reconnect_delay * 2 ** (failures - 1))
+                logger.exception("Réception interrompue sur le canal %s, nouvel essai dans %.1f s", self.channel, delay)
+                await self._close(pubsub)
+                pubsub = None
+                await asyncio.sleep(delay)
+
+    async def _receive(self, broker: "EventBroker", pubsub) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    broker.deliver(json.loads(message["data"]))
+                except (ValueError, KeyError, TypeError):
+                    logger.exception("Message invalide sur le canal %s", self.channel)
+        except asyncio.CancelledError:
+            await self._close(pubsub)
+            raise
+        # Fin du flux sans erreur : connexion fermée par le serveur
+        raise ConnectionError(f"Abonnement au canal {self.channel} terminé")
+
+    async def _close(self, pubsub) -> None:
+        if pubsub is None:
+            return
+        try:
+            await pubsub.unsubscribe(self.channel)
+        except Exception:
+            # Connexion déjà perdue : rien à libérer côté serveur
+            pass
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+
+class EventBroker:
+    """
+    Courtier de publication/abonnement des changements de tâches.
+
+    Attributs :
+        backend : Attribution des identifiants et distribution (MemoryBackend ou RedisBackend).
+        queue_size (int) : Taille de la file de chaque abonné.
+        history (deque) : Derniers événements livrés, pour la reprise.
+        subscribers (set) : Abonnements actifs.
+        last_id (int) : Identifiant du dernier événement livré.
+        published (int) : Événements publiés par ce worker.
+        delivered (int) : Événements placés dans la file d'un abonné.
+        dropped (int) : Abonnés déconnectés pour lenteur.
+    """
+
+    def __init__(self, backend=None, queue_size: int = EVENT_QUEUE_SIZE, history_size: int = EVENT_HISTORY_SIZE):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.queue_size = queue_size
+        self.history: Deque[Event] = deque(maxlen=history_size)
+        self.subscribers: Set[Subscription] = set()
+        self.last_id = 0
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    async def publish(self, *events: dict) -> None:
+        """
+        Publie des événements construits par `task_event`, dans l'ordre.
+
+        Args:
+            *events (dict): Événements à publier (un seul aller-retour vers le backend).
+        """
+        if not events:
+            return
+        first = await self.backend.allocate(len(events))
+        payload = [{"id": first + offset, **event} for offset, event in enumerate(events)]
+        self.published += len(payload)
+        await self.backend.publish(self, payload)
+
+    def deliver(self, payload: List[dict]) -> None:
+        """
+        Livre des événements reçus du backend aux abonnés concernés.
+
+        Args:
+            payload (List[dict]): Événements, avec leur identifiant.
+        """
+        for item in payload:
+            event = Event.from_dict(item)
+            self.history.append(event)
+            self.last_id = max(self.last_id, event.id)
+            for subscription in list(self.subscribers):
+                if not subscription.matches(event):
+                    continue
+                if subscription.offer(event):
+                    self.delivered += 1
+                else:
+                    self.subscribers.discard(subscription)
+                    self.dropped += 1
+
+    def subscribe(self, owner_id: Optional[int] = None, last_event_id: Optional[int] = None) -> Subscription:
+        """
+        Abonne un client au flux.
+
+        Args:
+            owner_id (int | None): Ne recevoir que les tâches de ce propriétaire.
+            last_event_id (int | None): Dernier événement reçu avant une reconnexion ;
+                les événements suivants encore dans l'historique sont rejoués.
+
+        Returns:
+            Subscription: Abonnement, à libérer avec `unsubscribe`.
+        """
+        subscription = Subscription(owner_id, self.queue_size)
+        if last_event_id is not None and last_event_id != self.last_id:
+            oldest = self.history[0].id if self.history else self.last_id + 1
+            if last_event_id > self.last_id or last_event_id + 1 < oldest:
+                # Événements sortis de l'historique, ou identifiant inconnu (redémarrage
+                # du worker en mode mémoire) : le client doit relire les tâches
+                subscription.backlog.append(self._reset_event())
+            else:
+                subscription.backlog.extend(
+                    event for event in self.history if event.id > last_event_id and subscription.matches(event)
+                )
+        self.subscribers.add(subscription)
+        return subscription
+
+    def _reset_event(self) -> Event:
+        return Event.from_dict({
+            "id": self.last_id, "type": RESET, "task_id": None,
+            "owner_id": None, "previous_owner_id": None, "task": None,
+        })
+
+    def resync(self) -> None:
+        """
+        Signale aux abonnés que des événements ont pu être perdus (reconnexion au backend).
+
+        Chaque abonné reçoit un événement "reset" et doit relire les tâches ; l'historique
+        est vidé, pour qu'une reprise antérieure à la coupure reçoive aussi un "reset".
+        """
+        self.history.clear()
+        event = self._reset_event()
+        for subscription in list(self.subscribers):
+            if not subscription.offer(event):
+                self.subscribers.discard(subscription)
+                self.dropped += 1
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Libère un abonnement (déconnexion du client)."""
+        self.subscribers.discard(subscription)
+
+    async def start(self) -> None:
+        """Démarre la réception des événements des autres workers (backend Redis)."""
+        await self.backend.start(self)
+
+    async def stop(self) -> None:
+        """Arrête la réception des événements."""
+        await self.backend.stop()
+
+    def stats(self) -> dict:
+        """
+        Retourne les statistiques du flux.
+
+        Returns:
+            dict: Abonnés actifs, dernier identifiant, événements publiés et livrés, abonnés déconnectés.
+        """
+        return {
+            "subscribers": len(self.subscribers),
+            "last_id": self.last_id,
+            "history": len(self.history),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+def build_event_broker(kind: str = TASK_EVENTS_BACKEND) -> EventBroker:
+    """
+    Construit le courtier d'événements selon la configuration.
+
+    Args:
+        kind (str): "memory" ou "redis".
+
+    Raises:
+        RuntimeError: Si le backend Redis est demandé sans le paquet `redis`.
+        ValueError: Si le backend est inconnu.
+
+    Returns:
+        EventBroker: Courtier configuré.
+    """
+    if kind == "memory":
+        return EventBroker(MemoryBackend())
+    if kind == "redis":
+        return EventBroker(RedisBackend(redis_client("TASK_EVENTS_BACKEND=redis", REDIS_URL)))
+    raise ValueError(f"Backend d'événements inconnu : {kind}")
+
+
+event_broker = build_event_broker()
+
+
+def get_event_broker() -> EventBroker:
+    """
+    Dépendance FastAPI qui fournit le courtier d'événements.
+
+    Returns:
+        EventBroker: Courtier partagé du worker.
+    """
+    return event_broker
@@ -0,0 +1,141 @@
+"""
+Hachage et vérification des mots de passe (bcrypt) hors du chemin des requêtes.
+
+Un hachage bcrypt coûte plusieurs centaines de millisecondes de CPU. Exécuté dans
+le worker, il monopolise le GIL et ralentit toutes les autres routes. Ce module
+l'exécute dans un pool de processus dédié et de taille bornée :
+- Au-delà de HASH_MAX_PENDING opérations en cours ou en attente, les nouvelles
+  demandes sont refusées immédiatement (HasherSaturated) au lieu de s'empiler,
+- Le coût bcrypt est configurable (BCRYPT_ROUNDS), et un hash moins coûteux que
+  la configuration courante est signalé pour être recalculé à la connexion.
+
+Ce module n'importe que passlib : c'est lui qui est chargé dans les processus du pool.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+# Coût bcrypt (2^rounds itérations). Les hash plus faibles sont recalculés à la connexion.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Nombre de processus dédiés au hachage (0 : exécution dans le threadpool)
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Nombre maximal d'opérations en cours ou en attente avant de refuser (503)
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(max(HASH_WORKERS, 1) * 4)))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+)
+
+
+def hash_password(password: str) -> str:
+    """
+    Calcule le hash bcrypt d'un mot de passe avec le coût configuré.
+
+    Args:
+        password (str): Le mot de passe en clair.
+
+    Returns:
+        str: Le mot de passe haché.
+    """
+    return pwd_context.hash(password)
+
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Vérifie un mot de passe et recalcule son hash s'il est obsolète.
+
+    Args:
+        password (str): Le mot de passe en clair.
+        hashed_password (str): Le hash stocké en base.
+
+    Returns:
+        tuple: (mot de passe valide, nouveau hash ou None si le hash stocké est à jour).
+    """
+    return pwd_context.verify_and_update(password, hashed_password)
+
+
+def _ping() -> int:
+    """Tâche vide : son exécution force l'import de ce module (et de passlib) dans le processus."""
+    return os.getpid()
+
+
+class HasherSaturated(Exception):
+    """Levée lorsque la file d'attente du pool de hachage est pleine."""
+
+
+class PasswordHasher:
+    """
+    Exécute le hachage bcrypt dans un pool de processus borné.
+
+    Attributs :
+        workers (int) : Nombre de processus du pool (0 : threadpool).
+        max_pending (int) : Nombre maximal d'opérations en cours ou en attente.
+        pending (int) : Nombre d'opérations actuellement en cours ou en attente.
+    """
+
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+
+    def _get_executor(self):
+        if self.workers <= 0:
+            return None  # executor par défaut de la boucle (threads)
+        if self._executor is None:
+            # "spawn" : les processus n'héritent pas des threads ni des connexions du worker
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        # Le compteur est modifié avant tout await : le contrôle est donc atomique
+        # vis-à-vis des autres requêtes de la même boucle d'événements.
+        if self.pending >= self.max_pending:
+            raise HasherSaturated()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """
+        Calcule le hash d'un mot de passe hors de la boucle d'événements.
+
+        Raises:
+            HasherSaturated: Si la file d'attente est pleine.
+        """
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Vérifie un mot de passe (et calcule un nouveau hash si nécessaire) hors de la boucle d'événements.
+
+        Raises:
+            HasherSaturated: Si la file d'attente est pleine.
+        """
+        return await self._run(verify_and_update, password, hashed_password)
+
+    def warm_up(self) -> None:
+        """Démarre les processus du pool à l'avance, pour ne pas payer leur création à la première connexion."""
+        executor = self._get_executor()
+        if executor is not None:
+            for future in [executor.submit(_ping) for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self) -> None:
+        """Arrête les processus du pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
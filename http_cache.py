@@ -0,0 +1,147 @@
+"""
+Outils de cache HTTP : ETag, Last-Modified et requêtes conditionnelles.
+
+Ce module fournit :
+- La comparaison d'un ETag avec un en-tête If-None-Match,
+- La conversion entre dates en base (UTC naïves) et dates HTTP,
+- L'évaluation d'une requête GET conditionnelle (RFC 9110, section 13.2.2),
+- La construction d'une réponse 304 sans corps.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional
+
+from fastapi import Response
+
+# Les clients doivent revalider à chaque fois ; la revalidation est peu coûteuse (304)
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Indique si un ETag correspond à l'un de ceux d'un en-tête If-None-Match (comparaison faible).
+
+    Args:
+        if_none_match (str | None): Valeur de l'en-tête If-None-Match.
+        etag (str): ETag courant de la ressource.
+
+    Returns:
+        bool: True si l'un des ETag fournis (ou "*") correspond.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def http_date(value: datetime) -> str:
+    """
+    Formate une date UTC (naïve, comme en base) en date HTTP.
+
+    Args:
+        value (datetime): Date UTC.
+
+    Returns:
+        str: Date au format IMF-fixdate, par exemple "Sun, 18 Oct 2026 10:00:00 GMT".
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    """
+    Convertit une date HTTP en date UTC naïve.
+
+    Args:
+        value (str | None): Valeur d'un en-tête de date (ex: If-Modified-Since).
+
+    Returns:
+        datetime | None: Date UTC naïve, ou None si absente ou invalide.
+    """
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def is_not_modified(
+    etag: str,
+    last_modified: Optional[datetime],
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+) -> bool:
+    """
+    Évalue une requête GET conditionnelle.
+
+    If-None-Match est prioritaire ; If-Modified-Since n'est pris en compte qu'en son
+    absence, à la seconde près (précision des dates HTTP).
+
+    Args:
+        etag (str): ETag courant de la ressource.
+        last_modified (datetime | None): Date de dernière modification (UTC naïve).
+        if_none_match (str | None): En-tête If-None-Match.
+        if_modified_since (str | None): En-tête If-Modified-Since.
+
+    Returns:
+        bool: True si le client possède déjà la version courante (réponse 304).
+    """
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    since = parse_http_date(if_modified_since)
+    if since is None or last_modified is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def collection_etag(parts: Iterable) -> str:
+    """
+    Construit un ETag fort pour une collection à partir des versions de ses éléments.
+
+    Args:
+        parts (Iterable): Éléments identifiant le contenu (ex: couples (id, version) et curseur suivant).
+
+    Returns:
+        str: ETag entre guillemets.
+    """
+    digest = hashlib.blake2b(repr(list(parts)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict:
+    """
+    Construit les en-têtes de validation d'une réponse.
+
+    Args:
+        etag (str): ETag de la ressource.
+        last_modified (datetime | None): Date de dernière modification.
+
+    Returns:
+        dict: En-têtes ETag, Cache-Control et, si connu, Last-Modified.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(headers: dict) -> Response:
+    """
+    Construit une réponse 304 sans corps.
+
+    Args:
+        headers (dict): En-têtes de validation (voir `cache_headers`).
+
+    Returns:
+        Response: Réponse 304.
+    """
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,365 @@
+"""
+Instrumentation des requêtes HTTP et des requêtes SQL.
+
+Ce module fournit :
+- Un middleware ASGI qui mesure la latence par route (gabarit de chemin, pas le
+  chemin réel), compte les codes de statut et le nombre de requêtes en cours,
+- Des écouteurs d'événements SQLAlchemy qui comptent et chronomètrent les
+  requêtes SQL de chaque requête HTTP (via une variable de contexte),
+- La détection des requêtes SQL lentes (SLOW_QUERY_MS) et des motifs N+1 (une
+  même instruction exécutée au moins N_PLUS_ONE_THRESHOLD fois dans une requête HTTP),
+- Un budget de requêtes SQL par requête HTTP (SQL_QUERY_BUDGET), pour les tests :
+  au-delà, l'instruction suivante lève `QueryBudgetExceeded` au lieu d'être exécutée,
+- L'écriture de ces mesures au format texte de Prometheus.
+
+Les mesures sont tenues en mémoire par worker : chaque processus expose les siennes.
+Sur le chemin critique, le coût se limite à deux appels de `perf_counter`, une
+recherche par bissection dans les seuils et quelques incréments.
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+
+from metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Durée au-delà de laquelle une requête SQL est signalée comme lente, en millisecondes
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Nombre d'exécutions d'une même instruction dans une requête HTTP signalant un N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+# Seuils de l'histogramme du nombre de requêtes SQL par requête HTTP
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Nombre maximal de requêtes SQL par requête HTTP (0 : pas de limite). Mode de test :
+# une régression N+1 fait échouer la requête au lieu de passer inaperçue.
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "0"))
+
+# Route des requêtes qui ne correspondent à aucune route déclarée (404)
+UNMATCHED_ROUTE = "unmatched"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Levée lorsqu'une requête HTTP dépasse son budget de requêtes SQL."""
+
+
+class RequestStats:
+    """
+    Requêtes SQL exécutées pendant une requête HTTP.
+
+    Attributs :
+        queries (int) : Nombre de requêtes SQL.
+        sql_time (float) : Durée cumulée des requêtes SQL, en secondes.
+        slow (int) : Nombre de requêtes SQL lentes.
+        statements (dict[str, int]) : Nombre d'exécutions par texte d'instruction.
+        budget (int) : Nombre maximal de requêtes SQL (0 : pas de limite).
+    """
+
+    __slots__ = ("queries", "sql_time", "slow", "statements", "budget")
+
+    def __init__(self, budget: int = 0):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slow = 0
+        self.statements: Dict[str, int] = {}
+        self.budget = budget
+
+    def most_repeated(self) -> Tuple[Optional[str], int]:
+        """
+        Retourne l'instruction la plus répétée.
+
+        Returns:
+            tuple: (texte de l'instruction, nombre d'exécutions), ou (None, 0) sans requête SQL.
+        """
+        if not self.statements:
+            return None, 0
+        statement = max(self.statements, key=self.statements.__getitem__)
+        return statement, self.statements[statement]
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """
+    Retourne les statistiques SQL de la requête HTTP en cours.
+
+    Returns:
+        RequestStats | None: Statistiques, ou None hors d'une requête HTTP instrumentée.
+    """
+    return _request_stats.get()
+
+
+def _get(store: dict, key, factory):
+    # setdefault est atomique : deux threads ne peuvent pas créer deux séries pour la même clé
+    value = store.get(key)
+    if value is None:
+        value = store.setdefault(key, factory())
+    return value
+
+
+class Metrics:
+    """
+    Mesures HTTP et SQL d'un worker.
+
+    Attributs :
+        requests (dict) : (méthode, route, statut) -> Counter des réponses.
+        latency (dict) : (méthode, route) -> Histogram des durées, en secondes.
+        in_flight (int) : Nombre de requêtes HTTP en cours.
+        query_time (Histogram) : Durée des requêtes SQL, en secondes.
+        queries_per_request (dict) : Route -> Histogram du nombre de requêtes SQL.
+        slow_queries (dict) : Route -> Counter des requêtes SQL lentes.
+        n_plus_one (dict) : Route -> Counter des requêtes HTTP présentant un motif N+1.
+    """
+
+    def __init__(self):
+        self.requests: Dict[tuple, Counter] = {}
+        self.latency: Dict[tuple, Histogram] = {}
+        self.in_flight = 0
+        self.query_time = Histogram()
+        self.queries_per_request: Dict[str, Histogram] = {}
+        self.slow_queries: Dict[str, Counter] = {}
+        self.n_plus_one: Dict[str, Counter] = {}
+
+    def record_query(self, statement: str, duration: float) -> None:
+        """
+        Enregistre une requête SQL.
+
+        Hors d'une requête HTTP (script, démarrage), seules la durée et la lenteur
+        sont comptabilisées, sous la route "none".
+
+        Args:
+            statement (str): Texte de l'instruction (avec ses paramètres liés, sans leurs valeurs).
+            duration (float): Durée d'exécution, en secondes.
+        """
+        self.query_time.observe(duration)
+        stats = _request_stats.get()
+        slow = duration * 1000 >= SLOW_QUERY_MS
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_time += duration
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+            if slow:
+                stats.slow += 1
+        elif slow:
+            _get(self.slow_queries, "none", Counter).inc()
+        if slow:
+            logger.warning("Requête SQL lente (%.1f ms) : %s", duration * 1000, statement)
+
+    def record_request(self, method: str, route: str, status: int, duration: float, stats: RequestStats) -> None:
+        """
+        Enregistre une requête HTTP terminée et ses requêtes SQL.
+
+        Args:
+            method (str): Méthode HTTP.
+            route (str): Gabarit de la route (ex: "/tasks/{task_id}").
+            status (int): Code de statut de la réponse.
+            duration (float): Durée totale, en secondes.
+            stats (RequestStats): Requêtes SQL exécutées pendant la requête.
+        """
+        _get(self.requests, (method, route, status), Counter).inc()
+        _get(self.latency, (method, route), Histogram).observe(duration)
+        _get(self.queries_per_request, route, lambda: Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+        if stats.slow:
+            _get(self.slow_queries, route, Counter).inc(stats.slow)
+        statement, executions = stats.most_repeated()
+        if executions >= N_PLUS_ONE_THRESHOLD:
+            _get(self.n_plus_one, route, Counter).inc()
+            logger.warning(
+                "N+1 probable sur %s %s : instruction exécutée %d fois : %s", method, route, executions, statement,
+            )
+
+
+metrics = Metrics()
+
+
+def instrument_engine(engine, registry: Metrics = metrics) -> None:
+    """
+    Chronomètre les requêtes SQL d'un engine et les rattache à la requête HTTP en cours.
+
+    Args:
+        engine: Engine SQLAlchemy synchrone (pour un AsyncEngine, passer `async_engine.sync_engine`).
+        registry (Metrics): Mesures à alimenter.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        stats = _request_stats.get()
+        if stats is not None and stats.budget and stats.queries >= stats.budget:
+            raise QueryBudgetExceeded(
+                f"Plus de {stats.budget} requêtes SQL dans une requête HTTP ; "
+                f"instruction la plus répétée : {stats.most_repeated()}"
+            )
+        # Le début est porté par le contexte d'exécution : rien à nettoyer si l'instruction échoue
+        context.query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        # executemany (insertions en lot) compte pour une seule exécution
+        registry.record_query(statement, time.perf_counter() - context.query_start)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI mesurant chaque requête HTTP.
+
+    Middleware ASGI pur (et non BaseHTTPMiddleware) : pas de tâche supplémentaire
+    ni de copie du corps de la réponse. La route est lue dans `scope["route"]`,
+    renseigné par le routeur, pour regrouper les chemins par gabarit.
+
+    Args:
+        app: Application ASGI mesurée.
+        registry (Metrics): Mesures à alimenter.
+        query_budget (int): Nombre maximal de requêtes SQL par requête HTTP (0 : pas de limite).
+    """
+
+    def __init__(self, app, registry: Metrics = metrics, query_budget: int = SQL_QUERY_BUDGET):
+        self.app = app
+        self.registry = registry
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(self.query_budget)
+        token = _request_stats.set(stats)
+        # Sans début de réponse (exception non gérée), le serveur répond 500
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        registry = self.registry
+        registry.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            registry.in_flight -= 1
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or UNMATCHED_ROUTE
+            registry.record_request(scope["method"], route, status, duration, stats)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Iterable[str], values: Iterable, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class PrometheusWriter:
+    """Construit une exposition au format texte de Prometheus (version 0.0.4)."""
+
+    def __init__(self):
+        self.lines = []
+
+    def _header(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...], samples: dict) -> None:
+        """
+        Ajoute un compteur.
+
+        Args:
+            name (str): Nom de la métrique (suffixe "_total" recommandé).
+            help_text (str): Description.
+            label_names (tuple[str]): Noms des étiquettes.
+            samples (dict): Valeurs des étiquettes (tuple, ou valeur seule) -> Counter ou nombre.
+        """
+        self._samples(name, "counter", help_text, label_names, samples)
+
+    def gauge(self, name: str, help_text: str, label_names: Tuple[str, ...], samples: dict) -> None:
+        """
+        Ajoute une jauge.
+
+        Args:
+            name (str): Nom de la métrique.
+            help_text (str): Description.
+            label_names (tuple[str]): Noms des étiquettes.
+            samples (dict): Valeurs des étiquettes -> nombre.
+        """
+        self._samples(name, "gauge", help_text, label_names, samples)
+
+    def _samples(self, name, kind, help_text, label_names, samples) -> None:
+        self._header(name, kind, help_text)
+        for key, value in list(samples.items()):
+            values = key if isinstance(key, tuple) else (key,)
+            value = value.value if isinstance(value, Counter) else value
+            self.lines.append(f"{name}{_labels(label_names, values)} {value}")
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...], samples: dict) -> None:
+        """
+        Ajoute un histogramme.
+
+        Args:
+            name (str): Nom de la métrique.
+            help_text (str): Description.
+            label_names (tuple[str]): Noms des étiquettes.
+            samples (dict): Valeurs des étiquettes -> Histogram.
+        """
+        self._header(name, "histogram", help_text)
+        for key, histogram in list(samples.items()):
+            values = key if isinstance(key, tuple) else (key,)
+            for bound, count in histogram.cumulative().items():
+                le = 'le="%s"' % bound
+                self.lines.append(f"{name}_bucket{_labels(label_names, values, le)} {count}")
+            labels = _labels(label_names, values)
+            self.lines.append(f"{name}_sum{labels} {histogram.sum}")
+            self.lines.append(f"{name}_count{labels} {histogram.count}")
+
+    def render(self) -> str:
+        """
+        Returns:
+            str: Exposition complète, terminée par un saut de ligne.
+        """
+        return "\n".join(self.lines) + "\n"
+
+
+def write_metrics(writer: PrometheusWriter, registry: Metrics = metrics) -> None:
+    """
+    Ajoute les mesures HTTP et SQL d'un worker à une exposition Prometheus.
+
+    Args:
+        writer (PrometheusWriter): Exposition en cours de construction.
+        registry (Metrics): Mesures à exposer.
+    """
+    writer.counter(
+        "http_requests_total", "Réponses HTTP par méthode, route et statut.",
+        ("method", "route", "status"), registry.requests,
+    )
+    writer.histogram(
+        "http_request_duration_seconds", "Durée des requêtes HTTP.", ("method", "route"), registry.latency,
+    )
+    writer.gauge("http_requests_in_flight", "Requêtes HTTP en cours.", (), {(): registry.in_flight})
+    writer.histogram("db_query_duration_seconds", "Durée des requêtes SQL.", (), {(): registry.query_time})
+    writer.histogram(
+        "db_queries_per_request", "Nombre de requêtes SQL par requête HTTP.", ("route",),
+        registry.queries_per_request,
+    )
+    writer.counter(
+        "db_slow_queries_total", f"Requêtes SQL de plus de {SLOW_QUERY_MS:g} ms.", ("route",),
+        registry.slow_queries,
+    )
+    writer.counter(
+        "db_n_plus_one_total",
+        f"Requêtes HTTP exécutant une même instruction SQL au moins {N_PLUS_ONE_THRESHOLD} fois.",
+        ("route",), registry.n_plus_one,
+    )
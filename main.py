@@ -2,22 +2,123 @@
 Point d'entrée principal de l'application FastAPI.
 
 Définit les routes, initialise l'application et configure les middlewares.
+
+Le démarrage ne touche pas au schéma (géré par Alembic : `alembic upgrade head`).
+Le cycle de vie (`lifespan`) vérifie la connexion à la base en un temps borné,
+préchauffe le pool de connexions et les processus de hachage, puis libère ces
+ressources à l'arrêt.
+
+Les routes d'authentification et d'écriture sont limitées par client
+(`RateLimitMiddleware`) : une requête au-delà de la limite reçoit un 429 avant
+toute lecture de la base ou tout hachage de mot de passe.
+
+Les réponses volumineuses (listes, export) sont compressées selon l'en-tête
+Accept-Encoding (`CompressionMiddleware` : gzip, brotli ou zstd).
+
+Chaque requête HTTP est mesurée par `MetricsMiddleware` (latence, statut, requêtes
+SQL) ; les mesures sont exposées au format Prometheus sur `/metrics`.
+
+Les changements de tâches sont diffusés en temps réel sur `/tasks/stream`
+(Server-Sent Events) et `/tasks/ws` (WebSocket), voir `events`, avec les échéances
+atteintes publiées par le planificateur (`scheduler`).
 """
 
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import text
-from routes import hello, tasks, auth_route
-from database import engine, Base
+from routes import hello, tasks, auth_route, monitoring, metrics_route, users
+import auth
+from compression import COMPRESSION_ENABLED, CompressionMiddleware
+from database import (
+    DB_POOL_WARMUP, STARTUP_DB_CHECK, STARTUP_DB_REQUIRED, STARTUP_DB_TIMEOUT,
+    AsyncSessionLocal, async_engine, check_database, engine, replica_engines, warm_up_pool,
+)
+from events import event_broker
+from instrumentation import MetricsMiddleware
+from outbox import OUTBOX_HANDLER_MODULES, OUTBOX_IN_PROCESS, OutboxWorker, load_handlers
+from rate_limit import RATE_LIMIT_ENABLED, RateLimitMiddleware
+from scheduler import DUE_SCHEDULER_ENABLED, due_scheduler
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Cycle de vie de l'application : préparation au démarrage, libération à l'arrêt.
+
+    Au démarrage :
+    - Vérifie la connexion à la base en au plus STARTUP_DB_TIMEOUT secondes (si STARTUP_DB_CHECK),
+      et refuse de démarrer si elle échoue et que STARTUP_DB_REQUIRED est actif,
+    - Ouvre DB_POOL_WARMUP connexions à l'avance,
+    - Démarre les processus de hachage en arrière-plan, sans retarder le démarrage,
+    - Démarre la réception des changements de tâches publiés par les autres workers
+      (backend d'événements Redis),
+    - Lance les consommateurs de la boîte d'envoi, avec les handlers de
+      OUTBOX_HANDLER_MODULES, si OUTBOX_IN_PROCESS est actif (sinon, ils tournent
+      dans un processus séparé : `python outbox.py`),
+    - Lance le planificateur des échéances si DUE_SCHEDULER_ENABLED est actif.
+
+    Args:
+        app (FastAPI): Application démarrée.
+
+    Raises:
+        RuntimeError: Si la base est injoignable et que STARTUP_DB_REQUIRED est actif.
+    """
+    app.state.database_ready = None
+    if STARTUP_DB_CHECK:
+        ready = await check_database(async_engine, STARTUP_DB_TIMEOUT)
+        app.state.database_ready = ready
+        if not ready:
+            if STARTUP_DB_REQUIRED:
+                raise RuntimeError(f"Base de données injoignable après {STARTUP_DB_TIMEOUT} s")
+            logger.warning("Base de données injoignable au démarrage, le worker démarre quand même")
+        elif DB_POOL_WARMUP > 1:
+            # La vérification a déjà ouvert une connexion, restée dans le pool
+            await warm_up_pool(async_engine, DB_POOL_WARMUP, STARTUP_DB_TIMEOUT)
+
+    warm_up = asyncio.create_task(asyncio.to_thread(auth.password_hasher.warm_up))
+    await event_broker.start()
+    outbox_worker = OutboxWorker(AsyncSessionLocal) if OUTBOX_IN_PROCESS else None
+    if outbox_worker is not None:
+        load_handlers(OUTBOX_HANDLER_MODULES)
+        outbox_worker.start()
+    if DUE_SCHEDULER_ENABLED:
+        due_scheduler.start()
+    try:
+        yield
+    finally:
+        await due_scheduler.stop()
+        if outbox_worker is not None:
+            await outbox_worker.stop()
+        await event_broker.stop()
+        # Le préchauffage doit être terminé avant l'arrêt du pool de hachage
+        await asyncio.gather(warm_up, return_exceptions=True)
+        await asyncio.to_thread(auth.password_hasher.shutdown)
+        await async_engine.dispose()
+        for replica in replica_engines:
+            await replica.dispose()
+        engine.dispose()
 
-# Créer les tables si elles n'existent pas
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="API")
+app = FastAPI(title="API", lifespan=lifespan)
+# Le dernier middleware ajouté est le plus externe : les réponses 429 sont aussi mesurées,
+# et la latence mesurée comprend le temps de compression
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(RateLimitMiddleware)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth_route.router, prefix='/auth', tags=["Authentification"])
 app.include_router(tasks.router, prefix="/tasks", tags=["Tasks"])
+app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(hello.router, prefix="/hello", tags=["hello"])
+app.include_router(monitoring.router, prefix="/monitoring", tags=["Monitoring"])
+app.include_router(metrics_route.router, tags=["Monitoring"])
 
 @app.get("/")
 def read_root():
@@ -29,25 +130,6 @@ def read_root():
     """
     return {"message": "Bonjour depuis votre API FastAPI"}
 
-def test_connection():
-    """
-    Teste la connexion à la base de données en exécutant une requête simple.
-
-    Cette fonction tente d'établir une connexion à la base de données et
-    d'exécuter la requête SQL "SELECT 1". Elle affiche le résultat dans la console.
-
-    Raises:
-        Exception: En cas d'échec de connexion, affiche l'erreur.
-    """
-    try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        print("Connexion OK")
-    except Exception as e:
-        print("Erreur de connexion :", e)
-
 if __name__ == "__main__":
-    test_connection()
-    Base.metadata.create_all(bind=engine)
     import uvicorn
     uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
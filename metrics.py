@@ -0,0 +1,99 @@
+"""
+Primitives de métriques en mémoire, sans dépendance externe.
+
+Ce module fournit :
+- Un histogramme à seuils fixes (compatible avec le format Prometheus),
+- Un compteur simple.
+
+Les mises à jour sont protégées par un verrou car certaines mesures proviennent
+de threads (pool de connexions synchrone, threadpool de FastAPI).
+"""
+
+import bisect
+import threading
+from typing import Dict, Sequence
+
+# Seuils par défaut, en secondes, adaptés aux latences de requêtes HTTP et SQL
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Histogramme cumulatif à seuils fixes.
+
+    Attributs :
+        buckets (tuple[float]) : Seuils supérieurs des intervalles, triés.
+        counts (list[int]) : Nombre d'observations par intervalle (non cumulé), plus +Inf.
+        count (int) : Nombre total d'observations.
+        sum (float) : Somme des valeurs observées.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Enregistre une observation.
+
+        Args:
+            value (float): Valeur mesurée (en secondes pour une durée).
+        """
+        # Premier seuil supérieur ou égal à la valeur (len(buckets) : intervalle +Inf)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self) -> Dict[str, int]:
+        """
+        Retourne les compteurs cumulés par seuil, au format des histogrammes Prometheus.
+
+        Returns:
+            dict: Seuil (chaîne, "+Inf" pour le dernier) -> nombre d'observations inférieures ou égales.
+        """
+        result, total = {}, 0
+        with self._lock:
+            for bound, count in zip(self.buckets, self.counts):
+                total += count
+                result[repr(bound)] = total
+            result["+Inf"] = total + self.counts[-1]
+        return result
+
+    def snapshot(self) -> dict:
+        """
+        Retourne un instantané sérialisable en JSON.
+
+        Returns:
+            dict: Nombre d'observations, somme, moyenne et compteurs cumulés.
+        """
+        with self._lock:
+            count, total = self.count, self.sum
+        return {
+            "count": count,
+            "sum": total,
+            "avg": total / count if count else 0.0,
+            "buckets": self.cumulative(),
+        }
+
+
+class Counter:
+    """Compteur monotone protégé par un verrou."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: int = 1) -> None:
+        """
+        Incrémente le compteur.
+
+        Args:
+            amount (int): Valeur à ajouter.
+        """
+        with self._lock:
+            self.value += amount
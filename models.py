@@ -2,10 +2,18 @@
 Définit les modèles de données utilisés par l'application avec SQLAlchemy ORM.
 
 Contient les classes User et Tache représentant respectivement les utilisateurs
-et leurs tâches associées dans la base de données.
+et leurs tâches associées dans la base de données, la boîte d'envoi (outbox) des
+travaux à effectuer après une écriture, ainsi que les index de
+recherche plein texte : index FULLTEXT sous MySQL, table virtuelle FTS5 tenue à
+jour par des triggers sous SQLite.
+
+Les relations `User.tasks` et `Tache.owner` ne se chargent jamais implicitement
+(`lazy="raise_on_sql"`) : un accès non préchargé lève une erreur au lieu d'émettre
+une requête par ligne (N+1). Elles se chargent explicitement avec `selectinload`
+ou `joinedload`.
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import Column, DDL, Integer, String, Boolean, Text, DateTime, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -25,13 +33,13 @@ class User(Base):
 
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     username = Column(String(50), unique=True, nullable=False)
     email = Column(String(100), unique=True, nullable=False)
     hashed_password = Column(String(255), nullable=False)
     is_active = Column(Boolean, default=True)
 
-    tasks = relationship("Tache", back_populates="owner")
+    tasks = relationship("Tache", back_populates="owner", lazy="raise_on_sql")
 
 
 class Tache(Base):
@@ -44,19 +52,97 @@ class Tache(Base):
         description (str) : Description détaillée de la tâche.
         status (str) : Statut de la tâche ("todo", "in_progress", "done").
         created_at (datetime) : Date et heure de création de la tâche.
+        updated_at (datetime) : Date et heure de la dernière modification (en-tête Last-Modified).
         due_date (datetime) : Date limite pour la tâche.
         owner_id (int) : Identifiant de l'utilisateur propriétaire.
+        version (int) : Numéro de version, incrémenté à chaque modification (concurrence optimiste).
         owner (User) : Relation vers l'utilisateur propriétaire.
     """
 
     __tablename__ = "taches"
+    __table_args__ = (
+        # Listes d'un propriétaire filtrées par statut et triées par date de création
+        Index("ix_taches_owner_status_created", "owner_id", "status", "created_at"),
+        # Listes d'un propriétaire filtrées sur un intervalle d'échéance
+        Index("ix_taches_owner_due", "owner_id", "due_date"),
+        # Listes d'un propriétaire triées par id (tri par défaut de /tasks/mine), sans tri en mémoire
+        Index("ix_taches_owner_id", "owner_id", "id"),
+        # Tâches ouvertes en retard ou à échéance proche (/tasks/overdue, /tasks/upcoming,
+        # planificateur des échéances) : un parcours d'intervalle par statut, déjà trié
+        Index("ix_taches_status_due", "status", "due_date"),
+        # Recherche plein texte (MySQL) ; SQLite utilise la table FTS5 définie plus bas
+        Index("ix_taches_fulltext", "title", "description", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String(100), nullable=False)
     description = Column(Text, nullable=True)
     status = Column(String(20), default="todo")  # valeurs possibles : todo, in_progress, done
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     due_date = Column(DateTime, nullable=True)
 
     owner_id = Column(Integer, ForeignKey("users.id"))
-    owner = relationship("User", back_populates="tasks")
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    owner = relationship("User", back_populates="tasks", lazy="raise_on_sql")
+
+    # Les mises à jour par l'ORM vérifient et incrémentent la version :
+    # UPDATE ... SET version = :new WHERE id = :id AND version = :old
+    __mapper_args__ = {"version_id_col": version}
+
+class OutboxMessage(Base):
+    """
+    Message de la boîte d'envoi (outbox) : travail à effectuer après une écriture.
+
+    Le message est inséré dans la même transaction que l'écriture qui le produit :
+    il existe si et seulement si l'écriture a été validée. Le worker de `outbox.py`
+    le supprime une fois traité.
+
+    Attributs :
+        id (int) : Identifiant, dans l'ordre d'insertion.
+        topic (str) : Sujet du message ("task.created", "user.registered", ...).
+        payload (str) : Contenu JSON du message.
+        status (str) : "pending" (à traiter) ou "dead" (abandonné après OUTBOX_MAX_ATTEMPTS échecs).
+        attempts (int) : Nombre de traitements échoués.
+        created_at (datetime) : Date d'insertion.
+        available_at (datetime) : Date à partir de laquelle le message peut être pris
+            (reportée après un échec, ou pendant la prise d'un lot sans verrou de ligne).
+        claimed_by (str) : Jeton du lot qui a pris le message (bases sans SKIP LOCKED).
+        last_error (str) : Dernière erreur de traitement.
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        # Prise des messages disponibles, dans l'ordre d'insertion
+        Index("ix_outbox_status_available", "status", "available_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)
+    status = Column(String(10), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    claimed_by = Column(String(32), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+# Table FTS5 à contenu externe : elle n'indexe que les colonnes title et description
+# de `taches` (même rowid que taches.id), et les triggers la tiennent à jour.
+FTS_TABLE = "taches_fts"
+SQLITE_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title, description, content='taches', content_rowid='id')",
+    f"CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON taches BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    f"CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON taches BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); END",
+    f"CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, description ON taches BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description) "
+    f"VALUES ('delete', old.id, old.title, old.description); "
+    f"INSERT INTO {FTS_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+)
+
+for _statement in SQLITE_FTS_DDL:
+    event.listen(Tache.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Tache.__table__, "before_drop", DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"))
@@ -0,0 +1,127 @@
+"""
+Représentation MessagePack des listes et de l'export de tâches.
+
+Ce module fournit :
+- La négociation de l'en-tête Accept : MessagePack n'est servi que si le client le
+  demande explicitement (application/msgpack, application/x-msgpack ou
+  application/vnd.msgpack) avec une préférence au moins égale à celle de JSON,
+- La conversion d'un corps JSON mis en cache et de lignes de colonnes en MessagePack,
+- L'ETag de la variante MessagePack d'une page, distinct de celui de la variante JSON.
+
+Les documents ont la même forme que TaskResponse : mêmes clés, dans le même ordre,
+dates en chaînes ISO 8601. Seul le codage change ; un client peut passer d'une
+représentation à l'autre sans adapter son modèle.
+"""
+
+import json
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+import msgpack
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack")
+JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+
+def _media_weights(accept: str) -> dict:
+    weights = {}
+    for item in accept.split(","):
+        media_type, *params = item.strip().lower().split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[media_type.strip()] = weight
+    return weights
+
+
+def prefers_msgpack(accept: Optional[str]) -> bool:
+    """
+    Indique si le client préfère MessagePack à JSON.
+
+    Args:
+        accept (str | None): Valeur de l'en-tête Accept.
+
+    Returns:
+        bool: True si un type MessagePack est listé avec une valeur q positive et au
+            moins égale à celle de JSON (à égalité, la représentation la plus compacte).
+    """
+    if not accept:
+        return False
+    weights = _media_weights(accept)
+    msgpack_weight = max((weights.get(name, 0.0) for name in MSGPACK_MEDIA_TYPES), default=0.0)
+    if msgpack_weight <= 0:
+        return False
+    json_weight = next((weights[name] for name in JSON_MEDIA_TYPES if name in weights), 0.0)
+    return msgpack_weight >= json_weight
+
+
+def variant_etag(etag: str) -> str:
+    """
+    Construit l'ETag de la variante MessagePack d'une ressource.
+
+    Args:
+        etag (str): ETag de la variante JSON, entre guillemets.
+
+    Returns:
+        str: ETag distinct, par exemple '"abc-msgpack"' pour '"abc"'.
+    """
+    return etag[:-1] + '-msgpack"'
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable en MessagePack : {type(value).__name__}")
+
+
+def json_to_msgpack(body: str) -> bytes:
+    """
+    Convertit un corps JSON (page mise en cache) en MessagePack.
+
+    Args:
+        body (str): Document JSON.
+
+    Returns:
+        bytes: Même document codé en MessagePack.
+    """
+    return msgpack.packb(json.loads(body))
+
+
+def rows_msgpack(rows: Iterable[Sequence], columns: Sequence[str]) -> bytes:
+    """
+    Sérialise des lignes de colonnes en tableau MessagePack de documents.
+
+    Args:
+        rows: Lignes (tuples) dans l'ordre de `columns`.
+        columns: Noms des champs.
+
+    Returns:
+        bytes: Tableau MessagePack, de même forme que le tableau JSON correspondant.
+    """
+    return msgpack.packb([dict(zip(columns, row)) for row in rows], default=_default)
+
+
+def rows_msgpack_stream(rows: Iterable[Sequence], columns: Sequence[str]) -> bytes:
+    """
+    Sérialise des lignes de colonnes en suite de documents MessagePack concaténés (export).
+
+    Un lecteur en flux (`msgpack.Unpacker`) décode les documents au fil de la réception,
+    comme les lignes d'un export NDJSON.
+
+    Args:
+        rows: Lignes (tuples) dans l'ordre de `columns`.
+        columns: Noms des champs.
+
+    Returns:
+        bytes: Documents MessagePack concaténés, un par ligne.
+    """
+    packer = msgpack.Packer(default=_default, autoreset=False)
+    for row in rows:
+        packer.pack(dict(zip(columns, row)))
+    return packer.bytes()
@@ -0,0 +1,465 @@
+"""
+Boîte d'envoi transactionnelle (outbox) et worker de traitement des messages.
+
+Ce module fournit :
+- `enqueue`, qui ajoute des messages à la table `outbox` dans la transaction de
+  l'écriture en cours : le travail à faire après une écriture (notifications,
+  indexation, diffusion...) est enregistré avec elle, sans allonger la requête,
+- Un registre de handlers asynchrones par sujet (`handler`),
+- Un worker asyncio à plusieurs consommateurs, qui traite les messages par lots,
+  avec nouvelle tentative et délai exponentiel après un échec, puis abandon
+  (statut "dead") après OUTBOX_MAX_ATTEMPTS échecs,
+- Des compteurs de débit (messages traités, reportés, abandonnés, durée des lots).
+
+Prise d'un lot :
+- MySQL / PostgreSQL : `SELECT ... FOR UPDATE SKIP LOCKED` ; chaque consommateur
+  verrouille des lignes différentes, et le lot est traité puis acquitté dans la
+  même transaction,
+- Autres bases (SQLite) : sans verrou de ligne, le lot est réservé par un UPDATE
+  qui pose un jeton (`claimed_by`) et reporte `available_at` de OUTBOX_LEASE_SECONDS ;
+  un lot dont le consommateur s'est arrêté redevient disponible à l'expiration.
+
+Seuls les sujets listés dans OUTBOX_TOPICS sont enregistrés (aucun par défaut) :
+une écriture n'insère de message que si un consommateur est déployé pour ce sujet,
+sans quoi la table grossirait sans fin. Les handlers sont enregistrés par
+`@handler("<sujet>")` dans des modules chargés au démarrage du worker
+(OUTBOX_HANDLER_MODULES ou `--handlers`).
+
+Les messages sont traités au moins une fois (un handler peut être rappelé après un
+arrêt brutal) et sans ordre garanti entre consommateurs : les handlers doivent être
+idempotents. Un message sans handler pour son sujet est acquitté sans traitement.
+
+Usage (processus séparé des workers de l'API) :
+    OUTBOX_TOPICS=task.created,user.registered \
+        python outbox.py --handlers notifications --consumers 4 --batch-size 100
+
+Avec OUTBOX_IN_PROCESS=true, les consommateurs tournent dans chaque worker de l'API
+(voir `main.lifespan`) et leurs compteurs sont exposés sur `/metrics`.
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from metrics import Counter, Histogram
+from models import OutboxMessage
+from response_cache import dumps
+from settings import env_bool
+
+logger = logging.getLogger(__name__)
+
+# Nombre de consommateurs concurrents et taille des lots
+OUTBOX_CONSUMERS = int(os.getenv("OUTBOX_CONSUMERS", "4"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+# Attente, en secondes, lorsqu'il n'y a plus de message disponible
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+# Échecs avant abandon, et délai avant nouvelle tentative : base * 2^(échecs - 1), plafonné
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "1"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "300"))
+# Durée de réservation d'un lot sur les bases sans SKIP LOCKED
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+# Intervalle, en secondes, du rapport de débit journalisé par le processus worker
+OUTBOX_REPORT_SECONDS = float(os.getenv("OUTBOX_REPORT_SECONDS", "60"))
+# Consommateurs lancés dans chaque worker de l'API plutôt que dans un processus séparé
+OUTBOX_IN_PROCESS = env_bool("OUTBOX_IN_PROCESS", False)
+# Sujets enregistrés par les écritures, séparés par des virgules ("*" : tous ; vide : aucun)
+OUTBOX_TOPICS = frozenset(topic.strip() for topic in os.getenv("OUTBOX_TOPICS", "").split(",") if topic.strip())
+# Modules importés au démarrage du worker, qui enregistrent leurs handlers avec `@handler`
+OUTBOX_HANDLER_MODULES = [name.strip() for name in os.getenv("OUTBOX_HANDLER_MODULES", "").split(",") if name.strip()]
+
+PENDING = "pending"
+DEAD = "dead"
+# Dialectes qui savent sauter les lignes verrouillées par un autre consommateur
+SKIP_LOCKED_DIALECTS = ("mysql", "mariadb", "postgresql")
+# Seuils, en secondes, de l'histogramme de durée des lots
+BATCH_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Handler = Callable[[dict], Awaitable[None]]
+
+HANDLERS: Dict[str, Handler] = {}
+
+
+def handler(topic: str):
+    """
+    Décorateur qui enregistre le handler d'un sujet pour le worker par défaut.
+
+    Args:
+        topic (str): Sujet traité ("task.created", ...).
+
+    Returns:
+        Callable: Décorateur qui retourne la fonction inchangée.
+    """
+    def register(function: Handler) -> Handler:
+        HANDLERS[topic] = function
+        return function
+    return register
+
+
+def load_handlers(modules: Iterable[str]) -> None:
+    """
+    Importe les modules qui enregistrent des handlers (`@handler`), et signale les
+    sujets de OUTBOX_TOPICS qui n'en ont aucun.
+
+    Args:
+        modules (Iterable[str]): Noms de modules importables (ex: "notifications").
+    """
+    for name in modules:
+        importlib.import_module(name)
+    missing = sorted(OUTBOX_TOPICS - set(HANDLERS) - {"*"})
+    if missing:
+        logger.warning("Sujets enregistrés sans handler (acquittés sans traitement) : %s", ", ".join(missing))
+
+
+def is_recorded(topic: str) -> bool:
+    """
+    Indique si les messages d'un sujet sont enregistrés (voir OUTBOX_TOPICS).
+
+    Args:
+        topic (str): Sujet du message.
+
+    Returns:
+        bool: True si le sujet, ou "*", figure dans OUTBOX_TOPICS.
+    """
+    return topic in OUTBOX_TOPICS or "*" in OUTBOX_TOPICS
+
+
+async def enqueue(session: AsyncSession, topic: str, payloads: Iterable[dict]) -> None:
+    """
+    Ajoute des messages à la boîte d'envoi, dans la transaction de la session.
+
+    Les messages sont insérés en une instruction (executemany) et ne sont visibles
+    du worker qu'après le commit de la session ; un rollback les annule avec l'écriture.
+    Rien n'est inséré pour un sujet absent de OUTBOX_TOPICS.
+
+    Args:
+        session (AsyncSession): Session de l'écriture en cours.
+        topic (str): Sujet des messages.
+        payloads (Iterable[dict]): Contenus des messages, sérialisés en JSON.
+    """
+    if not is_recorded(topic):
+        return
+    now = datetime.utcnow()
+    rows = [
+        {"topic": topic, "payload": dumps(payload), "created_at": now, "available_at": now}
+        for payload in payloads
+    ]
+    if rows:
+        await session.execute(insert(OutboxMessage), rows)
+
+
+def backoff(attempts: int, base: float = OUTBOX_BACKOFF_SECONDS, cap: float = OUTBOX_BACKOFF_MAX_SECONDS) -> float:
+    """
+    Délai avant la prochaine tentative d'un message.
+
+    Args:
+        attempts (int): Nombre d'échecs, y compris celui qui vient d'avoir lieu.
+        base (float): Délai après le premier échec, en secondes.
+        cap (float): Délai maximal, en secondes.
+
+    Returns:
+        float: Délai en secondes.
+    """
+    return min(cap, base * 2 ** (attempts - 1))
+
+
+class OutboxStats:
+    """
+    Compteurs de débit du worker.
+
+    Attributs :
+        processed (Counter) : Messages traités avec succès (ou sans handler).
+        retried (Counter) : Échecs reportés pour une nouvelle tentative.
+        dead (Counter) : Messages abandonnés après OUTBOX_MAX_ATTEMPTS échecs.
+        skipped (Counter) : Messages acquittés faute de handler pour leur sujet.
+        batches (Histogram) : Durée de traitement des lots non vides, en secondes.
+        started (float) : Instant de création (time.monotonic), base du débit moyen.
+    """
+
+    def __init__(self):
+        self.processed = Counter()
+        self.retried = Counter()
+        self.dead = Counter()
+        self.skipped = Counter()
+        self.batches = Histogram(BATCH_BUCKETS)
+        self.started = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """
+        Retourne un instantané des compteurs.
+
+        Returns:
+            dict: Compteurs, nombre de lots et débit moyen (messages traités par seconde).
+        """
+        elapsed = time.monotonic() - self.started
+        return {
+            "processed": self.processed.value,
+            "retried": self.retried.value,
+            "dead": self.dead.value,
+            "skipped": self.skipped.value,
+            "batches": self.batches.count,
+            "throughput": self.processed.value / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+outbox_stats = OutboxStats()
+
+
+class OutboxWorker:
+    """
+    Consommateurs concurrents de la boîte d'envoi.
+
+    Attributs :
+        session_factory : Fabrique de sessions asynchrones (base primaire).
+        handlers (dict) : Sujet -> coroutine recevant le contenu du message.
+        consumers (int) : Nombre de consommateurs lancés par `start`.
+        batch_size (int) : Messages pris par lot.
+        poll_interval (float) : Attente lorsqu'aucun message n'est disponible, en secondes.
+        max_attempts (int) : Échecs avant abandon d'un message.
+        lease_seconds (float) : Réservation d'un lot sans SKIP LOCKED, en secondes.
+        stats (OutboxStats) : Compteurs de débit.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        handlers: Optional[Dict[str, Handler]] = None,
+        consumers: int = OUTBOX_CONSUMERS,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_SECONDS,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        lease_seconds: float = OUTBOX_LEASE_SECONDS,
+        stats: Optional[OutboxStats] = None,
+    ):
+        self.session_factory = session_factory
+        self.handlers = HANDLERS if handlers is None else handlers
+        self.consumers = consumers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.stats = stats if stats is not None else outbox_stats
+        self._tasks: List[asyncio.Task] = []
+
+    def _available(self, now: datetime):
+        return (
+            select(OutboxMessage)
+            .where(OutboxMessage.status == PENDING, OutboxMessage.available_at <= now)
+            .order_by(OutboxMessage.id)
+            .limit(self.batch_size)
+        )
+
+    async def run_once(self) -> int:
+        """
+        Prend un lot de messages disponibles, le traite et l'acquitte.
+
+        Returns:
+            int: Nombre de messages pris (0 si aucun n'était disponible).
+        """
+        async with self.session_factory() as session:
+            if session.get_bind().dialect.name in SKIP_LOCKED_DIALECTS:
+                return await self._run_locked(session)
+            return await self._run_leased(session)
+
+    async def _run_locked(self, session: AsyncSession) -> int:
+        # Les lignes restent verrouillées jusqu'au commit : traitement et acquittement
+        # dans la même transaction, les autres consommateurs sautent ces lignes
+        now = datetime.utcnow()
+        messages = list(await session.scalars(self._available(now).with_for_update(skip_locked=True)))
+        if messages:
+            await self._process(session, messages, now)
+        await session.commit()
+        return len(messages)
+
+    async def _run_leased(self, session: AsyncSession) -> int:
+        # Réservation du lot par un UPDATE atomique, validé avant le traitement
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        candidates = self._available(now).with_only_columns(OutboxMessage.id).scalar_subquery()
+        await session.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(candidates))
+            .values(claimed_by=token, available_at=now + timedelta(seconds=self.lease_seconds))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        messages = list(await session.scalars(
+            select(OutboxMessage).where(OutboxMessage.claimed_by == token).order_by(OutboxMessage.id)
+        ))
+        if messages:
+            await self._process(session, messages, now, token)
+            await session.commit()
+        return len(messages)
+
+    async def _process(self, session: AsyncSession, messages: List[OutboxMessage], now: datetime,
+                       token: Optional[str] = None) -> None:
+        start = time.perf_counter()
+        done = []
+        for message in messages:
+            function = self.handlers.get(message.topic)
+            if function is None:
+                self.stats.skipped.inc()
+                done.append(message.id)
+                continue
+            try:
+                await function(json.loads(message.payload))
+            except Exception as exc:
+                await self._fail(session, message, exc, now, token)
+            else:
+                done.append(message.id)
+        if done:
+            statement = delete(OutboxMessage).where(OutboxMessage.id.in_(done))
+            if token is not None:
+                # Lot repris par un autre consommateur après expiration : il l'acquittera
+                statement = statement.where(OutboxMessage.claimed_by == token)
+            await session.execute(statement.execution_options(synchronize_session=False))
+            self.stats.processed.inc(len(done))
+        self.stats.batches.observe(time.perf_counter() - start)
+
+    async def _fail(self, session: AsyncSession, message: OutboxMessage, exc: Exception,
+                    now: datetime, token: Optional[str]) -> None:
+        attempts = message.attempts + 1
+        values = {"attempts": attempts, "claimed_by": None, "last_error": f"{type(exc).__name__}: {exc}"[:2000]}
+        if attempts >= self.max_attempts:
+            values["status"] = DEAD
+            self.stats.dead.inc()
+            logger.error("Message %s (%s) abandonné après %d échecs", message.id, message.topic, attempts,
+                         exc_info=exc)
+        else:
+            values["available_at"] = now + timedelta(seconds=backoff(attempts))
+            self.stats.retried.inc()
+            logger.warning("Message %s (%s) en échec (%d/%d) : %s", message.id, message.topic, attempts,
+                           self.max_attempts, exc)
+        statement = update(OutboxMessage).where(OutboxMessage.id == message.id)
+        if token is not None:
+            statement = statement.where(OutboxMessage.claimed_by == token)
+        await session.execute(statement.values(**values).execution_options(synchronize_session=False))
+
+    async def drain(self) -> int:
+        """
+        Traite les messages disponibles jusqu'à épuisement.
+
+        Returns:
+            int: Nombre de messages pris.
+        """
+        total = 0
+        while True:
+            taken = await self.run_once()
+            total += taken
+            if taken < self.batch_size:
+                return total
+
+    async def consume(self) -> None:
+        """
+        Boucle d'un consommateur : traite les lots, puis attend poll_interval quand la boîte est vide.
+
+        Une erreur hors handler (base indisponible, message illisible...) est journalisée
+        et le consommateur réessaie après un délai exponentiel, au lieu de s'arrêter.
+        """
+        failures = 0
+        while True:
+            try:
+                taken = await self.run_once()
+            except Exception:
+                failures += 1
+                logger.exception("Lot de la boîte d'envoi en échec (%d d'affilée)", failures)
+                await asyncio.sleep(backoff(failures, self.poll_interval))
+                continue
+            failures = 0
+            if taken < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        """Lance les consommateurs dans la boucle d'événements courante."""
+        self._tasks = [asyncio.create_task(self.consume()) for _ in range(self.consumers)]
+
+    async def stop(self) -> None:
+        """Arrête les consommateurs ; un lot en cours redevient disponible (rollback ou fin de réservation)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def backlog(self) -> dict:
+        """
+        Retourne l'état de la boîte d'envoi.
+
+        Returns:
+            dict: Messages en attente, messages abandonnés et âge du plus ancien message en attente (secondes).
+        """
+        async with self.session_factory() as session:
+            counts = dict((await session.execute(
+                select(OutboxMessage.status, func.count()).group_by(OutboxMessage.status)
+            )).all())
+            oldest = await session.scalar(select(func.min(OutboxMessage.created_at)).where(
+                OutboxMessage.status == PENDING
+            ))
+        age = (datetime.utcnow() - oldest).total_seconds() if oldest is not None else 0.0
+        return {"pending": counts.get(PENDING, 0), "dead": counts.get(DEAD, 0), "oldest_pending_seconds": age}
+
+
+async def report(worker: OutboxWorker, interval: float = OUTBOX_REPORT_SECONDS) -> None:
+    """
+    Journalise périodiquement le débit du worker et l'état de la boîte d'envoi.
+
+    Args:
+        worker (OutboxWorker): Worker observé.
+        interval (float): Intervalle entre deux rapports, en secondes.
+    """
+    previous, last = worker.stats.processed.value, time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now, processed = time.monotonic(), worker.stats.processed.value
+        stats, backlog = worker.stats.snapshot(), await worker.backlog()
+        logger.info(
+            "outbox : %.1f messages/s (%d traités, %d reportés, %d abandonnés), %d en attente, retard %.1f s",
+            (processed - previous) / (now - last), stats["processed"], stats["retried"], stats["dead"],
+            backlog["pending"], backlog["oldest_pending_seconds"],
+        )
+        previous, last = processed, now
+
+
+async def run_worker(consumers: int, batch_size: int) -> None:
+    from database import AsyncSessionLocal, async_engine
+
+    if not OUTBOX_TOPICS:
+        logger.warning("OUTBOX_TOPICS est vide : les écritures n'enregistrent aucun message")
+    worker = OutboxWorker(AsyncSessionLocal, consumers=consumers, batch_size=batch_size)
+    worker.start()
+    reporter = asyncio.create_task(report(worker))
+    logger.info("Worker outbox démarré : %d consommateurs, lots de %d messages", consumers, batch_size)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        reporter.cancel()
+        await worker.stop()
+        await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de la boîte d'envoi (outbox).")
+    parser.add_argument("--consumers", type=int, default=OUTBOX_CONSUMERS)
+    parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+    parser.add_argument("--handlers", action="append", default=list(OUTBOX_HANDLER_MODULES),
+                        help="Module qui enregistre des handlers (répétable)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s")
+    load_handlers(args.handlers)
+    try:
+        asyncio.run(run_worker(args.consumers, args.batch_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
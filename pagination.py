@@ -0,0 +1,139 @@
+"""
+Pagination par curseur (keyset) pour les listes de tâches.
+
+Au lieu d'un OFFSET, dont le coût augmente avec la profondeur de la page,
+chaque page est repérée par la clé de tri de sa dernière ligne. La page suivante
+est obtenue avec une condition `(colonne, id) > (valeur, dernier_id)`, ce qui
+permet à la base de reprendre directement dans l'index.
+
+Ce module fournit :
+- L'encodage et le décodage de curseurs opaques,
+- L'application de la condition keyset et du tri à une requête SQLAlchemy.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+# Taille de page par défaut et taille maximale acceptée
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Colonnes sur lesquelles le tri (et donc le curseur) est autorisé
+SORT_FIELDS = ("id", "created_at", "due_date")
+
+
+class InvalidCursor(ValueError):
+    """Levée lorsqu'un curseur est illisible ou ne correspond pas au tri demandé."""
+
+
+def encode_cursor(sort: str, order: str, value: Any, last_id: int) -> str:
+    """
+    Encode la position de la dernière ligne d'une page en curseur opaque.
+
+    Args:
+        sort (str): Colonne de tri ("id", "created_at" ou "due_date").
+        order (str): Sens du tri ("asc" ou "desc").
+        value (Any): Valeur de la colonne de tri pour la dernière ligne.
+        last_id (int): Identifiant de la dernière ligne.
+
+    Returns:
+        str: Curseur encodé en base64 URL-safe.
+    """
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps({"s": sort, "o": order, "v": value, "i": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    """
+    Décode un curseur et vérifie qu'il a été émis pour le même tri.
+
+    Args:
+        cursor (str): Curseur reçu du client.
+        sort (str): Colonne de tri de la requête courante.
+        order (str): Sens du tri de la requête courante.
+
+    Raises:
+        InvalidCursor: Si le curseur est malformé ou émis pour un autre tri.
+
+    Returns:
+        tuple: (valeur de la colonne de tri, dernier id).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if data["s"] != sort or data["o"] != order:
+            raise InvalidCursor("Le curseur ne correspond pas au tri demandé")
+        value, last_id = data["v"], int(data["i"])
+        if sort in ("created_at", "due_date"):
+            value = datetime.fromisoformat(value)
+        return value, last_id
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("Curseur invalide") from exc
+
+
+def apply_keyset(query, model, sort: str, order: str, cursor: Optional[str]):
+    """
+    Applique le tri et, si un curseur est fourni, la condition keyset à une requête.
+
+    Args:
+        query: Requête ou `select()` SQLAlchemy sur le modèle.
+        model: Classe ORM possédant une colonne `id` et la colonne de tri.
+        sort (str): Colonne de tri.
+        order (str): Sens du tri ("asc" ou "desc").
+        cursor (str | None): Curseur de la page précédente.
+
+    Raises:
+        InvalidCursor: Si le curseur est invalide.
+
+    Returns:
+        La requête triée et filtrée à partir de la position du curseur.
+    """
+    column = getattr(model, sort)
+    descending = order == "desc"
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, order)
+        if sort == "id":
+            query = query.where(model.id < last_id if descending else model.id > last_id)
+        elif descending:
+            query = query.where(or_(column < value, and_(column == value, model.id < last_id)))
+        else:
+            query = query.where(or_(column > value, and_(column == value, model.id > last_id)))
+
+    if sort == "id":
+        return query.order_by(model.id.desc() if descending else model.id.asc())
+    if descending:
+        return query.order_by(column.desc(), model.id.desc())
+    return query.order_by(column.asc(), model.id.asc())
+
+
+def next_cursor(rows: list, limit: int, sort: str, order: str) -> Optional[str]:
+    """
+    Calcule le curseur de la page suivante à partir des lignes lues.
+
+    La requête doit avoir été exécutée avec `limit + 1` lignes : la présence de la
+    ligne supplémentaire indique qu'une page suivante existe. Elle est retirée de `rows`.
+
+    Args:
+        rows (list): Lignes lues (modifiée en place).
+        limit (int): Taille de page demandée.
+        sort (str): Colonne de tri.
+        order (str): Sens du tri.
+
+    Returns:
+        str | None: Curseur de la page suivante, ou None s'il s'agit de la dernière page.
+    """
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    last = rows[-1]
+    return encode_cursor(sort, order, getattr(last, sort), last.id)
@@ -0,0 +1,601 @@
+"""
+Limitation du débit et de la concurrence des requêtes par client.
+
+Ce module fournit :
+- Des règles par route (chemin exact ou préfixe, méthodes) et par clé : adresse IP,
+  nom d'utilisateur (lu dans le corps JSON) ou sujet du token d'accès,
+- Un seau à jetons (token bucket) par règle et par clé : `burst` requêtes d'affilée,
+  puis `rate` requêtes par seconde. Backend en mémoire du processus (coût O(1) par
+  requête, seaux pleins oubliés) ou backend Redis partagé entre workers (script Lua
+  atomique),
+- Une limite de requêtes simultanées par règle et par clé, propre au worker,
+- Un middleware ASGI qui répond 429 avec `Retry-After` avant le routage : une requête
+  refusée n'ouvre pas de session, n'interroge pas la base et ne hache aucun mot de passe.
+
+Avec le backend en mémoire, chaque worker a ses propres seaux : la limite effective
+est multipliée par le nombre de workers.
+
+Derrière un proxy, l'adresse vue par le serveur est celle du proxy : sans
+configuration, tous les clients partagent alors un seul seau par règle. Il faut soit
+lancer uvicorn avec `--proxy-headers` (et `--forwarded-allow-ips`), soit déclarer les
+proxys dans RATE_LIMIT_TRUSTED_PROXIES : l'adresse du client est alors lue dans
+l'en-tête RATE_LIMIT_FORWARDED_HEADER, seulement pour les requêtes venant de ces proxys.
+"""
+
+import ipaddress
+import json
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+import auth
+from cache import TTLCache
+from metrics import Counter
+from response_cache import REDIS_URL
+from settings import env_bool, redis_client
+
+# Middleware de limitation monté sur l'application ("false" pour le désactiver)
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+# Backend des seaux : "memory" (par défaut, par worker) ou "redis" (REDIS_URL, partagé)
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+# Nombre maximal de seaux gardés en mémoire (les moins récemment utilisés sont oubliés)
+RATE_LIMIT_SIZE = int(os.getenv("RATE_LIMIT_SIZE", "100000"))
+# Débits par règle, au format "<requêtes>/<second|minute|hour>" ("0" pour désactiver la règle)
+RATE_LIMIT_LOGIN_IP = os.getenv("RATE_LIMIT_LOGIN_IP", "20/minute")
+RATE_LIMIT_LOGIN_USER = os.getenv("RATE_LIMIT_LOGIN_USER", "5/minute")
+RATE_LIMIT_REGISTER_IP = os.getenv("RATE_LIMIT_REGISTER_IP", "5/minute")
+RATE_LIMIT_WRITES = os.getenv("RATE_LIMIT_WRITES", "300/minute")
+# Requêtes d'authentification simultanées par adresse IP (0 : pas de limite)
+RATE_LIMIT_AUTH_CONCURRENCY = int(os.getenv("RATE_LIMIT_AUTH_CONCURRENCY", "2"))
+# Proxys de confiance, adresses ou réseaux séparés par des virgules (vide : en-têtes ignorés)
+RATE_LIMIT_TRUSTED_PROXIES = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "")
+# En-tête portant l'adresse du client, lu seulement derrière un proxy de confiance
+RATE_LIMIT_FORWARDED_HEADER = os.getenv("RATE_LIMIT_FORWARDED_HEADER", "X-Forwarded-For")
+
+# Taille maximale du corps lu pour en extraire le nom d'utilisateur
+MAX_KEY_BODY_SIZE = 64 * 1024
+# Retry-After d'une requête refusée par la limite de concurrence, en secondes
+CONCURRENCY_RETRY_AFTER = 1
+
+KEY_KINDS = ("ip", "username", "subject")
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+PERIODS = {"s": 1, "second": 1, "m": 60, "minute": 60, "h": 3600, "hour": 3600}
+
+
+def parse_rate(value: str) -> Optional[Tuple[float, int]]:
+    """
+    Lit un débit au format "<requêtes>/<période>", par exemple "5/minute".
+
+    Args:
+        value (str): Débit ; "0" ou une chaîne vide désactive la limite.
+
+    Raises:
+        ValueError: Si le format ou la période est invalide.
+
+    Returns:
+        tuple | None: (jetons rendus par seconde, taille du seau), ou None si désactivé.
+    """
+    value = value.strip()
+    if value in ("", "0"):
+        return None
+    count, _, period = value.partition("/")
+    if int(count) <= 0 or period not in PERIODS:
+        raise ValueError(f"Débit invalide : {value!r}")
+    return int(count) / PERIODS[period], int(count)
+
+
+def parse_networks(value: str) -> tuple:
+    """
+    Lit une liste d'adresses ou de réseaux séparés par des virgules.
+
+    Args:
+        value (str): Par exemple "10.0.0.0/8, 127.0.0.1".
+
+    Raises:
+        ValueError: Si une adresse ou un réseau est invalide.
+
+    Returns:
+        tuple: Réseaux (une adresse seule est un réseau /32 ou /128).
+    """
+    return tuple(ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip())
+
+
+def _is_trusted(address: str, networks) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_address(scope: dict, trusted_proxies=(), forwarded_header: str = RATE_LIMIT_FORWARDED_HEADER) -> Optional[str]:
+    """
+    Retourne l'adresse IP du client d'une requête.
+
+    Si la requête vient d'un proxy de confiance, l'adresse est lue dans l'en-tête
+    `forwarded_header` (liste "client, proxy1, proxy2") : la plus à droite qui n'est pas
+    un proxy de confiance. Les entrées plus à gauche, ajoutées par le client lui-même,
+    sont ignorées.
+
+    Args:
+        scope (dict): Scope ASGI de la requête.
+        trusted_proxies: Réseaux des proxys de confiance (voir `parse_networks`).
+        forwarded_header (str): Nom de l'en-tête, par exemple "X-Forwarded-For".
+
+    Returns:
+        str | None: Adresse du client, ou None si le serveur ne la connaît pas.
+    """
+    client = scope.get("client")
+    address = client[0] if client else None
+    if address is None or not _is_trusted(address, trusted_proxies):
+        return address
+    name = forwarded_header.lower().encode("latin-1")
+    hops = [
+        hop.strip()
+        for header, value in scope.get("headers", ())
+        if header == name
+        for hop in value.decode("latin-1").split(",")
+    ]
+    for hop in reversed(hops):
+        if hop and not _is_trusted(hop, trusted_proxies):
+            return hop
+    return address
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """
+    Règle de limitation d'une route.
+
+    Attributs :
+        name (str) : Nom de la règle (clés des seaux et métriques).
+        path (str) : Chemin de la route, ou préfixe si `prefix` est vrai.
+        methods (frozenset) : Méthodes HTTP concernées.
+        key (str) : Clé du client : "ip", "username" (corps JSON) ou "subject"
+            (sujet du token d'accès, adresse IP sans token valide).
+        rate (float) : Jetons rendus par seconde (0 : pas de limite de débit).
+        burst (int) : Taille du seau, soit le nombre de requêtes acceptées d'affilée.
+        concurrency (int) : Requêtes simultanées par clé (0 : pas de limite).
+        prefix (bool) : Vrai si `path` est un préfixe.
+    """
+
+    name: str
+    path: str
+    methods: FrozenSet[str]
+    key: str = "ip"
+    rate: float = 0.0
+    burst: int = 0
+    concurrency: int = 0
+    prefix: bool = False
+
+    def matches(self, method: str, path: str) -> bool:
+        """Vrai si la règle s'applique à cette méthode et à ce chemin."""
+        if method not in self.methods:
+            return False
+        return path.startswith(self.path) if self.prefix else path == self.path
+
+
+def rule(name: str, path: str, methods, key: str, rate: str = "0", concurrency: int = 0,
+         prefix: bool = False) -> Optional[RateLimitRule]:
+    """
+    Construit une règle à partir d'un débit au format de `parse_rate`.
+
+    Args:
+        name (str): Nom de la règle.
+        path (str): Chemin ou préfixe.
+        methods: Méthodes HTTP concernées.
+        key (str): Clé du client ("ip", "username" ou "subject").
+        rate (str): Débit, par exemple "5/minute".
+        concurrency (int): Requêtes simultanées par clé.
+        prefix (bool): Vrai si `path` est un préfixe.
+
+    Raises:
+        ValueError: Si la clé ou le débit est invalide.
+
+    Returns:
+        RateLimitRule | None: Règle, ou None si elle ne limite rien.
+    """
+    if key not in KEY_KINDS:
+        raise ValueError(f"Clé de limitation inconnue : {key}")
+    limit = parse_rate(rate)
+    if limit is None and concurrency <= 0:
+        return None
+    per_second, burst = limit or (0.0, 0)
+    return RateLimitRule(name, path, frozenset(methods), key, per_second, burst, concurrency, prefix)
+
+
+def default_rules() -> List[RateLimitRule]:
+    """
+    Règles par défaut, réglées par les variables RATE_LIMIT_*.
+
+    Returns:
+        List[RateLimitRule]: Connexion par IP et par nom d'utilisateur, inscription par IP,
+            concurrence des routes d'authentification par IP, écritures de tâches par utilisateur.
+    """
+    rules = [
+        rule("login_ip", "/auth/login", {"POST"}, "ip", RATE_LIMIT_LOGIN_IP),
+        rule("login_user", "/auth/login", {"POST"}, "username", RATE_LIMIT_LOGIN_USER),
+        rule("register_ip", "/auth/register", {"POST"}, "ip", RATE_LIMIT_REGISTER_IP),
+        rule("auth_concurrency", "/auth/", {"POST"}, "ip", concurrency=RATE_LIMIT_AUTH_CONCURRENCY, prefix=True),
+        rule("task_writes", "/tasks", WRITE_METHODS, "subject", RATE_LIMIT_WRITES, prefix=True),
+    ]
+    return [item for item in rules if item is not None]
+
+
+class MemoryBackend:
+    """
+    Seaux à jetons en mémoire du processus.
+
+    Chaque seau est un couple (jetons, date de mise à jour), recalculé à chaque
+    requête : aucune tâche de fond, et un coût constant par requête. Un seau expire
+    lorsqu'il serait de nouveau plein : seuls les clients récents occupent la mémoire.
+
+    Attributs :
+        buckets (TTLCache) : Seaux par clé, bornés en nombre.
+        clock (Callable) : Horloge monotone, en secondes.
+    """
+
+    def __init__(self, maxsize: int = RATE_LIMIT_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.buckets = TTLCache(maxsize=maxsize)
+        self.clock = clock
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        now = self.clock()
+        tokens, updated = self.buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        if tokens >= cost:
+            tokens -= cost
+            wait = 0.0
+        else:
+            wait = (cost - tokens) / rate
+        self.buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+        return wait
+
+    async def refund(self, key: str, rate: float, burst: int, cost: float = 1.0) -> None:
+        now = self.clock()
+        tokens, updated = self.buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate + cost)
+        if tokens >= burst:
+            self.buckets.delete(key)
+        else:
+            self.buckets.set(key, (tokens, now), ttl=(burst - tokens) / rate)
+
+    def stats(self) -> dict:
+        return {"buckets": len(self.buckets)}
+
+
+# Seau à jetons atomique : lecture, recharge, prélèvement et expiration en un aller-retour.
+# Un coût négatif rend des jetons (voir `refund`), sans dépasser la taille du seau.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = math.min(burst, tokens - cost)
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """
+    Seaux à jetons partagés entre workers, au-dessus d'un client Redis asynchrone.
+
+    Le client doit fournir `eval` (API de `redis.asyncio.Redis`). Les dates viennent
+    de l'horloge murale des workers, qui doivent donc être synchronisées.
+
+    Attributs :
+        client : Client Redis asynchrone.
+        prefix (str) : Préfixe des clés des seaux.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:", clock: Callable[[], float] = time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    async def take(self, key: str, rate: float, burst: int, cost: float = 1.0) -> float:
+        wait = await self.client.eval(TOKEN_BUCKET_SCRIPT, 1, self.prefix + key, rate, burst, self.clock(), cost)
+        return float(wait.decode() if isinstance(wait, bytes) else wait)
+
+    async def refund(self, key: str, rate: float, burst: int, cost: float = 1.0) -> None:
+        await self.take(key, rate, burst, -cost)
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+class RateLimiter:
+    """
+    Applique les règles de limitation aux requêtes.
+
+    Attributs :
+        backend : Seaux à jetons (MemoryBackend ou RedisBackend).
+        rules (list) : Règles, évaluées dans l'ordre.
+        trusted_proxies (tuple) : Réseaux des proxys dont l'en-tête `forwarded_header` est lu.
+        forwarded_header (str) : En-tête portant l'adresse du client derrière ces proxys.
+        in_flight (dict) : Requêtes en cours par clé, pour les règles de concurrence.
+        rejected (dict) : Requêtes refusées par (règle, motif).
+    """
+
+    def __init__(self, backend=None, rules: Optional[List[RateLimitRule]] = None, trusted_proxies=None,
+                 forwarded_header: str = RATE_LIMIT_FORWARDED_HEADER):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.rules = default_rules() if rules is None else rules
+        if trusted_proxies is None:
+            trusted_proxies = parse_networks(RATE_LIMIT_TRUSTED_PROXIES)
+        self.trusted_proxies = tuple(trusted_proxies)
+        self.forwarded_header = forwarded_header
+        self.in_flight: Dict[str, int] = {}
+        self.rejected: Dict[Tuple[str, str], Counter] = {}
+
+    def match(self, method: str, path: str) -> List[RateLimitRule]:
+        """
+        Retourne les règles qui s'appliquent à une requête.
+
+        Args:
+            method (str): Méthode HTTP.
+            path (str): Chemin de la requête.
+
+        Returns:
+            List[RateLimitRule]: Règles concernées, dans l'ordre.
+        """
+        return [item for item in self.rules if item.matches(method, path)]
+
+    def client_key(self, item: RateLimitRule, scope: dict, body: Optional[bytes]) -> Optional[str]:
+        """
+        Calcule la clé du client pour une règle.
+
+        Args:
+            item (RateLimitRule): Règle appliquée.
+            scope (dict): Scope ASGI de la requête.
+            body (bytes | None): Corps de la requête, lu seulement pour la clé "username".
+
+        Returns:
+            str | None: Clé du seau, ou None si la requête ne fournit pas cette clé.
+        """
+        if item.key == "username":
+            username = _body_username(body)
+            return f"{item.name}:user:{username}" if username is not None else None
+        if item.key == "subject":
+            subject = _token_subject(scope)
+            if subject is not None:
+                return f"{item.name}:sub:{subject}"
+        address = client_address(scope, self.trusted_proxies, self.forwarded_header)
+        return f"{item.name}:ip:{address}" if address else None
+
+    async def admit(self, scope: dict, rules: List[RateLimitRule], body: Optional[bytes]) -> Tuple[float, List[str]]:
+        """
+        Décide si une requête est acceptée.
+
+        Une requête refusée ne consomme rien : les limites de concurrence sont vérifiées
+        avant tout prélèvement, et les jetons pris par les premières règles sont rendus
+        si une règle suivante refuse la requête.
+
+        Args:
+            scope (dict): Scope ASGI de la requête.
+            rules (List[RateLimitRule]): Règles concernées (voir `match`).
+            body (bytes | None): Corps de la requête, si une règle en a besoin.
+
+        Returns:
+            tuple: (attente avant nouvel essai en secondes, 0 si acceptée ; clés de
+                concurrence prises, à libérer avec `release` après la réponse).
+        """
+        keyed = []
+        for item in rules:
+            key = self.client_key(item, scope, body)
+            if key is not None:
+                keyed.append((item, key))
+        rejected = self._over_concurrency(keyed)
+        if rejected is not None:
+            self._reject(rejected, "concurrency")
+            return CONCURRENCY_RETRY_AFTER, []
+
+        taken = []
+        for item, key in keyed:
+            if not item.burst:
+                continue
+            wait = await self.backend.take(key, item.rate, item.burst)
+            if wait > 0:
+                self._reject(item, "rate")
+                await self._refund(taken)
+                return wait, []
+            taken.append((item, key))
+
+        # Revérifiée : d'autres requêtes ont pu prendre des places pendant le prélèvement
+        rejected = self._over_concurrency(keyed)
+        if rejected is not None:
+            self._reject(rejected, "concurrency")
+            await self._refund(taken)
+            return CONCURRENCY_RETRY_AFTER, []
+        held = [key for item, key in keyed if item.concurrency]
+        for key in held:
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+        return 0.0, held
+
+    def _over_concurrency(self, keyed) -> Optional[RateLimitRule]:
+        # Première règle dont la limite de requêtes simultanées est atteinte
+        for item, key in keyed:
+            if item.concurrency and self.in_flight.get(key, 0) >= item.concurrency:
+                return item
+        return None
+
+    async def _refund(self, taken) -> None:
+        for item, key in taken:
+            await self.backend.refund(key, item.rate, item.burst)
+
+    def release(self, keys: List[str]) -> None:
+        """Libère les places de concurrence prises par `admit`."""
+        for key in keys:
+            remaining = self.in_flight[key] - 1
+            if remaining:
+                self.in_flight[key] = remaining
+            else:
+                del self.in_flight[key]
+
+    def _reject(self, item: RateLimitRule, reason: str) -> None:
+        counter = self.rejected.get((item.name, reason))
+        if counter is None:
+            counter = self.rejected[(item.name, reason)] = Counter()
+        counter.inc()
+
+    def stats(self) -> dict:
+        """
+        Retourne les statistiques de la limitation.
+
+        Returns:
+            dict: Requêtes refusées par règle et motif, requêtes en cours suivies, état du backend.
+        """
+        return {
+            "rejected": {f"{name}:{reason}": counter.value for (name, reason), counter in self.rejected.items()},
+            "in_flight": sum(self.in_flight.values()),
+            **self.backend.stats(),
+        }
+
+
+def _body_username(body: Optional[bytes]) -> Optional[str]:
+    # Nom d'utilisateur d'un corps JSON ({"username": ...}), sans validation complète
+    if not body or len(body) > MAX_KEY_BODY_SIZE:
+        return None
+    try:
+        username = json.loads(body).get("username")
+    except (ValueError, AttributeError):
+        return None
+    return username if isinstance(username, str) else None
+
+
+def _token_subject(scope: dict) -> Optional[str]:
+    # Sujet d'un token Bearer valide ; décodage mis en cache par `auth.decode_token`
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() != "bearer" or not token:
+                return None
+            try:
+                return auth.decode_token(token.strip())["sub"]
+            except HTTPException:
+                return None
+    return None
+
+
+async def _buffer_body(receive, limit: int = MAX_KEY_BODY_SIZE):
+    # Lit le corps de la requête, au plus `limit` octets, et retourne un `receive` qui
+    # rejoue les morceaux lus à la route, puis lit la suite. Corps plus grand : None
+    # (clés par nom d'utilisateur ignorées), sans lire ni garder le reste en mémoire.
+    messages = []
+    size = 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        size += len(message.get("body", b""))
+        if size > limit:
+            break
+        if not message.get("more_body", False):
+            break
+    if size > limit:
+        body = None
+    else:
+        body = b"".join(message.get("body", b"") for message in messages if message["type"] == "http.request")
+
+    async def replay():
+        if messages:
+            return messages.pop(0)
+        return await receive()
+
+    return body, replay
+
+
+class RateLimitMiddleware:
+    """
+    Middleware ASGI de limitation, placé avant le routage.
+
+    Une requête refusée reçoit immédiatement une réponse 429 avec l'en-tête
+    `Retry-After` (secondes, arrondies au supérieur). Le corps n'est lu que si
+    une règle concernée a pour clé le nom d'utilisateur, et seulement jusqu'à
+    MAX_KEY_BODY_SIZE octets ; les morceaux lus sont alors rejoués à la route. Au-delà,
+    les règles par nom d'utilisateur sont ignorées (les règles par adresse IP restent).
+
+    Args:
+        app: Application ASGI protégée.
+        limiter (RateLimiter | None): Limiteur ; par défaut celui du module.
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter if limiter is not None else rate_limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limiter = self.limiter
+        rules = limiter.match(scope["method"], scope["path"])
+        if not rules:
+            await self.app(scope, receive, send)
+            return
+
+        body = None
+        if any(item.key == "username" for item in rules):
+            body, receive = await _buffer_body(receive)
+        wait, held = await limiter.admit(scope, rules, body)
+        if wait > 0:
+            await _too_many_requests(send, wait)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(held)
+
+
+async def _too_many_requests(send, wait: float) -> None:
+    body = json.dumps({"detail": "Trop de requêtes, réessayez plus tard"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(wait))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def build_rate_limiter(kind: str = RATE_LIMIT_BACKEND) -> RateLimiter:
+    """
+    Construit le limiteur selon la configuration.
+
+    Args:
+        kind (str): "memory" ou "redis".
+
+    Raises:
+        RuntimeError: Si le backend Redis est demandé sans le paquet `redis`.
+        ValueError: Si le backend est inconnu.
+
+    Returns:
+        RateLimiter: Limiteur avec les règles par défaut.
+    """
+    if kind == "memory":
+        return RateLimiter(MemoryBackend())
+    if kind == "redis":
+        return RateLimiter(RedisBackend(redis_client("RATE_LIMIT_BACKEND=redis", REDIS_URL)))
+    raise ValueError(f"Backend de limitation inconnu : {kind}")
+
+
+rate_limiter = build_rate_limiter()
@@ -0,0 +1,436 @@
+"""
+Cache de lecture (read-through) des réponses des routes de tâches.
+
+Ce module fournit :
+- Un backend en mémoire du processus (LRU avec TTL) et un backend compatible Redis,
+  qui accepte tout client exposant l'API asynchrone de `redis.asyncio`,
+- La fusion des chargements concurrents d'une même clé : lors d'un échec, une seule
+  requête interroge la base et les autres attendent son résultat (pas de "stampede"),
+- L'invalidation précise après une écriture : l'entrée de chaque tâche modifiée est
+  supprimée, et les pages de liste sont invalidées par génération, pour la liste
+  globale et pour chaque propriétaire concerné,
+- Une barrière par tâche modifiée, qui empêche de remettre en cache une version
+  antérieure à l'écriture, et par portée de liste, qui empêche de mettre en cache
+  une page lue sur un réplica juste après l'écriture (voir `ResponseCache.invalidate`),
+- Des compteurs de succès, d'échecs et de chargements fusionnés.
+
+Les valeurs sont stockées sérialisées en JSON, quel que soit le backend : une
+entrée lue depuis le cache ne peut pas être modifiée par l'appelant.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from cache import TTLCache
+from settings import redis_client
+
+# Backend du cache : "memory" (par défaut), "redis" (REDIS_URL) ou "none" (désactivé)
+TASK_CACHE_BACKEND = os.getenv("TASK_CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Durée de vie, en secondes, d'une tâche et d'une page de liste en cache
+TASK_CACHE_TTL = float(os.getenv("TASK_CACHE_TTL", "30"))
+TASK_LIST_CACHE_TTL = float(os.getenv("TASK_LIST_CACHE_TTL", "10"))
+# Nombre maximal d'entrées du backend en mémoire
+TASK_CACHE_SIZE = int(os.getenv("TASK_CACHE_SIZE", "10000"))
+# Durée, en secondes, pendant laquelle une tâche modifiée n'est remise en cache que
+# dans sa nouvelle version : couvre les lectures en cours et le retard des réplicas
+TASK_CACHE_SETTLE_SECONDS = float(os.getenv("TASK_CACHE_SETTLE_SECONDS", "5"))
+# Valeur de barrière d'une tâche dont la nouvelle version est inconnue (écritures groupées, suppressions)
+ANY_VERSION = "*"
+
+# Portée des pages de liste non filtrées par propriétaire
+ALL_SCOPE = "all"
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Type non sérialisable : {type(value).__name__}")
+
+
+def dumps(value: Any) -> str:
+    """Sérialise une valeur en JSON (dates au format ISO 8601)."""
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+class MemoryBackend:
+    """
+    Backend en mémoire du processus, propre à chaque worker.
+
+    Attributs :
+        entries (TTLCache) : Valeurs sérialisées, évincées par LRU et expirées par TTL.
+        generations (dict) : Génération courante de chaque portée de liste.
+    """
+
+    def __init__(self, maxsize: int = TASK_CACHE_SIZE):
+        self.entries = TTLCache(maxsize=maxsize, ttl=TASK_CACHE_TTL)
+        self.generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self.entries.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.entries.delete(key)
+
+    async def set_many(self, items: Dict[str, str], ttl: float) -> None:
+        for key, value in items.items():
+            self.entries.set(key, value, ttl=ttl)
+
+    async def generation(self, scope: str) -> int:
+        return self.generations.get(scope, 0)
+
+    async def bump(self, *scopes: str) -> None:
+        for scope in scopes:
+            self.generations[scope] = self.generations.get(scope, 0) + 1
+
+    def stats(self) -> dict:
+        return {"size": len(self.entries), "maxsize": self.entries.maxsize, "evictions": self.entries.evictions}
+
+
+class RedisBackend:
+    """
+    Backend partagé entre workers, au-dessus d'un client Redis asynchrone.
+
+    Le client doit fournir `get`, `set(ex=...)`, `delete` et `incr` (API de
+    `redis.asyncio.Redis`). Les compteurs de génération n'expirent pas.
+
+    Attributs :
+        client : Client Redis asynchrone.
+        prefix (str) : Préfixe de toutes les clés écrites.
+    """
+
+    def __init__(self, client, prefix: str = "tasks:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        # Redis attend une durée entière ; un TTL inférieur à une seconde est arrondi à 1
+        await self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def set_many(self, items: Dict[str, str], ttl: float) -> None:
+        # Un seul aller-retour, même pour les milliers de tâches d'une écriture groupée
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(self.prefix + key, value, ex=max(1, int(ttl)))
+            await pipe.execute()
+
+    async def generation(self, scope: str) -> int:
+        value = await self.client.get(f"{self.prefix}gen:{scope}")
+        return int(value) if value is not None else 0
+
+    async def bump(self, *scopes: str) -> None:
+        for scope in scopes:
+            await self.client.incr(f"{self.prefix}gen:{scope}")
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+class NullBackend:
+    """Backend qui ne conserve rien : seule la fusion des chargements concurrents reste active."""
+
+    async def get(self, key: str) -> Optional[str]:
+        return None
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        pass
+
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def set_many(self, items: Dict[str, str], ttl: float) -> None:
+        pass
+
+    async def generation(self, scope: str) -> int:
+        return 0
+
+    async def bump(self, *scopes: str) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": "none"}
+
+
+class ResponseCache:
+    """
+    Cache read-through des tâches et des pages de liste.
+
+    Attributs :
+        backend : Stockage des entrées (MemoryBackend, RedisBackend ou NullBackend).
+        task_ttl (float) : Durée de vie d'une tâche en cache, en secondes.
+        list_ttl (float) : Durée de vie d'une page de liste en cache, en secondes.
+        settle_ttl (float) : Durée de vie de la barrière d'une tâche modifiée, en secondes.
+        hits (int) : Lectures servies par le cache.
+        misses (int) : Lectures ayant nécessité un chargement depuis la base.
+        coalesced (int) : Échecs ayant attendu le chargement d'une autre requête au lieu d'interroger la base.
+        invalidations (int) : Nombre d'invalidations déclenchées par des écritures.
+    """
+
+    def __init__(self, backend, task_ttl: float = TASK_CACHE_TTL, list_ttl: float = TASK_LIST_CACHE_TTL,
+                 settle_ttl: float = TASK_CACHE_SETTLE_SECONDS):
+        self.backend = backend
+        self.task_ttl = task_ttl
+        self.list_ttl = list_ttl
+        self.settle_ttl = settle_ttl
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+        self._inflight: Dict[Tuple[str, bool], asyncio.Future] = {}
+
+    @staticmethod
+    def task_key(task_id: int) -> str:
+        """Clé de cache d'une tâche."""
+        return f"task:{task_id}"
+
+    @staticmethod
+    def fence_key(task_id: int) -> str:
+        """Clé de la barrière posée sur une tâche par une écriture."""
+        return f"fence:task:{task_id}"
+
+    @classmethod
+    def list_fence_key(cls, owner_id: Optional[int]) -> str:
+        """Clé de la barrière posée sur une portée de liste par une écriture."""
+        return f"fence:{cls.owner_scope(owner_id)}"
+
+    @staticmethod
+    def owner_scope(owner_id: Optional[int]) -> str:
+        """Portée de génération d'une page de liste : un propriétaire, ou la liste globale."""
+        return ALL_SCOPE if owner_id is None else f"owner:{owner_id}"
+
+    async def list_key(self, owner_id: Optional[int], params: dict) -> str:
+        """
+        Construit la clé d'une page de liste.
+
+        La clé contient la génération courante de sa portée : une écriture qui
+        incrémente cette génération rend inaccessibles toutes les pages de la portée,
+        sans avoir à les énumérer.
+
+        Args:
+            owner_id (int | None): Propriétaire filtré, ou None pour la liste globale.
+            params (dict): Paramètres de la page (filtres, curseur, tri, taille).
+
+        Returns:
+            str: Clé de cache.
+        """
+        scope = self.owner_scope(owner_id)
+        generation = await self.backend.generation(scope)
+        digest = hashlib.blake2b(dumps(params).encode(), digest_size=16).hexdigest()
+        return f"list:{scope}:{generation}:{digest}"
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Lit une entrée sans la charger en cas d'absence.
+
+        Args:
+            key (str): Clé de cache.
+
+        Returns:
+            Any | None: Valeur désérialisée, ou None.
+        """
+        raw = await self.backend.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float,
+                          fence: Optional[str] = None, replica: bool = False) -> Optional[Any]:
+        """
+        Retourne l'entrée en cache ou la charge (voir `load`).
+
+        Args:
+            key (str): Clé de cache.
+            loader (Callable): Coroutine sans argument qui lit la valeur en base.
+            ttl (float): Durée de vie de l'entrée, en secondes.
+            fence (str | None): Clé de barrière de l'entrée (voir `load`).
+            replica (bool): Vrai si `loader` lit sur un réplica (voir `load`).
+
+        Returns:
+            Any | None: Valeur (désérialisée depuis JSON), ou None.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+        return await self.load(key, loader, ttl, fence, replica)
+
+    async def load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float,
+                   fence: Optional[str] = None, replica: bool = False) -> Optional[Any]:
+        """
+        Charge une entrée absente du cache, une seule fois pour les requêtes concurrentes.
+
+        Une valeur None (ressource absente) est renvoyée mais n'est pas mise en cache.
+        Si le chargement échoue, l'exception est transmise à toutes les requêtes en attente.
+
+        Avec `fence`, la valeur chargée (un dict avec un champ "version") n'est mise en
+        cache que si elle n'est pas antérieure à la barrière posée par la dernière
+        écriture : une lecture commencée avant l'écriture, ou servie par un réplica en
+        retard, est renvoyée sans être conservée. Une barrière de liste (voir
+        `list_fence_key`) n'a pas de version : tant qu'elle est posée, rien n'est conservé.
+
+        Un chargement sur un réplica n'est jamais fusionné avec un chargement sur le
+        primaire : un client qui lit ses propres écritures n'attend pas une lecture en retard.
+
+        Args:
+            key (str): Clé de cache.
+            loader (Callable): Coroutine sans argument qui lit la valeur en base.
+            ttl (float): Durée de vie de l'entrée, en secondes.
+            fence (str | None): Clé de barrière de l'entrée (voir `fence_key` et `list_fence_key`).
+            replica (bool): Vrai si `loader` lit sur un réplica.
+
+        Returns:
+            Any | None: Valeur (désérialisée depuis JSON), ou None.
+        """
+        inflight_key = (key, replica)
+        pending = self._inflight.get(inflight_key)
+        if pending is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # Le chargement partagé a été annulé : chargement par cette requête
+                return await self._load(key, loader, ttl, fence)
+
+        future = asyncio.get_running_loop().create_future()
+        # Évite l'avertissement "exception never retrieved" lorsqu'aucune requête n'attend
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[inflight_key] = future
+        try:
+            value = await self._load(key, loader, ttl, fence)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(inflight_key, None)
+
+    async def _load(self, key: str, loader, ttl: float, fence: Optional[str] = None):
+        value = await loader()
+        if value is None:
+            return None
+        raw = dumps(value)
+        if fence is None or not await self._fenced(fence, value):
+            await self.backend.set(key, raw, ttl)
+            # Barrière posée entre la vérification et l'écriture : l'entrée est retirée.
+            # Posée après cette relecture, elle précède la suppression faite par `invalidate`.
+            if fence is not None and await self._fenced(fence, value):
+                await self.backend.delete(key)
+        # Même représentation qu'une lecture depuis le cache
+        return json.loads(raw)
+
+    async def _fenced(self, fence: str, value) -> bool:
+        # Vrai si la valeur lue peut être antérieure à la dernière écriture sur l'entrée
+        barrier = await self.backend.get(fence)
+        if barrier is None:
+            return False
+        return barrier == ANY_VERSION or value.get("version", 0) < int(barrier)
+
+    async def invalidate(self, task_ids: Iterable[int] = (), owner_ids: Iterable[Optional[int]] = (),
+                         versions: Optional[Dict[int, int]] = None) -> None:
+        """
+        Invalide les entrées touchées par une écriture.
+
+        Les tâches indiquées sont supprimées du cache ; les pages de la liste globale
+        et celles des propriétaires indiqués changent de génération.
+
+        Avant la suppression, une barrière est posée sur chaque tâche pour settle_ttl
+        secondes : pendant ce temps, seule sa nouvelle version (ou une version
+        ultérieure) peut être remise en cache. Sans version connue (écritures groupées,
+        suppressions), la tâche n'est pas remise en cache avant la fin de la barrière.
+        Une barrière est aussi posée sur chaque portée de liste, avant le changement de
+        génération : les pages lues sur un réplica n'y sont pas mises en cache avant sa fin.
+
+        Args:
+            task_ids (Iterable[int]): Tâches modifiées ou supprimées.
+            owner_ids (Iterable[int]): Propriétaires dont les listes ont changé (anciens et nouveaux).
+            versions (dict | None): Nouvelle version de chaque tâche modifiée, si connue.
+        """
+        task_ids = set(task_ids)
+        owners = {None} | {owner for owner in owner_ids if owner is not None}
+        if self.settle_ttl > 0:
+            versions = versions or {}
+            fences = {self.fence_key(task_id): str(versions.get(task_id, ANY_VERSION)) for task_id in task_ids}
+            fences.update((self.list_fence_key(owner), ANY_VERSION) for owner in owners)
+            await self.backend.set_many(fences, self.settle_ttl)
+        keys = [self.task_key(task_id) for task_id in task_ids]
+        if keys:
+            await self.backend.delete(*keys)
+        await self.backend.bump(*sorted(self.owner_scope(owner) for owner in owners))
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        """
+        Retourne les statistiques du cache.
+
+        Returns:
+            dict: Succès, échecs, chargements fusionnés, invalidations, taux de succès et état du backend.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+
+def build_task_cache(kind: str = TASK_CACHE_BACKEND) -> ResponseCache:
+    """
+    Construit le cache des tâches selon la configuration.
+
+    Args:
+        kind (str): "memory", "redis" ou "none".
+
+    Raises:
+        RuntimeError: Si le backend Redis est demandé sans le paquet `redis`.
+        ValueError: Si le backend est inconnu.
+
+    Returns:
+        ResponseCache: Cache configuré.
+    """
+    if kind == "memory":
+        return ResponseCache(MemoryBackend())
+    if kind == "none":
+        return ResponseCache(NullBackend())
+    if kind == "redis":
+        return ResponseCache(RedisBackend(redis_client("TASK_CACHE_BACKEND=redis", REDIS_URL)))
+    raise ValueError(f"Backend de cache inconnu : {kind}")
+
+
+task_cache = build_task_cache()
+
+
+def get_task_cache() -> ResponseCache:
+    """
+    Dépendance FastAPI qui fournit le cache des tâches.
+
+    Returns:
+        ResponseCache: Cache partagé du worker.
+    """
+    return task_cache
@@ -1,37 +1,48 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from models import User
-from schemas import UserCreate, UserLogin, Token
+from schemas import UserCreate, UserLogin, Token, UserPublic
 from database import get_db
-from auth import verify_password, get_password_hash, create_access_token
+from outbox import enqueue
+from auth import (
+    Principal,
+    create_access_token,
+    get_current_principal,
+    hash_password_async,
+    user_claims,
+    verify_password_async,
+)
 
 router = APIRouter(tags=["Authentification"])
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Route d'inscription d'un nouvel utilisateur.
 
     - Vérifie si le nom d'utilisateur existe déjà en base.
     - Hash le mot de passe.
-    - Crée un nouvel utilisateur dans la base.
+    - Crée un nouvel utilisateur dans la base, avec un message "user.registered"
+      dans la boîte d'envoi (même transaction).
     - Génère un token d'accès JWT et le retourne.
 
     Args:
         user (UserCreate): Données d'inscription de l'utilisateur.
-        db (Session): Session de base de données injectée.
+        db (AsyncSession): Session de base de données injectée.
 
     Raises:
-        HTTPException: Si le nom d'utilisateur est déjà pris (code 400).
+        HTTPException: Si le nom d'utilisateur est déjà pris (code 400)
+            ou si le pool de hachage est saturé (code 503).
 
     Returns:
         dict: Token JWT avec type "bearer".
     """
-    db_user = db.query(User).filter(User.username == user.username).first()
+    db_user = await db.scalar(select(User).where(User.username == user.username))
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username already registered")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password_async(user.password)
     new_user = User(
         username=user.username,
         email=user.email,
@@ -39,35 +50,61 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)  # Pour rafraîchir l'objet avec l'ID généré
+    await db.flush()
+    await enqueue(db, "user.registered", [{"user_id": new_user.id, "username": new_user.username, "email": new_user.email}])
+    await db.commit()
 
-    access_token = create_access_token(data={"sub": new_user.username})
+    access_token = create_access_token(data=user_claims(new_user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 
 @router.post("/login", response_model=Token)
-def login(user: UserLogin, db: Session = Depends(get_db)):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Route de connexion utilisateur.
 
     - Recherche l'utilisateur en base par nom d'utilisateur.
     - Vérifie que le mot de passe correspond.
+    - Recalcule et enregistre le hash s'il a été produit avec un coût obsolète.
     - Génère un token d'accès JWT et le retourne.
 
     Args:
         user (UserLogin): Données de connexion (username, password).
-        db (Session): Session de base de données injectée.
+        db (AsyncSession): Session de base de données injectée.
 
     Raises:
-        HTTPException: Si utilisateur non trouvé ou mot de passe invalide (code 401).
+        HTTPException: Si utilisateur non trouvé ou mot de passe invalide (code 401),
+            ou si le pool de hachage est saturé (code 503).
 
     Returns:
         dict: Token JWT avec type "bearer".
     """
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if not db_user or not verify_password(user.password, db_user.hashed_password):
+    db_user = await db.scalar(select(User).where(User.username == user.username))
+    if not db_user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
-    access_token = create_access_token(data={"sub": db_user.username})
+    valid, new_hash = await verify_password_async(user.password, db_user.hashed_password)
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        db_user.hashed_password = new_hash
+        await db.commit()
+
+    access_token = create_access_token(data=user_claims(db_user))
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/me", response_model=UserPublic)
+async def read_me(principal: Principal = Depends(get_current_principal)):
+    """
+    Retourne l'identité de l'utilisateur authentifié.
+
+    En mode AUTH_STATELESS, la réponse est construite à partir du token, sans requête SQL.
+
+    Args:
+        principal (Principal): Identité extraite du token.
+
+    Returns:
+        UserPublic: Identifiant, nom d'utilisateur et statut de l'utilisateur.
+    """
+    return principal
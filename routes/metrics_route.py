@@ -0,0 +1,146 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.pool import QueuePool
+import auth
+import events
+import outbox
+import rate_limit
+import response_cache
+import scheduler
+from database import async_engine, engine
+from instrumentation import PROMETHEUS_CONTENT_TYPE, PrometheusWriter, write_metrics
+
+router = APIRouter()
+
+
+def write_pool_metrics(writer: PrometheusWriter) -> None:
+    """
+    Ajoute l'état des pools de connexions à une exposition Prometheus.
+
+    Args:
+        writer (PrometheusWriter): Exposition en cours de construction.
+    """
+    pools = {"async": async_engine.sync_engine.pool, "sync": engine.pool}
+    measured = {name: pool.metrics for name, pool in pools.items() if getattr(pool, "metrics", None)}
+    writer.histogram(
+        "db_pool_wait_seconds", "Attente d'une connexion du pool.", ("engine",),
+        {name: m.wait_time for name, m in measured.items()},
+    )
+    writer.counter(
+        "db_pool_timeouts_total", "Attentes de connexion ayant dépassé DB_POOL_TIMEOUT.", ("engine",),
+        {name: m.timeouts for name, m in measured.items()},
+    )
+    writer.gauge(
+        "db_pool_checked_out", "Connexions empruntées au pool.", ("engine",),
+        {name: pool.checkedout() for name, pool in pools.items() if isinstance(pool, QueuePool)},
+    )
+
+
+def write_cache_metrics(writer: PrometheusWriter) -> None:
+    """
+    Ajoute les succès et échecs des caches en mémoire à une exposition Prometheus.
+
+    Args:
+        writer (PrometheusWriter): Exposition en cours de construction.
+    """
+    caches = {
+        "tokens": auth.token_cache.stats(),
+        "users": auth.user_cache.stats(),
+        "tasks": response_cache.task_cache.stats(),
+    }
+    writer.counter("cache_hits_total", "Lectures réussies par cache.", ("cache",),
+                   {name: stats["hits"] for name, stats in caches.items()})
+    writer.counter("cache_misses_total", "Lectures sans résultat par cache.", ("cache",),
+                   {name: stats["misses"] for name, stats in caches.items()})
+
+
+def write_event_metrics(writer: PrometheusWriter) -> None:
+    """
+    Ajoute l'état du flux des changements de tâches à une exposition Prometheus.
+
+    Args:
+        writer (PrometheusWriter): Exposition en cours de construction.
+    """
+    stats = events.event_broker.stats()
+    writer.gauge("task_events_subscribers", "Abonnés connectés au flux des changements.", (),
+                 {(): stats["subscribers"]})
+    writer.counter("task_events_published_total", "Événements publiés par ce worker.", (),
+                   {(): stats["published"]})
+    writer.counter("task_events_delivered_total", "Événements placés dans la file d'un abonné.", (),
+                   {(): stats["delivered"]})
+    writer.counter("task_events_dropped_subscribers_total", "Abonnés déconnectés car trop lents.", (),
+                   {(): stats["dropped"]})
+
+
+def write_outbox_metrics(writer: PrometheusWriter) -> None:
+    """
+    Ajoute le débit des consommateurs de la boîte d'envoi lancés dans ce worker.
+
+    Args:
+        writer (PrometheusWriter): Exposition en cours de construction.
+    """
+    stats = outbox.outbox_stats
+    writer.counter("outbox_messages_processed_total", "Messages de la boîte d'envoi traités.", (),
+                   {(): stats.processed})
+    writer.counter("outbox_messages_retried_total", "Échecs reportés pour une nouvelle tentative.", (),
+                   {(): stats.retried})
+    writer.counter("outbox_messages_dead_total", "Messages abandonnés après OUTBOX_MAX_ATTEMPTS échecs.", (),
+                   {(): stats.dead})
+    writer.histogram("outbox_batch_duration_seconds", "Durée de traitement d'un lot de messages.", (),
+                     {(): stats.batches})
+
+
+def write_scheduler_metrics(writer: PrometheusWriter) -> None:
+    """
+    Ajoute l'état du planificateur des échéances à une exposition Prometheus.
+
+    Args:
+        writer (PrometheusWriter): Exposition en cours de construction.
+    """
+    stats = scheduler.due_scheduler.stats()
+    writer.gauge("due_scheduler_pending", "Échéances à venir suivies par le planificateur.", (),
+                 {(): stats["pending"]})
+    writer.gauge("due_scheduler_heap_size", "Entrées du tas des échéances, entrées périmées comprises.", (),
+                 {(): stats["heap"]})
+    writer.counter("due_events_emitted_total", "Échéances atteintes publiées sur le flux des changements.", (),
+                   {(): stats["emitted"]})
+    writer.counter("due_scheduler_loads_total", "Lectures d'une fenêtre d'échéances en base.", (),
+                   {(): stats["loads"]})
+
+
+def write_rate_limit_metrics(writer: PrometheusWriter) -> None:
+    """
+    Ajoute les refus de la limitation de débit et de concurrence à une exposition Prometheus.
+
+    Args:
+        writer (PrometheusWriter): Exposition en cours de construction.
+    """
+    limiter = rate_limit.rate_limiter
+    writer.counter("rate_limit_rejected_total", "Requêtes refusées (429) par règle et motif.", ("rule", "reason"),
+                   dict(limiter.rejected))
+    writer.gauge("rate_limit_in_flight", "Requêtes en cours suivies par les limites de concurrence.", (),
+                 {(): sum(limiter.in_flight.values())})
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Expose les mesures du worker courant au format texte de Prometheus.
+
+    Latence et statuts par route, requêtes en cours, durée et nombre de requêtes
+    SQL, requêtes lentes et motifs N+1, état des pools de connexions, des caches et
+    du flux des changements de tâches, débit de la boîte d'envoi, planificateur
+    des échéances et refus de la limitation de débit.
+
+    Returns:
+        PlainTextResponse: Exposition Prometheus (version 0.0.4).
+    """
+    writer = PrometheusWriter()
+    write_metrics(writer)
+    write_pool_metrics(writer)
+    write_cache_metrics(writer)
+    write_event_metrics(writer)
+    write_outbox_metrics(writer)
+    write_scheduler_metrics(writer)
+    write_rate_limit_metrics(writer)
+    return PlainTextResponse(writer.render(), media_type=PROMETHEUS_CONTENT_TYPE)
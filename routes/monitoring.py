@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+import auth
+import response_cache
+from database import async_engine, engine, pool_status, replica_engines, replica_router
+
+router = APIRouter()
+
+@router.get("/pool")
+def get_pool_status():
+    """
+    Expose l'état des pools de connexions du worker courant.
+
+    Permet de dimensionner DB_POOL_SIZE / DB_MAX_OVERFLOW par worker à partir
+    des connexions empruntées, du débordement et de l'histogramme des temps d'attente.
+
+    Returns:
+        dict: État du pool de l'engine asynchrone (routes), de l'engine synchrone, des
+        réplicas en lecture, et répartition des lectures entre réplicas et primaire.
+    """
+    return {
+        "async": pool_status(async_engine),
+        "sync": pool_status(engine),
+        "replicas": [pool_status(replica) for replica in replica_engines],
+        "routing": replica_router.stats(),
+    }
+
+@router.get("/caches")
+def get_cache_stats():
+    """
+    Expose les statistiques des caches en mémoire du worker courant.
+
+    Returns:
+        dict: Taille, succès, échecs et taux de succès des caches des tokens, des utilisateurs et des tâches.
+    """
+    return {
+        "tokens": auth.token_cache.stats(),
+        "users": auth.user_cache.stats(),
+        "tasks": response_cache.task_cache.stats(),
+    }
@@ -1,13 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
+import asyncio
+import csv
+import heapq
+import io
+import anyio
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from typing import Dict, List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+from typing_extensions import TypedDict
 from models import Tache
-from database import get_db
-from datetime import datetime
+from schemas import UserPublic
+from auth import Principal, get_current_principal
+from database import get_db, get_read_db, get_session_factory, reads_replica
+from events import EVENT_HEARTBEAT_SECONDS, EventBroker, Subscription, get_event_broker, task_event
+from outbox import enqueue
+from datetime import datetime, timedelta
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor, apply_keyset, decode_cursor, next_cursor
+from http_cache import cache_headers, collection_etag, etag_matches, is_not_modified, not_modified
+from msgpack_codec import MSGPACK_MEDIA_TYPE, json_to_msgpack, prefers_msgpack, rows_msgpack, rows_msgpack_stream, variant_etag
+from response_cache import ResponseCache, get_task_cache
+from scheduler import OPEN_STATUSES, due_query
+from search import next_search_cursor, search_query, search_terms
 
 router = APIRouter()
 
+# Nombre maximal d'éléments par requête groupée, et taille des lots SQL
+MAX_BULK_ITEMS = 10_000
+BULK_CHUNK_SIZE = 500
+
+# Tentatives d'un PUT sans If-Match qui perd une course contre une écriture concurrente
+PUT_RETRIES = 3
+
+# Champs facultatifs dans une mise à jour partielle, mais qui ne peuvent pas être mis à null
+NON_NULL_FIELDS = ("title", "owner_id")
+
+# Nombre de lignes lues par aller-retour avec le curseur serveur lors d'un export
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ("id", "title", "description", "status", "created_at", "due_date", "owner_id")
+
+# Fenêtre par défaut et maximale de GET /tasks/upcoming, et statuts acceptés par requête
+UPCOMING_DEFAULT_WITHIN = timedelta(days=1)
+UPCOMING_MAX_WITHIN = timedelta(days=366)
+MAX_DUE_STATUSES = 10
+
 # ----- Schémas Pydantic -----
 class TaskCreate(BaseModel):
     title: str
@@ -17,110 +56,1305 @@ class TaskCreate(BaseModel):
     owner_id: int
 
 class TaskResponse(TaskCreate):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int = 1
+
+class TaskWithOwner(TaskResponse):
+    # Renseigné seulement avec ?include=owner (réponses sérialisées avec exclude_unset)
+    owner: Optional[UserPublic] = None
+
+class TaskUpdate(BaseModel):
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    due_date: Optional[datetime] = None
+    owner_id: Optional[int] = None
+
+class TaskBulkUpdate(BaseModel):
+    id: int
+    title: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    due_date: Optional[datetime] = None
+    owner_id: Optional[int] = None
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: Literal["created", "updated", "deleted", "not_found"]
+
+class BulkResult(BaseModel):
+    results: List[BulkItemResult]
+
+class TaskFilters(BaseModel):
+    status: Optional[str] = None
+    owner_id: Optional[int] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+
+class MyTaskCreate(BaseModel):
+    title: str
+    description: Optional[str] = None
+    status: Optional[str] = "todo"
+    due_date: Optional[datetime] = None
+
+class MyTaskFilters(BaseModel):
+    status: Optional[str] = None
+    due_after: Optional[datetime] = None
+    due_before: Optional[datetime] = None
+
+class TaskSearchResult(TaskResponse):
+    score: float
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+# ----- Sérialisation rapide des listes et de l'export -----
+
+# Lignes de colonnes (RESPONSE_COLUMNS / EXPORT_COLUMNS) sérialisées directement en
+# JSON par pydantic-core : ni objet ORM, ni modèle Pydantic validé par ligne, ni
+# passage par le dict intermédiaire de la réponse FastAPI. Même sortie que TaskResponse,
+# champs compris : l'ordre des clés est celui des colonnes, donc celui de TaskResponse.
+class TaskRow(TypedDict):
+    title: str
+    description: Optional[str]
+    status: Optional[str]
+    due_date: Optional[datetime]
+    owner_id: int
     id: int
     created_at: datetime
+    updated_at: Optional[datetime]
+    version: int
+
+class ExportRow(TypedDict):
+    id: int
+    title: str
+    description: Optional[str]
+    status: Optional[str]
+    created_at: datetime
+    due_date: Optional[datetime]
+    owner_id: int
 
-    class Config:
-        orm_mode = True
+LIST_COLUMNS = tuple(TaskRow.__annotations__)
+TASK_LIST_JSON = TypeAdapter(List[TaskRow])
+EXPORT_ROW_JSON = TypeAdapter(ExportRow)
+
+def rows_json(rows) -> str:
+    """
+    Sérialise des lignes de colonnes en tableau JSON de tâches.
+
+    Args:
+        rows: Lignes (tuples) dans l'ordre de LIST_COLUMNS.
+
+    Returns:
+        str: Tableau JSON, identique à la sérialisation d'une liste de TaskResponse.
+    """
+    return TASK_LIST_JSON.dump_json([dict(zip(LIST_COLUMNS, row)) for row in rows]).decode()
+
+def _task_data(task) -> dict:
+    # Tâche (objet ORM ou ligne de colonnes) dans l'ordre des champs de TaskResponse
+    return {name: getattr(task, name) for name in LIST_COLUMNS}
+
+def apply_task_filters(query, filters: TaskFilters):
+    """
+    Applique les filtres de liste (statut, propriétaire, intervalle d'échéance) à une requête.
+
+    Args:
+        query: Requête SQLAlchemy sur `Tache`.
+        filters (TaskFilters): Filtres reçus en paramètres de requête.
+
+    Returns:
+        La requête filtrée.
+    """
+    if filters.status is not None:
+        query = query.where(Tache.status == filters.status)
+    if filters.owner_id is not None:
+        query = query.where(Tache.owner_id == filters.owner_id)
+    if filters.due_after is not None:
+        query = query.where(Tache.due_date >= filters.due_after)
+    if filters.due_before is not None:
+        query = query.where(Tache.due_date < filters.due_before)
+    return query
+
+# ----- Concurrence optimiste (ETag / If-Match) -----
+
+# Colonnes renvoyées par PATCH (UPDATE ... RETURNING ou relecture)
+RESPONSE_COLUMNS = (
+    "id", "title", "description", "status", "created_at", "updated_at", "due_date", "owner_id", "version",
+)
+
+def task_etag(task_id: int, version: int) -> str:
+    """
+    Construit l'ETag fort d'une tâche à partir de son identifiant et de sa version.
+
+    Args:
+        task_id (int): ID de la tâche.
+        version (int): Version courante de la tâche.
+
+    Returns:
+        str: ETag entre guillemets, par exemple '"12-3"'.
+    """
+    return f'"{task_id}-{version}"'
+
+def page_etag(rows, cursor_next: Optional[str]) -> str:
+    """
+    Construit l'ETag d'une page de tâches.
+
+    Args:
+        rows: Lignes de la page, avec les attributs `id` et `version`.
+        cursor_next (str | None): Curseur de la page suivante.
+
+    Returns:
+        str: ETag entre guillemets, qui change dès qu'une tâche de la page est modifiée, ajoutée ou retirée.
+    """
+    return collection_etag([(row.id, row.version) for row in rows] + [cursor_next])
+
+def expected_version(if_match: Optional[str], task_id: int) -> Optional[int]:
+    """
+    Extrait la version attendue d'un en-tête If-Match.
+
+    Args:
+        if_match (str | None): Valeur de l'en-tête If-Match.
+        task_id (int): ID de la tâche visée.
+
+    Raises:
+        HTTPException 412: Si l'ETag ne peut pas correspondre à cette tâche.
+
+    Returns:
+        int | None: Version attendue, ou None si aucune condition n'est posée (absent ou "*").
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    for candidate in if_match.split(","):
+        # Une réponse compressée porte l'ETag faible W/"<id>-<version>" (voir `compression`) :
+        # la version désigne le même contenu quel que soit le codage
+        tag = candidate.strip().removeprefix("W/").strip('"')
+        prefix, _, version = tag.rpartition("-")
+        if prefix == str(task_id) and version.isdigit():
+            return int(version)
+    raise HTTPException(status_code=412, detail="La tâche a été modifiée entre-temps")
+
+def _supports_update_returning(db: AsyncSession) -> bool:
+    # Vrai pour SQLite >= 3.35, MariaDB et PostgreSQL, faux pour MySQL
+    return db.get_bind().dialect.update_returning
 
 # ----- Routes CRUD pour les tâches -----
 
-@router.get("/", response_model=List[TaskResponse])
-def get_tasks(db: Session = Depends(get_db)):
+@router.get("/", response_model=List[TaskWithOwner], response_model_exclude_unset=True)
+async def get_tasks(
+    response: Response,
+    filters: TaskFilters = Depends(),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "created_at"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    include: Optional[Literal["owner"]] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    cache: ResponseCache = Depends(get_task_cache),
+):
+    """
+    Récupère une page de tâches, filtrée et triée, avec pagination par curseur.
+
+    Le curseur de la page suivante est renvoyé dans l'en-tête `X-Next-Cursor`
+    (absent sur la dernière page) et se repasse tel quel dans le paramètre `cursor`.
+
+    La page porte un ETag calculé à partir des couples (id, version) de ses tâches.
+    Si le client envoie If-None-Match, seuls ces couples sont d'abord lus : s'ils
+    n'ont pas changé, la réponse est un 304 sans lecture des tâches complètes.
+
+    Les pages sont mises en cache (voir `response_cache`) par propriétaire filtré,
+    filtres, curseur, tri et taille ; toute écriture sur une tâche invalide les
+    pages de la liste globale et celles de son propriétaire.
+
+    Avec `include=owner`, chaque tâche porte son propriétaire, chargé avec
+    `selectinload` : deux requêtes SQL quelle que soit la taille de la page. Ces
+    pages ne sont ni mises en cache ni validées par ETag (la version d'une tâche ne
+    change pas quand son propriétaire est modifié).
+
+    Avec `Accept: application/msgpack`, la page est servie en MessagePack (même forme
+    que le JSON, voir `msgpack_codec`), avec son propre ETag ; la réponse porte
+    `Vary: Accept`. Les pages avec `include=owner` restent en JSON.
+
+    Args:
+        response (Response): Réponse HTTP, utilisée pour les en-têtes de pagination et de cache.
+        filters (TaskFilters): Filtres sur le statut, le propriétaire et l'échéance.
+        limit (int): Nombre maximal de tâches par page.
+        cursor (str | None): Curseur opaque renvoyé par la page précédente.
+        sort (str): Colonne de tri ("id" ou "created_at").
+        order (str): Sens du tri ("asc" ou "desc").
+        include (str | None): "owner" pour inclure le propriétaire de chaque tâche.
+        if_none_match (str | None): ETag d'une page déjà reçue (en-tête If-None-Match).
+        accept (str | None): En-tête Accept (MessagePack si demandé explicitement).
+        db (AsyncSession): Session de lecture (réplica si configuré).
+        cache (ResponseCache): Cache des tâches.
+
+    Raises:
+        HTTPException 400: Si le curseur est invalide.
+
+    Returns:
+        List[TaskWithOwner]: Tâches de la page demandée (ou réponse 304).
+    """
+    if include == "owner":
+        return await task_page_with_owners(response, filters, limit, cursor, sort, order, db)
+    return await task_page(response, filters, limit, cursor, sort, order, if_none_match, db, cache, accept)
+
+async def task_page(response, filters, limit, cursor, sort, order, if_none_match, db, cache, accept=None):
+    # Corps commun de GET /tasks/, GET /tasks/mine et GET /users/{id}/tasks (voir `get_tasks`)
+    query = apply_task_filters(select(Tache), filters)
+    try:
+        query = apply_keyset(query, Tache, sort, order, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    query = query.limit(limit + 1)
+
+    params = {"filters": filters.model_dump(), "limit": limit, "cursor": cursor, "sort": sort, "order": order}
+    key = await cache.list_key(filters.owner_id, params)
+    page = await cache.get(key)
+    binary = prefers_msgpack(accept)
+
+    if page is None and if_none_match:
+        probe_columns = {Tache.id, Tache.version, getattr(Tache, sort)}
+        versions = list(await db.execute(query.with_only_columns(*probe_columns)))
+        probe_next = next_cursor(versions, limit, sort, order)
+        etag = page_etag(versions, probe_next)
+        if binary:
+            etag = variant_etag(etag)
+        if etag_matches(if_none_match, etag):
+            return not_modified(_page_headers(etag, probe_next))
+
+    if page is None:
+        async def load_page():
+            columns = [getattr(Tache, name) for name in LIST_COLUMNS]
+            rows = list(await db.execute(query.with_only_columns(*columns)))
+            cursor_next = next_cursor(rows, limit, sort, order)
+            # Page déjà sérialisée : un succès de cache renvoie le corps tel quel
+            return {
+                "body": rows_json(rows),
+                "next": cursor_next,
+                "etag": page_etag(rows, cursor_next),
+            }
+
+        replica = reads_replica(db)
+        # Page lue sur un réplica juste après une écriture : renvoyée sans être mise en cache
+        fence = cache.list_fence_key(filters.owner_id) if replica else None
+        page = await cache.load(key, load_page, cache.list_ttl, fence=fence, replica=replica)
+
+    etag = variant_etag(page["etag"]) if binary else page["etag"]
+    headers = _page_headers(etag, page["next"])
+    if etag_matches(if_none_match, etag):
+        return not_modified(headers)
+    if binary:
+        # Le cache garde la seule variante JSON ; la conversion évite une lecture en base
+        return Response(json_to_msgpack(page["body"]), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return Response(page["body"], media_type="application/json", headers=headers)
+
+async def task_page_with_owners(response, filters, limit, cursor, sort, order, db):
+    # include=owner : tâches puis propriétaires en une seule requête IN (selectinload),
+    # plutôt qu'une jointure qui répéterait les colonnes du propriétaire sur chaque ligne
+    query = apply_task_filters(select(Tache), filters).options(selectinload(Tache.owner))
+    try:
+        query = apply_keyset(query, Tache, sort, order, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    tasks = list(await db.scalars(query.limit(limit + 1)))
+    cursor_next = next_cursor(tasks, limit, sort, order)
+    if cursor_next:
+        response.headers["X-Next-Cursor"] = cursor_next
+    return tasks
+
+def _page_headers(etag: str, cursor_next: Optional[str]) -> dict:
+    headers = cache_headers(etag)
+    headers["Vary"] = "Accept"
+    if cursor_next:
+        headers["X-Next-Cursor"] = cursor_next
+    return headers
+
+# ----- Recherche plein texte -----
+
+@router.get("/search", response_model=List[TaskSearchResult])
+async def search_tasks(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    filters: TaskFilters = Depends(),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Recherche des tâches par mots du titre ou de la description, classées par pertinence.
+
+    La recherche s'appuie sur l'index FULLTEXT (MySQL) ou sur la table FTS5 (SQLite),
+    sans parcours de la table par LIKE (voir `search`). Tous les mots saisis doivent
+    être présents. Le curseur de la page suivante est renvoyé dans l'en-tête
+    `X-Next-Cursor`, comme pour GET /tasks/.
+
+    Args:
+        response (Response): Réponse HTTP, utilisée pour l'en-tête de pagination.
+        q (str): Texte recherché.
+        filters (TaskFilters): Filtres sur le statut, le propriétaire et l'échéance.
+        limit (int): Nombre maximal de résultats par page.
+        cursor (str | None): Curseur opaque renvoyé par la page précédente.
+        db (AsyncSession): Session de lecture (réplica si configuré).
+
+    Raises:
+        HTTPException 400: Si la recherche ne contient aucun mot, ou si le curseur est invalide.
+
+    Returns:
+        List[TaskSearchResult]: Tâches trouvées, de la plus pertinente à la moins pertinente, avec leur score.
     """
-    Récupère toutes les tâches.
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="La recherche ne contient aucun mot")
+
+    columns = [getattr(Tache, name) for name in RESPONSE_COLUMNS]
+    query = apply_task_filters(select(*columns), filters)
+    try:
+        query, rank = search_query(query, db.get_bind().dialect.name, terms, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    rows = list(await db.execute(query.add_columns(rank.label("rank")).limit(limit + 1)))
+    cursor_next = next_search_cursor(rows, limit)
+    if cursor_next:
+        response.headers["X-Next-Cursor"] = cursor_next
+    results = []
+    for row in rows:
+        result = row._asdict()
+        result["score"] = -result.pop("rank")
+        results.append(result)
+    return results
+
+# ----- Tâches de l'utilisateur courant -----
+
+@router.get("/mine", response_model=List[TaskResponse])
+async def get_my_tasks(
+    response: Response,
+    filters: MyTaskFilters = Depends(),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "created_at"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db),
+    cache: ResponseCache = Depends(get_task_cache),
+):
+    """
+    Récupère une page des tâches de l'utilisateur authentifié.
+
+    Le propriétaire est déduit du token et non fourni par le client : la condition
+    `owner_id = :uid` est toujours présente dans la requête SQL, qui parcourt ainsi
+    les index commençant par owner_id. Pagination, tri, ETag, cache et représentation
+    MessagePack sont ceux de GET /tasks/.
 
     Args:
-        db (Session): Session de base de données.
+        response (Response): Réponse HTTP, utilisée pour les en-têtes de pagination et de cache.
+        filters (MyTaskFilters): Filtres sur le statut et l'échéance.
+        limit (int): Nombre maximal de tâches par page.
+        cursor (str | None): Curseur opaque renvoyé par la page précédente.
+        sort (str): Colonne de tri ("id" ou "created_at").
+        order (str): Sens du tri ("asc" ou "desc").
+        if_none_match (str | None): ETag d'une page déjà reçue (en-tête If-None-Match).
+        accept (str | None): En-tête Accept (MessagePack si demandé explicitement).
+        principal (Principal): Utilisateur authentifié.
+        db (AsyncSession): Session de lecture (réplica si configuré).
+        cache (ResponseCache): Cache des tâches.
+
+    Raises:
+        HTTPException 400: Si le curseur est invalide.
+        HTTPException 401: Si le token est invalide.
 
     Returns:
-        List[TaskResponse]: Liste des tâches existantes.
+        List[TaskResponse]: Tâches de l'utilisateur pour la page demandée (ou réponse 304).
+    """
+    scoped = TaskFilters(**filters.model_dump(), owner_id=principal.id)
+    return await task_page(response, scoped, limit, cursor, sort, order, if_none_match, db, cache, accept)
+
+@router.get("/mine/stats", response_model=TaskStats)
+async def get_my_task_stats(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_read_db),
+    cache: ResponseCache = Depends(get_task_cache),
+):
     """
-    return db.query(Tache).all()
+    Compte les tâches de l'utilisateur authentifié, par statut.
 
-@router.get("/{task_id}", response_model=TaskResponse)
-def get_task(task_id: int, db: Session = Depends(get_db)):
+    Les compteurs viennent d'une seule requête
+    `SELECT status, count(*) ... WHERE owner_id = :uid GROUP BY status`, résolue
+    dans l'index (owner_id, status, created_at) sans lire la table. Le résultat est
+    mis en cache avec les pages du propriétaire et invalidé comme elles.
+
+    Args:
+        principal (Principal): Utilisateur authentifié.
+        db (AsyncSession): Session de lecture (réplica si configuré).
+        cache (ResponseCache): Cache des tâches.
+
+    Raises:
+        HTTPException 401: Si le token est invalide.
+
+    Returns:
+        TaskStats: Nombre total de tâches et nombre par statut.
+    """
+    async def load_stats():
+        rows = (await db.execute(status_counts_query(principal.id))).all()
+        # Les tâches sans statut comptent dans le total seulement
+        by_status = {status: count for status, count in rows if status is not None}
+        return {"total": sum(count for _, count in rows), "by_status": by_status}
+
+    key = await cache.list_key(principal.id, {"stats": True})
+    replica = reads_replica(db)
+    fence = cache.list_fence_key(principal.id) if replica else None
+    return await cache.get_or_load(key, load_stats, cache.list_ttl, fence=fence, replica=replica)
+
+def status_counts_query(owner_id: int):
+    """
+    Construit la requête de comptage des tâches d'un propriétaire par statut.
+
+    Args:
+        owner_id (int): ID du propriétaire.
+
+    Returns:
+        Select: Requête renvoyant des couples (statut, nombre).
+    """
+    return select(Tache.status, func.count()).where(Tache.owner_id == owner_id).group_by(Tache.status)
+
+@router.post("/mine", response_model=TaskResponse)
+async def create_my_task(
+    task: MyTaskCreate,
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
+    """
+    Crée une tâche appartenant à l'utilisateur authentifié.
+
+    Args:
+        task (MyTaskCreate): Données de la tâche, sans propriétaire.
+        principal (Principal): Utilisateur authentifié, propriétaire de la tâche.
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
+
+    Raises:
+        HTTPException 401: Si le token est invalide.
+
+    Returns:
+        TaskResponse: La tâche créée.
+    """
+    db_task = Tache(**task.model_dump(), owner_id=principal.id)
+    db.add(db_task)
+    await db.flush()
+    event = task_event("created", db_task.id, principal.id, task=_task_data(db_task))
+    await enqueue(db, "task.created", [event])
+    await db.commit()
+    await cache.invalidate(owner_ids=[principal.id])
+    await broker.publish(event)
+    return db_task
+
+# ----- Routes groupées (bulk) -----
+
+def _chunks(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+def _check_bulk_size(items: list):
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Au plus {MAX_BULK_ITEMS} éléments par requête")
+
+def _null_field(values: dict) -> Optional[str]:
+    # Premier champ de NON_NULL_FIELDS explicitement mis à null, s'il y en a un
+    return next((field for field in NON_NULL_FIELDS if field in values and values[field] is None), None)
+
+def _supports_bulk_returning(db: AsyncSession) -> bool:
+    # Vrai pour SQLite >= 3.35, MariaDB et PostgreSQL, faux pour MySQL
+    return db.get_bind().dialect.insert_executemany_returning
+
+def _bulk_update_statement(fields: tuple):
+    # UPDATE ... SET <champs>, version = version + 1 WHERE id = :p_id, exécuté en executemany
+    table = Tache.__table__
+    values = {field: bindparam(f"p_{field}") for field in fields}
+    values["version"] = table.c.version + 1
+    return update(table).where(table.c.id == bindparam("p_id")).values(values)
+
+async def _existing_owners(db: AsyncSession, ids: List[int]) -> dict:
+    # id -> propriétaire des tâches existantes (les propriétaires servent à invalider le cache)
+    return dict((await db.execute(select(Tache.id, Tache.owner_id).where(Tache.id.in_(ids)))).all())
+
+@router.post("/bulk", response_model=BulkResult)
+async def create_tasks_bulk(
+    tasks: List[TaskCreate],
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
+    """
+    Crée plusieurs tâches dans une seule transaction.
+
+    Les lignes sont insérées par lots de BULK_CHUNK_SIZE avec des INSERT multi-lignes.
+    Lorsque le dialecte ne sait pas renvoyer les identifiants générés d'un INSERT
+    multi-lignes (MySQL), les lignes d'un lot sont insérées via l'unité de travail de
+    l'ORM, toujours dans la même transaction et avec un seul commit.
+
+    Args:
+        tasks (List[TaskCreate]): Tâches à créer.
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
+
+    Raises:
+        HTTPException 413: Si la requête contient plus de MAX_BULK_ITEMS éléments.
+
+    Returns:
+        BulkResult: Résultat par élément, dans l'ordre de la requête, avec l'id créé.
+    """
+    _check_bulk_size(tasks)
+    rows = [task.model_dump() for task in tasks]
+    returning = _supports_bulk_returning(db)
+
+    results = []
+    for start, chunk in _chunks(rows):
+        if returning:
+            ids = list(await db.scalars(insert(Tache).returning(Tache.id, sort_by_parameter_order=True), chunk))
+        else:
+            objects = [Tache(**row) for row in chunk]
+            db.add_all(objects)
+            await db.flush()
+            ids = [obj.id for obj in objects]
+        results.extend(
+            BulkItemResult(index=start + offset, id=task_id, status="created")
+            for offset, task_id in enumerate(ids)
+        )
+    events = [task_event("created", item.id, row["owner_id"]) for item, row in zip(results, rows)]
+    await enqueue(db, "task.created", events)
+    await db.commit()
+    await cache.invalidate(owner_ids={row["owner_id"] for row in rows})
+    await broker.publish(*events)
+    return BulkResult(results=results)
+
+@router.patch("/bulk", response_model=BulkResult)
+async def update_tasks_bulk(
+    updates: List[TaskBulkUpdate],
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
+    """
+    Met à jour plusieurs tâches dans une seule transaction.
+
+    Seuls les champs fournis sont modifiés et la version de chaque tâche est incrémentée.
+    Les mises à jour d'un lot sont regroupées par ensemble de champs et envoyées en
+    UPDATE par clé primaire (executemany).
+
+    Args:
+        updates (List[TaskBulkUpdate]): Identifiant et champs à modifier de chaque tâche.
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
+
+    Raises:
+        HTTPException 413: Si la requête contient plus de MAX_BULK_ITEMS éléments.
+        HTTPException 422: Si un élément met à null un champ obligatoire, ou si une tâche
+            apparaît dans plusieurs éléments (aucune tâche n'est modifiée).
+
+    Returns:
+        BulkResult: Résultat par élément ("updated" ou "not_found").
+    """
+    _check_bulk_size(updates)
+    seen = {}
+    for index, item in enumerate(updates):
+        field = _null_field(item.model_dump(exclude_unset=True))
+        if field is not None:
+            raise HTTPException(status_code=422, detail=f"Élément {index} : le champ {field} ne peut pas être null")
+        # Les éléments sont regroupés par ensemble de champs : l'ordre de la requête
+        # n'est pas conservé, deux éléments pour une même tâche seraient ambigus
+        if item.id in seen:
+            raise HTTPException(
+                status_code=422, detail=f"Élément {index} : la tâche {item.id} figure déjà à l'élément {seen[item.id]}",
+            )
+        seen[item.id] = index
+    results = []
+    touched, owners, events = set(), set(), []
+    for start, chunk in _chunks(updates):
+        existing = await _existing_owners(db, [item.id for item in chunk])
+        groups = {}
+        for offset, item in enumerate(chunk):
+            if item.id not in existing:
+                results.append(BulkItemResult(index=start + offset, id=item.id, status="not_found"))
+                continue
+            values = item.model_dump(exclude_unset=True, exclude={"id"})
+            if values:
+                params = {f"p_{key}": value for key, value in values.items()}
+                params["p_id"] = item.id
+                groups.setdefault(tuple(sorted(values)), []).append(params)
+                touched.add(item.id)
+                owners.update((existing[item.id], values.get("owner_id")))
+                events.append(task_event(
+                    "updated", item.id, values.get("owner_id", existing[item.id]), previous_owner_id=existing[item.id],
+                ))
+            results.append(BulkItemResult(index=start + offset, id=item.id, status="updated"))
+        for fields, params in groups.items():
+            await db.execute(_bulk_update_statement(fields), params)
+    await enqueue(db, "task.updated", events)
+    await db.commit()
+    if touched:
+        await cache.invalidate(task_ids=touched, owner_ids=owners)
+    await broker.publish(*events)
+    return BulkResult(results=results)
+
+@router.delete("/bulk", response_model=BulkResult)
+async def delete_tasks_bulk(
+    ids: List[int] = Body(..., embed=True),
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
+    """
+    Supprime plusieurs tâches dans une seule transaction.
+
+    Args:
+        ids (List[int]): Identifiants des tâches à supprimer (corps : {"ids": [...]}).
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
+
+    Raises:
+        HTTPException 413: Si la requête contient plus de MAX_BULK_ITEMS éléments.
+
+    Returns:
+        BulkResult: Résultat par élément ("deleted" ou "not_found").
+    """
+    _check_bulk_size(ids)
+    results = []
+    deleted = {}
+    for start, chunk in _chunks(ids):
+        existing = await _existing_owners(db, chunk)
+        deleted.update(existing)
+        if existing:
+            await db.execute(delete(Tache).where(Tache.id.in_(list(existing))))
+        results.extend(
+            BulkItemResult(index=start + offset, id=task_id, status="deleted" if task_id in existing else "not_found")
+            for offset, task_id in enumerate(chunk)
+        )
+    events = [task_event("deleted", task_id, owner) for task_id, owner in deleted.items()]
+    await enqueue(db, "task.deleted", events)
+    await db.commit()
+    if deleted:
+        await cache.invalidate(task_ids=deleted, owner_ids=deleted.values())
+    await broker.publish(*events)
+    return BulkResult(results=results)
+
+# ----- Export en flux -----
+
+def _export_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def _ndjson_lines(rows) -> bytes:
+    dump = EXPORT_ROW_JSON.dump_json
+    return b"".join([dump(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows])
+
+def _csv_lines(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows([_export_value(value) for value in row] for row in rows)
+    return buffer.getvalue().encode()
+
+@router.get("/export")
+async def export_tasks(
+    filters: TaskFilters = Depends(),
+    format: Optional[Literal["ndjson", "csv", "msgpack"]] = None,
+    accept: Optional[str] = Header(None),
+    session_factory=Depends(get_session_factory),
+):
+    """
+    Exporte les tâches en flux NDJSON, CSV ou MessagePack, avec une mémoire constante quelle que soit la taille de la table.
+
+    Les lignes sont lues par lots de EXPORT_BATCH_SIZE via un curseur côté serveur
+    (`stream_results` / `yield_per`), sous forme de tuples de colonnes (sans objets
+    ORM ni modèles Pydantic), et chaque lot est envoyé dès qu'il est sérialisé.
+
+    Args:
+        filters (TaskFilters): Filtres sur le statut, le propriétaire et l'échéance.
+        format (str | None): "ndjson" (une tâche JSON par ligne), "csv" (avec en-tête) ou
+            "msgpack" (documents MessagePack concaténés). Par défaut, "msgpack" si
+            l'en-tête Accept le demande explicitement, sinon "ndjson".
+        accept (str | None): En-tête Accept, consulté si `format` est absent.
+        session_factory: Fabrique de sessions ; la session est ouverte dans le générateur,
+            car elle doit rester ouverte pendant l'envoi de la réponse.
+
+    Returns:
+        StreamingResponse: Flux des tâches, triées par id.
+    """
+    if format is None:
+        format = "msgpack" if prefers_msgpack(accept) else "ndjson"
+    columns = [getattr(Tache, name) for name in EXPORT_COLUMNS]
+    query = apply_task_filters(select(*columns), filters).order_by(Tache.id)
+    query = query.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE)
+
+    async def generate():
+        async with session_factory() as session:
+            result = await session.stream(query)
+            first = True
+            async for rows in result.partitions():
+                if format == "csv":
+                    yield _csv_lines(rows, header=first)
+                elif format == "msgpack":
+                    yield rows_msgpack_stream(rows, EXPORT_COLUMNS)
+                else:
+                    yield _ndjson_lines(rows)
+                first = False
+            if first and format == "csv":
+                yield _csv_lines([], header=True)
+
+    if format == "csv":
+        return StreamingResponse(
+            generate(),
+            media_type="text/csv; charset=utf-8",
+            headers={"Content-Disposition": 'attachment; filename="tasks.csv"'},
+        )
+    if format == "msgpack":
+        return StreamingResponse(generate(), media_type=MSGPACK_MEDIA_TYPE, headers={"Vary": "Accept"})
+    return StreamingResponse(generate(), media_type="application/x-ndjson", headers={"Vary": "Accept"})
+
+# ----- Échéances (tâches en retard et à venir) -----
+
+async def due_page(statuses: List[str], owner_id: Optional[int], after: Optional[datetime],
+                   before: Optional[datetime], limit: int, cursor: Optional[str], db: AsyncSession,
+                   accept: Optional[str] = None) -> Response:
+    """
+    Lit une page de tâches triées par échéance croissante, entre deux bornes exclues.
+
+    Une requête par statut, chacune parcourant un intervalle de l'index
+    (status, due_date) déjà trié par (due_date, id) et limitée à `limit + 1` lignes ;
+    les pages sont fusionnées sans tri complet. Une seule requête avec `status IN (...)`
+    obligerait la base à trier toutes les lignes de l'intervalle.
+
+    Args:
+        statuses (List[str]): Statuts retenus.
+        owner_id (int | None): Propriétaire filtré.
+        after (datetime | None): Échéance minimale, exclue.
+        before (datetime | None): Échéance maximale, exclue.
+        limit (int): Taille de page.
+        cursor (str | None): Curseur de la page précédente.
+        db (AsyncSession): Session de lecture.
+        accept (str | None): En-tête Accept (MessagePack si demandé explicitement).
+
+    Raises:
+        HTTPException 400: Si le curseur est invalide ou si trop de statuts sont demandés.
+
+    Returns:
+        Response: Tableau de tâches (JSON ou MessagePack), avec l'en-tête X-Next-Cursor s'il reste des tâches.
+    """
+    statuses = list(dict.fromkeys(statuses))
+    if len(statuses) > MAX_DUE_STATUSES:
+        raise HTTPException(status_code=400, detail=f"Au plus {MAX_DUE_STATUSES} statuts")
+    # Le curseur remplace la borne basse : la page suivante reprend après la dernière tâche lue
+    start = (after, None) if after is not None else None
+    if cursor:
+        try:
+            start = decode_cursor(cursor, "due_date", "asc")
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+    columns = [getattr(Tache, name) for name in LIST_COLUMNS]
+    pages = []
+    for status in statuses:
+        query = due_query(status, columns, start, before)
+        if owner_id is not None:
+            query = query.where(Tache.owner_id == owner_id)
+        pages.append(list(await db.execute(query.limit(limit + 1))))
+    rows = list(heapq.merge(*pages, key=lambda row: (row.due_date, row.id)))[:limit + 1]
+    cursor_next = next_cursor(rows, limit, "due_date", "asc")
+    headers = {"Vary": "Accept"}
+    if cursor_next:
+        headers["X-Next-Cursor"] = cursor_next
+    if prefers_msgpack(accept):
+        return Response(rows_msgpack(rows, LIST_COLUMNS), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return Response(rows_json(rows), media_type="application/json", headers=headers)
+
+@router.get("/overdue", response_model=List[TaskResponse])
+async def get_overdue_tasks(
+    status: List[str] = Query(list(OPEN_STATUSES)),
+    owner_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Récupère les tâches ouvertes dont l'échéance est dépassée, de la plus ancienne à la plus récente.
+
+    Les tâches sans échéance ne sont jamais en retard. Le curseur de la page suivante
+    est renvoyé dans l'en-tête `X-Next-Cursor`. Les pages dépendent de l'heure : elles
+    ne sont ni mises en cache ni validées par ETag.
+
+    Args:
+        status (List[str]): Statuts considérés comme ouverts (par défaut todo et in_progress).
+        owner_id (int | None): Ne retenir que les tâches de ce propriétaire.
+        limit (int): Nombre maximal de tâches par page.
+        cursor (str | None): Curseur opaque renvoyé par la page précédente.
+        accept (str | None): En-tête Accept (MessagePack si demandé explicitement).
+        db (AsyncSession): Session de lecture (réplica si configuré).
+
+    Raises:
+        HTTPException 400: Si le curseur est invalide ou si trop de statuts sont demandés.
+
+    Returns:
+        List[TaskResponse]: Tâches en retard de la page demandée.
+    """
+    return await due_page(status, owner_id, None, datetime.utcnow(), limit, cursor, db, accept)
+
+@router.get("/upcoming", response_model=List[TaskResponse])
+async def get_upcoming_tasks(
+    within: timedelta = Query(UPCOMING_DEFAULT_WITHIN),
+    status: List[str] = Query(list(OPEN_STATUSES)),
+    owner_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Récupère les tâches ouvertes dont l'échéance tombe dans la fenêtre à venir, par échéance croissante.
+
+    Args:
+        within (timedelta): Fenêtre à partir de maintenant, en durée ISO 8601
+            (par exemple `PT2H` ou `P7D`) ; un jour par défaut.
+        status (List[str]): Statuts considérés comme ouverts (par défaut todo et in_progress).
+        owner_id (int | None): Ne retenir que les tâches de ce propriétaire.
+        limit (int): Nombre maximal de tâches par page.
+        cursor (str | None): Curseur opaque renvoyé par la page précédente.
+        accept (str | None): En-tête Accept (MessagePack si demandé explicitement).
+        db (AsyncSession): Session de lecture (réplica si configuré).
+
+    Raises:
+        HTTPException 400: Si la fenêtre n'est pas positive ou dépasse UPCOMING_MAX_WITHIN,
+            si le curseur est invalide ou si trop de statuts sont demandés.
+
+    Returns:
+        List[TaskResponse]: Tâches à échéance proche de la page demandée.
+    """
+    if not timedelta(0) < within <= UPCOMING_MAX_WITHIN:
+        raise HTTPException(status_code=400, detail="Fenêtre d'échéance invalide")
+    now = datetime.utcnow()
+    return await due_page(status, owner_id, now, now + within, limit, cursor, db, accept)
+
+# ----- Flux des changements (SSE et WebSocket) -----
+
+# Délai de reconnexion conseillé aux clients EventSource, en millisecondes
+SSE_RETRY_MS = 3000
+# Code de fermeture WebSocket d'un abonné déconnecté pour lenteur ("Try Again Later")
+WS_CLOSE_SLOW_CONSUMER = 1013
+
+def _sse_message(event) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {event.data}\n\n"
+
+async def _sse_stream(broker: EventBroker, owner_id: Optional[int], last_event_id: Optional[int],
+                      heartbeat: float = EVENT_HEARTBEAT_SECONDS):
+    # L'abonnement est pris dans le générateur : il est libéré par le finally
+    # lorsque le client se déconnecte (annulation du générateur)
+    subscription = broker.subscribe(owner_id, last_event_id)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # Commentaire SSE : garde la connexion ouverte à travers les proxys
+                yield ": ping\n\n"
+                continue
+            if event is None:
+                # Abonné trop lent : fin du flux, EventSource se reconnecte avec Last-Event-ID
+                return
+            yield _sse_message(event)
+    finally:
+        broker.unsubscribe(subscription)
+
+@router.get("/stream")
+async def stream_task_events(
+    owner_id: Optional[int] = None,
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[int] = Header(None, alias="Last-Event-ID"),
+    broker: EventBroker = Depends(get_event_broker),
+):
+    """
+    Diffuse les changements de tâches en Server-Sent Events.
+
+    Chaque événement porte son identifiant (`id:`), son type (`event:` created,
+    updated, deleted, due ou reset) et, en `data:`, l'événement JSON : task_id, owner_id,
+    previous_owner_id et la tâche après l'écriture lorsqu'elle est connue (null pour
+    les suppressions, les écritures groupées et les échéances atteintes, "due", publiées
+    par le planificateur des échéances). Un commentaire est envoyé toutes les
+    EVENT_HEARTBEAT_SECONDS secondes sans événement.
+
+    À la reconnexion, EventSource renvoie l'en-tête Last-Event-ID : les événements
+    suivants encore dans l'historique sont rejoués. Un événement "reset" signale que
+    des événements ont été perdus et que les tâches doivent être relues.
+    Un client trop lent voit son flux fermé, et reprend à sa reconnexion.
+
+    Args:
+        owner_id (int | None): Ne recevoir que les tâches de ce propriétaire
+            (y compris celles qu'il vient de perdre).
+        last_event_id (int | None): Dernier événement reçu (paramètre de requête).
+        last_event_id_header (int | None): Dernier événement reçu (en-tête Last-Event-ID, prioritaire).
+        broker (EventBroker): Flux des changements.
+
+    Returns:
+        StreamingResponse: Flux text/event-stream, sans fin.
+    """
+    resume_from = last_event_id_header if last_event_id_header is not None else last_event_id
+    return StreamingResponse(
+        _sse_stream(broker, owner_id, resume_from),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _send_events(websocket: WebSocket, subscription: Subscription, scope: anyio.CancelScope):
+    try:
+        while True:
+            event = await subscription.get()
+            if event is None:
+                await websocket.close(code=WS_CLOSE_SLOW_CONSUMER, reason="Client trop lent")
+                break
+            await websocket.send_text(event.data)
+    except WebSocketDisconnect:
+        # Client parti pendant un envoi : ce n'est pas une erreur du serveur
+        pass
+    scope.cancel()
+
+async def _wait_for_disconnect(websocket: WebSocket, scope: anyio.CancelScope):
+    # Les messages du client sont ignorés : seule la déconnexion compte
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+    scope.cancel()
+
+@router.websocket("/ws")
+async def task_events_socket(
+    websocket: WebSocket,
+    owner_id: Optional[int] = None,
+    last_event_id: Optional[int] = None,
+    broker: EventBroker = Depends(get_event_broker),
+):
+    """
+    Diffuse les changements de tâches sur une WebSocket.
+
+    Chaque message texte est un événement JSON (même contenu que le `data:` de
+    GET /tasks/stream, identifiant compris). Un client trop lent est déconnecté avec
+    le code 1013 ; il se reconnecte avec `last_event_id` pour reprendre.
+
+    Args:
+        websocket (WebSocket): Connexion du client.
+        owner_id (int | None): Ne recevoir que les tâches de ce propriétaire.
+        last_event_id (int | None): Dernier événement reçu, pour la reprise.
+        broker (EventBroker): Flux des changements.
+    """
+    await websocket.accept()
+    subscription = broker.subscribe(owner_id, last_event_id)
+    try:
+        # La première des deux tâches qui se termine arrête l'autre
+        async with anyio.create_task_group() as group:
+            group.start_soon(_send_events, websocket, subscription, group.cancel_scope)
+            group.start_soon(_wait_for_disconnect, websocket, group.cancel_scope)
+    finally:
+        broker.unsubscribe(subscription)
+
+@router.get("/{task_id}", response_model=TaskWithOwner, response_model_exclude_unset=True)
+async def get_task(
+    task_id: int,
+    response: Response,
+    include: Optional[Literal["owner"]] = None,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    cache: ResponseCache = Depends(get_task_cache),
+):
     """
     Récupère une tâche par son identifiant.
 
+    La réponse porte un ETag (id et version) et un Last-Modified (updated_at).
+    Pour une requête conditionnelle (If-None-Match / If-Modified-Since), seules la
+    version et la date de modification sont d'abord lues : si le client est à jour,
+    la réponse est un 304, sans lecture ni sérialisation de la tâche.
+
+    La tâche est lue via le cache (voir `response_cache`) : une tâche en cache est
+    servie, ou revalidée, sans aucune requête SQL.
+
+    Avec `include=owner`, la tâche et son propriétaire sont lus en une seule
+    requête (`joinedload`), hors cache et sans en-têtes de validation.
+
     Args:
         task_id (int): ID de la tâche à récupérer.
-        db (Session): Session de base de données.
+        response (Response): Réponse HTTP, utilisée pour les en-têtes de cache.
+        include (str | None): "owner" pour inclure le propriétaire de la tâche.
+        if_none_match (str | None): En-tête If-None-Match.
+        if_modified_since (str | None): En-tête If-Modified-Since.
+        db (AsyncSession): Session de lecture (réplica si configuré).
+        cache (ResponseCache): Cache des tâches.
 
     Raises:
         HTTPException 404: Si la tâche n'existe pas.
 
     Returns:
-        TaskResponse: La tâche trouvée.
+        TaskWithOwner: La tâche trouvée (ou réponse 304).
     """
-    task = db.query(Tache).filter(Tache.id == task_id).first()
+    if include == "owner":
+        task = await db.scalar(select(Tache).options(joinedload(Tache.owner)).where(Tache.id == task_id))
+        if task is None:
+            raise HTTPException(status_code=404, detail="Tâche non trouvée")
+        return task
+
+    conditional = bool(if_none_match or if_modified_since)
+    key = cache.task_key(task_id)
+    task = await cache.get(key)
+
+    if task is None and conditional:
+        state = (await db.execute(
+            select(Tache.version, Tache.updated_at).where(Tache.id == task_id)
+        )).first()
+        if state is None:
+            raise HTTPException(status_code=404, detail="Tâche non trouvée")
+        headers = cache_headers(task_etag(task_id, state.version), state.updated_at)
+        if is_not_modified(headers["ETag"], state.updated_at, if_none_match, if_modified_since):
+            return not_modified(headers)
+
     if task is None:
-        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+        async def load_task():
+            columns = [getattr(Tache, name) for name in RESPONSE_COLUMNS]
+            row = (await db.execute(select(*columns).where(Tache.id == task_id))).first()
+            return row._asdict() if row is not None else None
+
+        task = await cache.load(key, load_task, cache.task_ttl, fence=cache.fence_key(task_id), replica=reads_replica(db))
+        if task is None:
+            raise HTTPException(status_code=404, detail="Tâche non trouvée")
+
+    updated_at = datetime.fromisoformat(task["updated_at"]) if task["updated_at"] else None
+    headers = cache_headers(task_etag(task["id"], task["version"]), updated_at)
+    if conditional and is_not_modified(headers["ETag"], updated_at, if_none_match, if_modified_since):
+        return not_modified(headers)
+    response.headers.update(headers)
     return task
 
 @router.post("/", response_model=TaskResponse)
-def create_task(task: TaskCreate, db: Session = Depends(get_db)):
+async def create_task(
+    task: TaskCreate,
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
     """
     Crée une nouvelle tâche.
 
     Args:
         task (TaskCreate): Données de la tâche à créer.
-        db (Session): Session de base de données.
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
 
     Returns:
         TaskResponse: La tâche créée.
     """
-    db_task = Tache(**task.dict())
+    db_task = Tache(**task.model_dump())
     db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
+    await db.flush()
+    event = task_event("created", db_task.id, db_task.owner_id, task=_task_data(db_task))
+    await enqueue(db, "task.created", [event])
+    await db.commit()
+    await cache.invalidate(owner_ids=[db_task.owner_id])
+    await broker.publish(event)
     return db_task
 
 @router.put("/{task_id}", response_model=TaskResponse)
-def update_task(task_id: int, updated_task: TaskCreate, db: Session = Depends(get_db)):
+async def update_task(
+    task_id: int,
+    updated_task: TaskCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
     """
     Met à jour une tâche existante.
 
+    Avec If-Match, une écriture concurrente entre la lecture et l'UPDATE (détectée
+    par `version_id_col`) donne un 412. Sans If-Match, aucune précondition n'est
+    posée : la tâche est relue et la mise à jour rejouée (le dernier écrivain
+    l'emporte), jusqu'à PUT_RETRIES fois.
+
     Args:
         task_id (int): ID de la tâche à modifier.
         updated_task (TaskCreate): Données mises à jour.
-        db (Session): Session de base de données.
+        response (Response): Réponse HTTP, utilisée pour l'en-tête ETag.
+        if_match (str | None): ETag attendu (en-tête If-Match), optionnel.
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
 
     Raises:
         HTTPException 404: Si la tâche n'existe pas.
+        HTTPException 409: Si, sans If-Match, chaque tentative a été devancée par une autre écriture.
+        HTTPException 412: Si la tâche a changé depuis l'ETag fourni, ou pendant la mise à jour.
 
     Returns:
         TaskResponse: La tâche mise à jour.
     """
-    task = db.query(Tache).filter(Tache.id == task_id).first()
-    if task is None:
-        raise HTTPException(status_code=404, detail="Tâche non trouvée")
+    version = expected_version(if_match, task_id)
+    for _ in range(PUT_RETRIES):
+        task = await db.get(Tache, task_id, populate_existing=True)
+        if task is None:
+            raise HTTPException(status_code=404, detail="Tâche non trouvée")
+        if version is not None and version != task.version:
+            raise HTTPException(status_code=412, detail="La tâche a été modifiée entre-temps")
 
-    for key, value in updated_task.dict().items():
-        setattr(task, key, value)
-    db.commit()
-    db.refresh(task)
+        previous_owner = task.owner_id
+        for key, value in updated_task.model_dump().items():
+            setattr(task, key, value)
+        try:
+            await db.flush()
+            break
+        except StaleDataError:
+            # Modification concurrente entre la lecture et l'écriture (version_id_col)
+            await db.rollback()
+            if version is not None:
+                raise HTTPException(status_code=412, detail="La tâche a été modifiée entre-temps")
+    else:
+        raise HTTPException(status_code=409, detail="La tâche est modifiée en continu, réessayez")
+    event = task_event("updated", task.id, task.owner_id, previous_owner_id=previous_owner, task=_task_data(task))
+    await enqueue(db, "task.updated", [event])
+    await db.commit()
+    await cache.invalidate(task_ids=[task.id], owner_ids=[previous_owner, task.owner_id], versions={task.id: task.version})
+    await broker.publish(event)
+    response.headers.update(cache_headers(task_etag(task.id, task.version), task.updated_at))
     return task
 
+@router.patch("/{task_id}", response_model=TaskResponse)
+async def patch_task(
+    task_id: int,
+    changes: TaskUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
+    """
+    Met à jour partiellement une tâche, en une seule instruction UPDATE.
+
+    Seuls les champs fournis sont écrits, sans lecture préalable de la ligne :
+    `UPDATE ... SET <champs>, version = version + 1 WHERE id = :id [AND version = :v]`,
+    avec RETURNING lorsque le dialecte le permet, sinon une seule relecture.
+    Avec If-Match, la mise à jour n'est appliquée que si la version n'a pas changé
+    (concurrence optimiste, sans verrou). Seul un changement de propriétaire
+    nécessite de lire l'ancien propriétaire, pour invalider ses pages en cache.
+
+    Args:
+        task_id (int): ID de la tâche à modifier.
+        changes (TaskUpdate): Champs à modifier.
+        response (Response): Réponse HTTP, utilisée pour l'en-tête ETag.
+        if_match (str | None): ETag attendu (en-tête If-Match), optionnel.
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
+
+    Raises:
+        HTTPException 400: Si aucun champ n'est fourni.
+        HTTPException 404: Si la tâche n'existe pas.
+        HTTPException 412: Si la tâche a changé depuis l'ETag fourni.
+        HTTPException 422: Si un champ obligatoire est mis à null.
+
+    Returns:
+        TaskResponse: La tâche mise à jour.
+    """
+    values = changes.model_dump(exclude_unset=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="Aucun champ à modifier")
+    field = _null_field(values)
+    if field is not None:
+        raise HTTPException(status_code=422, detail=f"Le champ {field} ne peut pas être null")
+
+    previous_owner = None
+    if "owner_id" in values:
+        previous_owner = await db.scalar(select(Tache.owner_id).where(Tache.id == task_id))
+
+    version = expected_version(if_match, task_id)
+    statement = update(Tache).where(Tache.id == task_id).values(**values, version=Tache.version + 1)
+    if version is not None:
+        statement = statement.where(Tache.version == version)
+    statement = statement.execution_options(synchronize_session=False)
+    columns = [getattr(Tache, name) for name in RESPONSE_COLUMNS]
+
+    if _supports_update_returning(db):
+        row = (await db.execute(statement.returning(*columns))).first()
+    else:
+        result = await db.execute(statement)
+        row = None
+        if result.rowcount:
+            row = (await db.execute(select(*columns).where(Tache.id == task_id))).first()
+
+    if row is None:
+        exists = await db.scalar(select(Tache.id).where(Tache.id == task_id))
+        await db.rollback()
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Tâche non trouvée")
+        raise HTTPException(status_code=412, detail="La tâche a été modifiée entre-temps")
+
+    event = task_event("updated", task_id, row.owner_id, previous_owner_id=previous_owner, task=_task_data(row))
+    await enqueue(db, "task.updated", [event])
+    await db.commit()
+    await cache.invalidate(task_ids=[task_id], owner_ids=[previous_owner, row.owner_id], versions={task_id: row.version})
+    await broker.publish(event)
+    response.headers.update(cache_headers(task_etag(row.id, row.version), row.updated_at))
+    return row._asdict()
+
 @router.delete("/{task_id}")
-def delete_task(task_id: int, db: Session = Depends(get_db)):
+async def delete_task(
+    task_id: int,
+    db: AsyncSession = Depends(get_db),
+    cache: ResponseCache = Depends(get_task_cache),
+    broker: EventBroker = Depends(get_event_broker),
+):
     """
     Supprime une tâche par son identifiant.
 
     Args:
         task_id (int): ID de la tâche à supprimer.
-        db (Session): Session de base de données.
+        db (AsyncSession): Session de base de données.
+        cache (ResponseCache): Cache des tâches, invalidé après l'écriture.
+        broker (EventBroker): Flux des changements, notifié après l'écriture.
 
     Raises:
-        HTTPException 404: Si la tâche n'existe pas.
+        HTTPException 404: Si la tâche n'existe pas (ou vient d'être supprimée par une autre requête).
+        HTTPException 409: Si la tâche a changé de propriétaire pendant la suppression.
 
     Returns:
         dict: Message de confirmation.
     """
-    task = db.query(Tache).filter(Tache.id == task_id).first()
-    if task is None:
+    row = (await db.execute(select(Tache.owner_id).where(Tache.id == task_id))).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Tâche non trouvée")
 
-    db.delete(task)
-    db.commit()
+    # DELETE sans condition de version (l'ORM ajouterait "AND version = ?") : une
+    # modification concurrente ne fait pas échouer la suppression. La condition sur le
+    # propriétaire garde l'invalidation du cache et l'événement exacts.
+    result = await db.execute(delete(Tache).where(Tache.id == task_id, Tache.owner_id == row.owner_id))
+    if result.rowcount == 0:
+        await db.rollback()
+        if await db.scalar(select(Tache.id).where(Tache.id == task_id)) is None:
+            raise HTTPException(status_code=404, detail="Tâche non trouvée")
+        raise HTTPException(status_code=409, detail="La tâche a changé de propriétaire, réessayez")
+    event = task_event("deleted", task_id, row.owner_id)
+    await enqueue(db, "task.deleted", [event])
+    await db.commit()
+    await cache.invalidate(task_ids=[task_id], owner_ids=[row.owner_id])
+    await broker.publish(event)
     return {"message": "Tâche supprimée"}
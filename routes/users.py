@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from models import User
+from database import get_read_db
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from response_cache import ResponseCache, get_task_cache
+from routes.tasks import MyTaskFilters, TaskFilters, TaskResponse, task_page
+
+router = APIRouter()
+
+@router.get("/{user_id}/tasks", response_model=List[TaskResponse])
+async def get_user_tasks(
+    user_id: int,
+    response: Response,
+    filters: MyTaskFilters = Depends(),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: Literal["id", "created_at"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    if_none_match: Optional[str] = Header(None),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+    cache: ResponseCache = Depends(get_task_cache),
+):
+    """
+    Récupère une page des tâches d'un utilisateur.
+
+    Remplace le parcours de `User.tasks`, qui chargerait toutes les tâches sans
+    pagination : au plus deux requêtes SQL (existence de l'utilisateur, page de
+    tâches par l'index (owner_id, id)), quel que soit le nombre de tâches.
+    Pagination, tri, ETag, cache et représentation MessagePack sont ceux de GET /tasks/.
+
+    Args:
+        user_id (int): ID de l'utilisateur.
+        response (Response): Réponse HTTP, utilisée pour les en-têtes de pagination et de cache.
+        filters (MyTaskFilters): Filtres sur le statut et l'échéance.
+        limit (int): Nombre maximal de tâches par page.
+        cursor (str | None): Curseur opaque renvoyé par la page précédente.
+        sort (str): Colonne de tri ("id" ou "created_at").
+        order (str): Sens du tri ("asc" ou "desc").
+        if_none_match (str | None): ETag d'une page déjà reçue (en-tête If-None-Match).
+        accept (str | None): En-tête Accept (MessagePack si demandé explicitement).
+        db (AsyncSession): Session de lecture (réplica si configuré).
+        cache (ResponseCache): Cache des tâches.
+
+    Raises:
+        HTTPException 400: Si le curseur est invalide.
+        HTTPException 404: Si l'utilisateur n'existe pas.
+
+    Returns:
+        List[TaskResponse]: Tâches de l'utilisateur pour la page demandée (ou réponse 304).
+    """
+    if await db.scalar(select(User.id).where(User.id == user_id)) is None:
+        raise HTTPException(status_code=404, detail="Utilisateur non trouvé")
+    scoped = TaskFilters(**filters.model_dump(), owner_id=user_id)
+    return await task_page(response, scoped, limit, cursor, sort, order, if_none_match, db, cache, accept)
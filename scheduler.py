@@ -0,0 +1,370 @@
+"""
+Planificateur des échéances de tâches.
+
+Le planificateur publie un événement "due" sur le flux des changements (voir
+`events`) lorsqu'une tâche ouverte atteint sa date d'échéance. Il ne relit pas
+la table à intervalle régulier :
+- Les prochaines échéances sont gardées dans un tas (heapq) trié par (due_date, id),
+  chargé par fenêtres de DUE_SCHEDULER_WINDOW tâches via l'index (status, due_date) :
+  une fois la fenêtre épuisée, la suivante est lue à partir de la dernière clé chargée,
+- Le tas est tenu à jour par les événements du flux : une tâche créée ou modifiée
+  y entre (ou en sort) avec son échéance et son statut, une tâche supprimée en sort.
+  Les écritures groupées, publiées sans la tâche, font relire les seules tâches
+  concernées ; un abonnement perdu (abonné trop lent, événement "reset") fait
+  recharger la fenêtre,
+- La boucle dort jusqu'à la prochaine échéance (au plus DUE_SCHEDULER_MAX_SLEEP
+  secondes), et est réveillée lorsqu'une échéance plus proche arrive.
+
+Les entrées remplacées ou retirées ne sont pas cherchées dans le tas : elles sont
+ignorées lorsqu'elles en sortent (suppression paresseuse), et le tas est reconstruit
+lorsqu'elles deviennent majoritaires.
+
+Le planificateur est désactivé par défaut : lancé dans chaque worker, il
+publierait chaque échéance plusieurs fois, et avec le backend d'événements en
+mémoire chacun ne verrait que ses propres écritures. Il s'active
+(DUE_SCHEDULER_ENABLED=true) dans un seul processus : un déploiement à un worker,
+ou un worker dédié avec le backend d'événements Redis, qui reçoit alors les
+écritures de tous les workers et diffuse les événements "due" à tous les abonnés.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import AsyncSessionLocal
+from events import RESET, EventBroker, event_broker, task_event
+from models import Tache
+from settings import env_bool
+
+logger = logging.getLogger(__name__)
+
+# Planificateur lancé dans le worker (à activer dans un seul processus)
+DUE_SCHEDULER_ENABLED = env_bool("DUE_SCHEDULER_ENABLED", False)
+# Échéances chargées par lecture de la base
+DUE_SCHEDULER_WINDOW = int(os.getenv("DUE_SCHEDULER_WINDOW", "1000"))
+# Attente maximale, en secondes, entre deux vérifications des échéances
+DUE_SCHEDULER_MAX_SLEEP = float(os.getenv("DUE_SCHEDULER_MAX_SLEEP", "60"))
+
+# Statuts des tâches dont l'échéance est suivie
+OPEN_STATUSES = ("todo", "in_progress")
+
+Key = Tuple[datetime, int]
+
+
+def to_utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Ramène une date en UTC sans fuseau, comme les dates stockées en base.
+
+    Args:
+        value (datetime | None): Date, avec ou sans fuseau.
+
+    Returns:
+        datetime | None: Date UTC sans fuseau.
+    """
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def due_query(status: str, columns: Iterable, after: Optional[Key] = None, before: Optional[datetime] = None):
+    """
+    Construit la lecture des tâches d'un statut par échéance croissante.
+
+    Avec un seul statut, la condition est un intervalle de l'index (status, due_date),
+    déjà trié par (due_date, id) : la base s'arrête après la limite, sans tri.
+
+    Args:
+        status (str): Statut des tâches.
+        columns (Iterable): Colonnes lues.
+        after (tuple | None): Clé (due_date, id) exclue à partir de laquelle reprendre ;
+            avec un id None, toutes les tâches de cette échéance sont exclues.
+        before (datetime | None): Échéance maximale, exclue.
+
+    Returns:
+        Select: Requête triée par (due_date, id).
+    """
+    query = select(*columns).where(Tache.status == status, Tache.due_date.is_not(None))
+    if after is not None:
+        due, last_id = after
+        if last_id is None:
+            query = query.where(Tache.due_date > due)
+        else:
+            query = query.where(or_(Tache.due_date > due, and_(Tache.due_date == due, Tache.id > last_id)))
+    if before is not None:
+        query = query.where(Tache.due_date < before)
+    return query.order_by(Tache.due_date, Tache.id)
+
+
+class DueScheduler:
+    """
+    Émet un événement "due" lorsqu'une tâche ouverte atteint son échéance.
+
+    Attributs :
+        session_factory : Fabrique de sessions asynchrones.
+        broker (EventBroker) : Flux sur lequel les événements sont lus et publiés.
+        statuses (tuple) : Statuts des tâches suivies.
+        window (int) : Échéances chargées par lecture de la base.
+        max_sleep (float) : Attente maximale entre deux vérifications, en secondes.
+        clock (Callable) : Heure courante (UTC sans fuseau), remplaçable dans les tests.
+        heap (list) : Tas des clés (due_date, id), entrées périmées comprises.
+        deadlines (dict) : Échéance et propriétaire en vigueur par tâche du tas.
+        horizon (tuple | None) : Dernière clé chargée si la fenêtre était pleine ;
+            None lorsque toutes les échéances à venir sont dans le tas.
+        checked_at (datetime) : Heure de la dernière vérification ; les échéances
+            antérieures ne sont plus émises.
+        emitted (int) : Événements "due" publiés.
+        loads (int) : Lectures d'une fenêtre d'échéances.
+    """
+
+    def __init__(self, session_factory, broker: EventBroker, statuses: Tuple[str, ...] = OPEN_STATUSES,
+                 window: int = DUE_SCHEDULER_WINDOW, max_sleep: float = DUE_SCHEDULER_MAX_SLEEP,
+                 clock: Callable[[], datetime] = datetime.utcnow):
+        self.session_factory = session_factory
+        self.broker = broker
+        self.statuses = statuses
+        self.window = window
+        self.max_sleep = max_sleep
+        self.clock = clock
+        self.heap: List[Key] = []
+        self.deadlines: Dict[int, Tuple[datetime, Optional[int]]] = {}
+        self.horizon: Optional[Key] = None
+        self.checked_at = clock()
+        self.emitted = 0
+        self.loads = 0
+        self._stale = False
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    # ----- Tenue du tas -----
+
+    def _push(self, task_id: int, due: datetime, owner_id: Optional[int]) -> None:
+        if not self.heap or (due, task_id) < self.heap[0]:
+            # Nouvelle échéance la plus proche : la boucle doit raccourcir son attente
+            self._wakeup.set()
+        heapq.heappush(self.heap, (due, task_id))
+        self.deadlines[task_id] = (due, owner_id)
+        if len(self.heap) > 2 * len(self.deadlines) + self.window:
+            self._compact()
+
+    def _compact(self) -> None:
+        # Reconstruit le tas sans les entrées périmées
+        self.heap = [(due, task_id) for task_id, (due, _) in self.deadlines.items()]
+        heapq.heapify(self.heap)
+
+    def track(self, task_id: int, due: Optional[datetime], status: Optional[str], owner_id: Optional[int]) -> None:
+        """
+        Met à jour l'échéance suivie d'une tâche après une écriture.
+
+        Args:
+            task_id (int): Tâche écrite.
+            due (datetime | None): Échéance après l'écriture.
+            status (str | None): Statut après l'écriture.
+            owner_id (int | None): Propriétaire après l'écriture.
+        """
+        self.deadlines.pop(task_id, None)
+        due = to_utc_naive(due)
+        if due is None or status not in self.statuses or due <= self.checked_at:
+            return
+        if self.horizon is not None and (due, task_id) > self.horizon:
+            # Au-delà de la fenêtre chargée : lue avec la fenêtre suivante
+            return
+        self._push(task_id, due, owner_id)
+
+    async def load(self, after: Optional[Key] = None) -> None:
+        """
+        Charge la fenêtre suivante des échéances à venir.
+
+        Une requête par statut, chacune limitée à `window` lignes ; les résultats sont
+        fusionnés et les `window` premières clés sont gardées. Toute tâche de clé
+        inférieure ou égale à la dernière gardée est ainsi dans le tas.
+
+        Args:
+            after (tuple | None): Clé (due_date, id) à partir de laquelle lire ;
+                par défaut, l'heure de la dernière vérification.
+        """
+        if after is None:
+            after = (self.checked_at, None)
+        columns = (Tache.id, Tache.due_date, Tache.owner_id)
+        rows = []
+        async with self.session_factory() as session:
+            for status in self.statuses:
+                rows.extend(await session.execute(due_query(status, columns, after).limit(self.window)))
+        rows.sort(key=lambda row: (row.due_date, row.id))
+        del rows[self.window:]
+        for row in rows:
+            self._push(row.id, row.due_date, row.owner_id)
+        self.horizon = (rows[-1].due_date, rows[-1].id) if len(rows) == self.window else None
+        self.loads += 1
+
+    async def reload(self) -> None:
+        """Vide le tas et recharge la première fenêtre des échéances à venir."""
+        self.heap = []
+        self.deadlines = {}
+        self.horizon = None
+        await self.load()
+        self._wakeup.set()
+
+    async def refresh_tasks(self, task_ids: Iterable[int]) -> None:
+        """
+        Relit l'échéance de tâches écrites sans que l'événement ne porte la tâche.
+
+        Args:
+            task_ids (Iterable[int]): Tâches à relire ; les tâches absentes sont retirées.
+        """
+        ids = list(task_ids)
+        async with self.session_factory() as session:
+            rows = {row.id: row for row in await session.execute(
+                select(Tache.id, Tache.due_date, Tache.status, Tache.owner_id).where(Tache.id.in_(ids))
+            )}
+        for task_id in ids:
+            row = rows.get(task_id)
+            if row is None:
+                self.deadlines.pop(task_id, None)
+            else:
+                self.track(task_id, row.due_date, row.status, row.owner_id)
+
+    async def apply(self, payloads: List[dict]) -> None:
+        """
+        Applique des événements du flux au tas.
+
+        Args:
+            payloads (List[dict]): Événements décodés (created, updated, deleted).
+        """
+        stale = []
+        for payload in payloads:
+            task_id, task = payload["task_id"], payload.get("task")
+            if payload["type"] == "deleted":
+                self.deadlines.pop(task_id, None)
+            elif payload["type"] in ("created", "updated"):
+                if task is None:
+                    stale.append(task_id)
+                    continue
+                due = datetime.fromisoformat(task["due_date"]) if task.get("due_date") else None
+                self.track(task_id, due, task.get("status"), payload.get("owner_id"))
+        if stale:
+            await self.refresh_tasks(stale)
+
+    # ----- Émission -----
+
+    async def fire_due(self) -> int:
+        """
+        Publie un événement "due" pour chaque échéance atteinte.
+
+        Returns:
+            int: Nombre d'événements publiés.
+        """
+        now = self.clock()
+        events = []
+        while True:
+            while self.heap and self.heap[0][0] <= now:
+                due, task_id = heapq.heappop(self.heap)
+                current = self.deadlines.get(task_id)
+                if current is None or current[0] != due:
+                    continue
+                del self.deadlines[task_id]
+                events.append(task_event("due", task_id, current[1]))
+            if self.deadlines or self.horizon is None:
+                break
+            # Fenêtre épuisée : lecture de la suivante, qui peut déjà contenir des échéances atteintes
+            self.heap = []
+            await self.load(self.horizon)
+        self.checked_at = now
+        if events:
+            await self.broker.publish(*events)
+            self.emitted += len(events)
+        return len(events)
+
+    def next_delay(self) -> float:
+        """
+        Retourne l'attente avant la prochaine vérification.
+
+        Returns:
+            float: Secondes jusqu'à la prochaine échéance, plafonnées à max_sleep.
+        """
+        if not self.heap:
+            return self.max_sleep
+        delay = (self.heap[0][0] - self.clock()).total_seconds()
+        return min(max(delay, 0.0), self.max_sleep)
+
+    # ----- Boucles -----
+
+    async def _follow(self, subscription) -> None:
+        # Événements du flux : tenue incrémentale du tas
+        while True:
+            event = await subscription.get()
+            if event is None or event.type == RESET:
+                # Événements perdus : le tas est rechargé depuis la base
+                self.broker.unsubscribe(subscription)
+                subscription = self.broker.subscribe()
+                async with self._lock:
+                    await self.reload()
+                continue
+            if event.type not in ("created", "updated", "deleted"):
+                continue
+            async with self._lock:
+                try:
+                    await self.apply([json.loads(event.data)])
+                except SQLAlchemyError:
+                    # Échéances relues impossibles : rechargement complet par la boucle principale
+                    logger.exception("Relecture des échéances modifiées impossible")
+                    self._stale = True
+                    self._wakeup.set()
+
+    async def run(self) -> None:
+        """Boucle du planificateur : chargement initial, tenue du tas et émission des échéances."""
+        # Abonnement pris avant le chargement : aucune écriture concurrente n'est perdue
+        subscription = self.broker.subscribe()
+        follower = asyncio.create_task(self._follow(subscription))
+        self.checked_at = self.clock()
+        self._stale = True
+        try:
+            while True:
+                try:
+                    async with self._lock:
+                        if self._stale:
+                            await self.reload()
+                            self._stale = False
+                        await self.fire_due()
+                except SQLAlchemyError:
+                    logger.exception("Lecture des échéances impossible")
+                    self._stale = True
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.next_delay())
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            follower.cancel()
+            await asyncio.gather(follower, return_exceptions=True)
+            self.broker.unsubscribe(subscription)
+
+    def start(self) -> None:
+        """Lance le planificateur dans la boucle d'événements courante."""
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Arrête le planificateur."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        """
+        Retourne l'état du planificateur.
+
+        Returns:
+            dict: Échéances suivies, taille du tas, événements publiés et lectures de fenêtres.
+        """
+        return {"pending": len(self.deadlines), "heap": len(self.heap), "emitted": self.emitted, "loads": self.loads}
+
+
+due_scheduler = DueScheduler(AsyncSessionLocal, event_broker)
@@ -0,0 +1,107 @@
+"""
+Recherche plein texte dans le titre et la description des tâches.
+
+Ce module fournit :
+- Le découpage d'une saisie utilisateur en termes sûrs (sans opérateurs ni guillemets),
+- La construction d'une requête classée par pertinence selon le dialecte :
+  MATCH ... AGAINST sur l'index FULLTEXT (MySQL), MATCH et bm25() sur la table
+  FTS5 (SQLite), ou à défaut des LIKE sans classement (autres bases),
+- La pagination par curseur sur le couple (rang, id).
+
+Tous les termes doivent être présents dans le titre ou la description. Le rang
+est normalisé pour que les meilleurs résultats aient le plus petit rang ; le
+score renvoyé au client est son opposé (plus grand = plus pertinent).
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import and_, column, func, literal, or_, table
+from sqlalchemy.dialects.mysql import match
+
+from models import FTS_TABLE, Tache
+from pagination import decode_cursor, encode_cursor
+
+# Nombre maximal de termes pris en compte dans une recherche
+MAX_SEARCH_TERMS = 10
+# Longueur minimale d'un mot indexé par InnoDB (innodb_ft_min_token_size)
+MYSQL_MIN_TOKEN_SIZE = 3
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_fts = table(FTS_TABLE, column("rowid"))
+
+
+def search_terms(q: str) -> List[str]:
+    """
+    Extrait les termes d'une recherche.
+
+    Args:
+        q (str): Saisie de l'utilisateur.
+
+    Returns:
+        list[str]: Mots en minuscules, sans doublon, dans l'ordre de saisie (au plus MAX_SEARCH_TERMS).
+    """
+    terms = []
+    for word in _WORD.findall(q.lower()):
+        if word not in terms:
+            terms.append(word)
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def search_query(query, dialect: str, terms: List[str], cursor: Optional[str] = None):
+    """
+    Ajoute la recherche, le classement et la position du curseur à une requête sur `Tache`.
+
+    Args:
+        query: `select()` SQLAlchemy sur `Tache` (éventuellement déjà filtré).
+        dialect (str): Nom du dialecte ("mysql", "sqlite", ...).
+        terms (list[str]): Termes de recherche (voir `search_terms`).
+        cursor (str | None): Curseur de la page précédente.
+
+    Raises:
+        InvalidCursor: Si le curseur est invalide.
+
+    Returns:
+        tuple: (requête triée par pertinence, expression du rang).
+    """
+    if dialect == "mysql":
+        words = [term for term in terms if len(term) >= MYSQL_MIN_TOKEN_SIZE] or terms
+        against = " ".join(f"+{word}" for word in words)
+        relevance = match(Tache.title, Tache.description, against=against).in_boolean_mode()
+        rank = -relevance
+        query = query.where(relevance > 0)
+    elif dialect == "sqlite":
+        expression = " ".join(f'"{term}"' for term in terms)
+        fts_column = column(FTS_TABLE)
+        rank = func.bm25(fts_column)
+        query = query.join(_fts, _fts.c.rowid == Tache.id).where(fts_column.op("MATCH")(expression))
+    else:
+        rank = literal(0.0)
+        for term in terms:
+            pattern = f"%{term}%"
+            query = query.where(or_(Tache.title.ilike(pattern), Tache.description.ilike(pattern)))
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, "rank", "asc")
+        query = query.where(or_(rank > value, and_(rank == value, Tache.id > last_id)))
+    return query.order_by(rank, Tache.id), rank
+
+
+def next_search_cursor(rows: list, limit: int) -> Optional[str]:
+    """
+    Calcule le curseur de la page suivante d'une recherche.
+
+    La requête doit avoir été exécutée avec `limit + 1` lignes, chacune ayant
+    les attributs `id` et `rank`. La ligne supplémentaire est retirée de `rows`.
+
+    Args:
+        rows (list): Lignes lues (modifiée en place).
+        limit (int): Taille de page demandée.
+
+    Returns:
+        str | None: Curseur de la page suivante, ou None s'il s'agit de la dernière page.
+    """
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    return encode_cursor("rank", "asc", rows[-1].rank, rows[-1].id)
@@ -0,0 +1,51 @@
+"""
+Lecture des réglages partagés par les modules de l'application.
+
+Ce module fournit :
+- La lecture d'un booléen depuis une variable d'environnement,
+- La création d'un client Redis asynchrone pour les backends "redis" (cache de
+  lecture, événements, limitation du débit), le paquet `redis` restant optionnel.
+"""
+
+import os
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """
+    Lit un booléen dans une variable d'environnement.
+
+    Args:
+        name (str): Nom de la variable.
+        default (bool): Valeur si la variable n'est pas définie.
+
+    Returns:
+        bool: True pour "1", "true", "yes" ou "on" (sans tenir compte de la casse).
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in TRUE_VALUES
+
+
+def redis_client(setting: str, url: str):
+    """
+    Crée un client Redis asynchrone (`redis.asyncio`).
+
+    Args:
+        setting (str): Réglage qui demande Redis, cité dans l'erreur, par exemple
+            "TASK_CACHE_BACKEND=redis".
+        url (str): URL du serveur Redis.
+
+    Raises:
+        RuntimeError: Si le paquet `redis` n'est pas installé.
+
+    Returns:
+        redis.asyncio.Redis: Client connecté à la demande.
+    """
+    try:
+        from redis import asyncio as redis_asyncio
+    except ImportError as exc:
+        raise RuntimeError(f"{setting} nécessite le paquet 'redis'") from exc
+    return redis_asyncio.from_url(url)
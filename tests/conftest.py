@@ -0,0 +1,149 @@
+"""
+Fixtures partagées par les tests qui n'ont pas besoin d'une base MySQL existante.
+
+Les routes sont montées sur une application FastAPI dédiée, et la dépendance
+`get_db` est remplacée par une session asynchrone (aiosqlite) liée à une base
+SQLite temporaire, recréée pour chaque test. Les tests préparent leurs données
+avec une session synchrone sur le même fichier.
+
+Budget de requêtes SQL : un test marqué `@pytest.mark.query_budget(n)` (ou toute
+la suite, avec la variable SQL_QUERY_BUDGET) échoue dès qu'une requête HTTP émet
+plus de n requêtes SQL, ce qui fait apparaître les régressions N+1.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Coût bcrypt réduit et pool de hachage minimal pour des tests rapides
+os.environ.setdefault("BCRYPT_ROUNDS", "5")
+os.environ.setdefault("HASH_WORKERS", "1")
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import instrumentation
+from database import Base, get_db, get_session_factory
+from events import EventBroker, get_event_broker
+from instrumentation import Metrics, MetricsMiddleware, instrument_engine
+from response_cache import MemoryBackend, ResponseCache, get_task_cache
+from routes import auth_route, tasks, users
+import models  # noqa: F401  (enregistre les tables dans Base.metadata)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(n): échoue si une requête HTTP émet plus de n requêtes SQL",
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Chemin du fichier SQLite du test."""
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def engine(db_path):
+    """Moteur SQLite synchrone, utilisé pour créer le schéma et préparer les données."""
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_engine(engine, db_path):
+    """
+    Moteur SQLite asynchrone utilisé par les routes.
+
+    NullPool : le TestClient peut exécuter chaque requête dans une boucle
+    d'événements différente, une connexion ne doit donc pas être réutilisée.
+    """
+    return create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Fabrique de sessions liée au moteur de test."""
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def db(session_factory):
+    """Session utilisable directement dans un test pour préparer des données."""
+    session = session_factory()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def async_session_factory(async_engine):
+    """Fabrique de sessions asynchrones liée au moteur de test."""
+    return async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+def task_cache():
+    """Cache des tâches propre au test (les identifiants se répètent d'une base à l'autre)."""
+    return ResponseCache(MemoryBackend())
+
+
+@pytest.fixture
+def event_broker():
+    """Flux des changements propre au test."""
+    return EventBroker()
+
+
+@pytest.fixture
+def query_budget(request):
+    """Nombre maximal de requêtes SQL par requête HTTP (marqueur query_budget, sinon SQL_QUERY_BUDGET)."""
+    marker = request.node.get_closest_marker("query_budget")
+    return marker.args[0] if marker else instrumentation.SQL_QUERY_BUDGET
+
+
+@pytest.fixture
+def app(async_session_factory, async_engine, task_cache, event_broker, query_budget):
+    """Application FastAPI de test montant les routes de l'API."""
+    app = FastAPI()
+    app.include_router(auth_route.router, prefix="/auth")
+    app.include_router(tasks.router, prefix="/tasks")
+    app.include_router(users.router, prefix="/users")
+    if query_budget:
+        registry = Metrics()
+        instrument_engine(async_engine.sync_engine, registry)
+        app.add_middleware(MetricsMiddleware, registry=registry, query_budget=query_budget)
+
+    async def override_get_db():
+        async with async_session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_session_factory] = lambda: async_session_factory
+    app.dependency_overrides[get_task_cache] = lambda: task_cache
+    app.dependency_overrides[get_event_broker] = lambda: event_broker
+    return app
+
+
+@pytest.fixture
+def client(app):
+    """Client HTTP de test."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def user(db):
+    """Utilisateur propriétaire des tâches créées dans les tests."""
+    user = models.User(username="alice", email="alice@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
@@ -0,0 +1,44 @@
+"""
+Tests des routes CRUD et d'authentification sur la pile asynchrone (AsyncSession + aiosqlite).
+
+Contrairement à `test_tasks.py` et `test_users.py`, ce module n'a pas besoin
+d'une base MySQL existante : il s'appuie sur les fixtures de `conftest.py`.
+"""
+
+
+def test_task_crud_cycle(client, user):
+    """Création, lecture, mise à jour puis suppression d'une tâche."""
+    created = client.post("/tasks/", json={"title": "Réviser FastAPI", "owner_id": user.id})
+    assert created.status_code == 200
+    task = created.json()
+    assert task["id"] and task["created_at"] and task["status"] == "todo"
+
+    fetched = client.get(f"/tasks/{task['id']}")
+    assert fetched.json() == task
+
+    updated = client.put(f"/tasks/{task['id']}", json={
+        "title": "Nouveau titre",
+        "status": "in_progress",
+        "owner_id": user.id,
+    })
+    assert updated.status_code == 200
+    assert updated.json()["title"] == "Nouveau titre"
+    assert updated.json()["status"] == "in_progress"
+
+    deleted = client.delete(f"/tasks/{task['id']}")
+    assert deleted.json() == {"message": "Tâche supprimée"}
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+
+
+def test_register_then_login(client):
+    """Inscription puis connexion, et refus d'un mauvais mot de passe."""
+    credentials = {"username": "bob", "email": "bob@example.com", "password": "secret123"}
+    assert client.post("/auth/register", json=credentials).status_code == 201
+    assert client.post("/auth/register", json=credentials).status_code == 400
+
+    response = client.post("/auth/login", json={"username": "bob", "password": "secret123"})
+    assert response.status_code == 200
+    assert response.json()["token_type"] == "bearer"
+
+    response = client.post("/auth/login", json={"username": "bob", "password": "mauvais"})
+    assert response.status_code == 401
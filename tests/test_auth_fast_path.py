@@ -0,0 +1,100 @@
+"""
+Tests du chemin d'authentification rapide.
+
+Ce module vérifie :
+- Qu'en mode AUTH_STATELESS, /auth/me ne déclenche aucune requête SQL,
+- Le repli sur la base pour les tokens émis sans les claims d'identité,
+- Le cache des utilisateurs et son invalidation lors d'une modification.
+"""
+
+import pytest
+from fastapi import Depends
+from sqlalchemy import event
+
+import auth
+from models import User
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    auth.user_cache.clear()
+    yield
+    auth.user_cache.clear()
+
+
+@pytest.fixture
+def statements(async_engine):
+    """Liste des requêtes SQL exécutées par les routes pendant le test."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def register(client, username="erin"):
+    response = client.post("/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": "secret123",
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def test_stateless_mode_skips_database(client, statements, monkeypatch):
+    """Le token porte uid et active : aucune requête SQL pour identifier l'utilisateur."""
+    monkeypatch.setattr(auth, "AUTH_STATELESS", True)
+    headers = register(client)
+    statements.clear()
+
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "erin"
+    assert response.json()["is_active"] is True
+    assert statements == []
+
+
+def test_stateless_mode_falls_back_for_legacy_tokens(client, db, statements, monkeypatch):
+    """Un token sans claims d'identité est résolu en base."""
+    monkeypatch.setattr(auth, "AUTH_STATELESS", True)
+    register(client)
+    legacy = auth.create_access_token(data={"sub": "erin"})
+    statements.clear()
+
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {legacy}"})
+    assert response.status_code == 200
+    assert len(statements) == 1
+
+
+def test_user_cache_and_invalidation(client, db, statements):
+    """Le deuxième appel est servi par le cache ; une modification de l'utilisateur l'invalide."""
+    headers = register(client)
+    statements.clear()
+
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert len(statements) == 1
+    assert auth.user_cache.stats()["hits"] == 1
+
+    user = db.query(User).filter(User.username == "erin").one()
+    user.is_active = False
+    db.commit()
+
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Utilisateur inactif"
+
+
+def test_get_current_user_returns_attached_user(app, client):
+    """get_current_user renvoie un User rattaché à la session, même depuis le cache."""
+    headers = register(client)
+
+    @app.get("/whoami")
+    async def whoami(user: User = Depends(auth.get_current_user)):
+        return {"id": user.id, "email": user.email}
+
+    first = client.get("/whoami", headers=headers).json()
+    second = client.get("/whoami", headers=headers).json()
+    assert first == second
+    assert first["email"] == "erin@example.com"
@@ -0,0 +1,93 @@
+"""
+Tests des routes groupées POST/PATCH/DELETE /tasks/bulk.
+
+Ce module vérifie :
+- La création groupée, avec un résultat par élément dans l'ordre de la requête,
+- Le même résultat lorsque le dialecte ne renvoie pas les id d'un INSERT multi-lignes,
+- La mise à jour partielle groupée et le signalement des tâches inexistantes,
+- Le refus (422) d'une mise à jour groupée qui met à null un champ obligatoire
+  ou qui modifie plusieurs fois la même tâche,
+- La suppression groupée,
+- Le refus des requêtes trop volumineuses.
+"""
+
+import pytest
+
+from models import Tache
+from routes import tasks as tasks_route
+
+
+def payload(user, count):
+    return [{"title": f"Import {i}", "owner_id": user.id} for i in range(count)]
+
+
+def test_bulk_create_in_chunks(client, db, user, monkeypatch):
+    """Les tâches sont créées par lots, les id renvoyés correspondent aux lignes insérées."""
+    monkeypatch.setattr(tasks_route, "BULK_CHUNK_SIZE", 7)
+    response = client.post("/tasks/bulk", json=payload(user, 20))
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == list(range(20))
+    assert {r["status"] for r in results} == {"created"}
+
+    titles = {t.id: t.title for t in db.query(Tache)}
+    assert [titles[r["id"]] for r in results] == [f"Import {i}" for i in range(20)]
+
+
+def test_bulk_create_without_returning(client, db, user, monkeypatch):
+    """Sans RETURNING pour les INSERT multi-lignes (MySQL), les id sont obtenus via l'ORM."""
+    monkeypatch.setattr(tasks_route, "_supports_bulk_returning", lambda db: False)
+    results = client.post("/tasks/bulk", json=payload(user, 5)).json()["results"]
+    titles = {t.id: t.title for t in db.query(Tache)}
+    assert [titles[r["id"]] for r in results] == [f"Import {i}" for i in range(5)]
+
+
+def test_bulk_update_and_delete(client, db, user):
+    """Mise à jour partielle puis suppression groupées, avec les id inconnus signalés."""
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=payload(user, 4)).json()["results"]]
+
+    response = client.patch("/tasks/bulk", json=[
+        {"id": ids[0], "status": "done"},
+        {"id": ids[1], "title": "Renommée", "status": "in_progress"},
+        {"id": 999_999, "status": "done"},
+    ])
+    assert [r["status"] for r in response.json()["results"]] == ["updated", "updated", "not_found"]
+    rows = {t.id: t for t in db.query(Tache)}
+    assert rows[ids[0]].status == "done" and rows[ids[0]].title == "Import 0"
+    assert rows[ids[1]].title == "Renommée" and rows[ids[1]].status == "in_progress"
+
+    response = client.request("DELETE", "/tasks/bulk", json={"ids": [ids[2], 999_999, ids[3]]})
+    assert [r["status"] for r in response.json()["results"]] == ["deleted", "not_found", "deleted"]
+    db.expire_all()
+    assert {t.id for t in db.query(Tache)} == {ids[0], ids[1]}
+
+
+@pytest.mark.parametrize("field", ["title", "owner_id"])
+def test_bulk_update_rejects_null_required_fields(client, db, user, field):
+    """Un champ obligatoire mis à null est refusé avec 422, comme pour PATCH /tasks/{id}, sans rien modifier."""
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=payload(user, 2)).json()["results"]]
+    response = client.patch("/tasks/bulk", json=[{"id": ids[0], "status": "done"}, {"id": ids[1], field: None}])
+    assert response.status_code == 422
+    assert "Élément 1" in response.json()["detail"]
+    db.expire_all()
+    assert {t.status for t in db.query(Tache)} == {"todo"}
+    assert {(t.title, t.owner_id) for t in db.query(Tache)} == {("Import 0", user.id), ("Import 1", user.id)}
+
+
+def test_bulk_update_rejects_duplicate_ids(client, db, user):
+    """Une tâche présente dans deux éléments est refusée avec 422, sans rien modifier."""
+    task_id = client.post("/tasks/bulk", json=payload(user, 1)).json()["results"][0]["id"]
+    response = client.patch("/tasks/bulk", json=[
+        {"id": task_id, "status": "done", "title": "Premier"},
+        {"id": task_id, "status": "in_progress"},
+    ])
+    assert response.status_code == 422
+    assert "Élément 1" in response.json()["detail"]
+    db.expire_all()
+    assert [(t.title, t.status) for t in db.query(Tache)] == [("Import 0", "todo")]
+
+
+def test_bulk_size_limit(client, user, monkeypatch):
+    """Au-delà de MAX_BULK_ITEMS éléments, la requête est refusée avec 413."""
+    monkeypatch.setattr(tasks_route, "MAX_BULK_ITEMS", 3)
+    assert client.post("/tasks/bulk", json=payload(user, 4)).status_code == 413
@@ -0,0 +1,227 @@
+"""
+Tests de la compression des réponses et de la représentation MessagePack.
+
+Ce module vérifie :
+- La négociation d'Accept-Encoding (valeurs q, refus explicite, préférence du serveur),
+- Que le middleware compresse au-delà du seuil, laisse passer les petites réponses,
+  les types non compressibles et les flux SSE, et compresse un flux morceau par morceau,
+- Les listes de tâches et l'export en MessagePack : même forme que le JSON, ETag
+  propre à la variante, réponse 304 et négociation par l'en-tête Accept.
+"""
+
+import asyncio
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+
+import msgpack
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+
+from compression import CompressionMiddleware, ENCODERS, negotiate_encoding
+from models import Tache
+from msgpack_codec import prefers_msgpack
+from routes import tasks as tasks_route
+
+LARGE = "tâche " * 500
+
+
+def test_negotiate_encoding():
+    available = ["zstd", "br", "gzip"]
+    assert negotiate_encoding(None, available) is None
+    assert negotiate_encoding("identity", available) is None
+    assert negotiate_encoding("gzip, deflate", available) == "gzip"
+    # À valeur q égale, l'ordre du serveur l'emporte
+    assert negotiate_encoding("gzip, br, zstd", available) == "zstd"
+    assert negotiate_encoding("br;q=0.9, gzip", available) == "gzip"
+    assert negotiate_encoding("*;q=0.5, zstd;q=0", available) == "br"
+    assert negotiate_encoding("gzip;q=0", available) is None
+    assert negotiate_encoding("gzip;q=x", available) is None
+
+
+def test_prefers_msgpack():
+    assert not prefers_msgpack(None)
+    assert not prefers_msgpack("*/*")
+    assert not prefers_msgpack("application/json")
+    assert prefers_msgpack("application/msgpack")
+    assert prefers_msgpack("application/x-msgpack, application/json")
+    assert not prefers_msgpack("application/msgpack;q=0.5, application/json")
+    assert not prefers_msgpack("application/msgpack;q=0")
+
+
+@pytest.fixture
+def raw_app():
+    app = FastAPI()
+
+    @app.get("/large")
+    async def large():
+        return Response(json.dumps({"text": LARGE}), media_type="application/json", headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/binary")
+    async def binary():
+        return Response(b"\x00" * 4096, media_type="image/png")
+
+    @app.get("/events")
+    async def events():
+        return PlainTextResponse("data: " + LARGE, media_type="text/event-stream")
+
+    app.add_middleware(CompressionMiddleware, min_size=1024)
+    return TestClient(app)
+
+
+def raw_get(client, path, encoding):
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_large_response_is_compressed_with_a_weak_etag(raw_app):
+    response, body = raw_get(raw_app, "/large", "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.headers["ETag"] == 'W/"v1"'
+    assert int(response.headers["Content-Length"]) == len(body) < len(LARGE)
+    assert json.loads(gzip.decompress(body)) == {"text": LARGE}
+
+
+def test_small_and_incompressible_responses_are_left_as_is(raw_app):
+    response, body = raw_get(raw_app, "/small", "gzip")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(body) == {"ok": True}
+    for path in ("/binary", "/events"):
+        response, _ = raw_get(raw_app, path, "gzip")
+        assert "Content-Encoding" not in response.headers
+        assert "Vary" not in response.headers
+    response, _ = raw_get(raw_app, "/large", "identity")
+    assert "Content-Encoding" not in response.headers
+
+
+def test_stream_is_compressed_chunk_by_chunk():
+    async def streaming_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i in range(3):
+            await send({"type": "http.response.body", "body": f"{i}:{LARGE}\n".encode(), "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(streaming_app)(scope, None, send))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Chaque morceau envoyé se décode seul : rien n'est retenu jusqu'à la fin du flux
+    chunks = [decoder.decompress(message["body"]) for message in sent[1:]]
+    assert chunks[:3] == [f"{i}:{LARGE}\n".encode() for i in range(3)]
+    assert decoder.eof and sent[-1].get("more_body", False) is False
+
+
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings(raw_app, encoding, module):
+    library = pytest.importorskip(module)
+    assert encoding in ENCODERS
+    response, body = raw_get(raw_app, "/large", encoding)
+    assert response.headers["Content-Encoding"] == encoding
+    if module == "zstandard":
+        body = library.ZstdDecompressor().decompressobj().decompress(body)
+    else:
+        body = library.decompress(body)
+    assert json.loads(body) == {"text": LARGE}
+
+
+def seed(db, user, count):
+    db.add_all(Tache(title=f"Tâche {i}", description=LARGE, owner_id=user.id) for i in range(count))
+    db.commit()
+
+
+def test_task_list_in_msgpack(app, client, db, user):
+    seed(db, user, 3)
+    as_json = client.get("/tasks/")
+    response = client.get("/tasks/", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == as_json.json()
+    assert response.headers["Vary"] == as_json.headers["Vary"] == "Accept"
+
+    etag = response.headers["ETag"]
+    assert etag != as_json.headers["ETag"]
+    # Le cache sert la page JSON convertie ; les deux variantes restent validables
+    cached = client.get("/tasks/", headers={"Accept": "application/msgpack", "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert client.get("/tasks/", headers={"If-None-Match": etag}).status_code == 200
+    assert client.get(f"/users/{user.id}/tasks", headers={"Accept": "application/msgpack"}).content == response.content
+
+
+def test_msgpack_probe_without_cached_page(app, client, db, user, task_cache):
+    seed(db, user, 2)
+    etag = client.get("/tasks/", headers={"Accept": "application/msgpack"}).headers["ETag"]
+    # Page absente du cache : l'ETag est vérifié sur les seuls couples (id, version)
+    asyncio.run(task_cache.invalidate())
+    response = client.get("/tasks/", headers={"Accept": "application/msgpack", "If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_due_list_in_msgpack(client, db, user):
+    db.add(Tache(title="en retard", due_date=datetime.utcnow() - timedelta(days=1), owner_id=user.id))
+    db.commit()
+    as_json = client.get("/tasks/overdue").json()
+    response = client.get("/tasks/overdue", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == as_json
+
+
+def test_export_in_msgpack(client, db, user, monkeypatch):
+    monkeypatch.setattr(tasks_route, "EXPORT_BATCH_SIZE", 2)
+    seed(db, user, 5)
+    ndjson = [json.loads(line) for line in client.get("/tasks/export").text.splitlines()]
+    for request in ({"params": {"format": "msgpack"}}, {"headers": {"Accept": "application/msgpack"}}):
+        response = client.get("/tasks/export", **request)
+        assert response.headers["content-type"] == "application/msgpack"
+        assert list(msgpack.Unpacker(io.BytesIO(response.content))) == ndjson
+    # Un format explicite l'emporte sur l'en-tête Accept
+    response = client.get("/tasks/export", params={"format": "ndjson"}, headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+
+def test_compressed_task_list_through_the_app(app, db, user):
+    seed(db, user, 5)
+    app.add_middleware(CompressionMiddleware)
+    client = TestClient(app)
+    plain = client.get("/tasks/", headers={"Accept-Encoding": "identity"})
+    response = client.get("/tasks/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json() == plain.json()
+    assert response.headers["Vary"] == "Accept, Accept-Encoding"
+    # L'ETag faible de la réponse compressée valide toujours la page
+    revalidated = client.get("/tasks/", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.parametrize("method", ["PATCH", "PUT"])
+def test_weak_etag_of_a_compressed_task_is_accepted_by_if_match(app, db, user, method):
+    seed(db, user, 1)
+    app.add_middleware(CompressionMiddleware)
+    client = TestClient(app)
+    response = client.get("/tasks/1", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    etag = response.headers["ETag"]
+    assert etag == 'W/"1-1"'
+
+    body = {"title": "Modifiée"} if method == "PATCH" else {"title": "Modifiée", "owner_id": user.id}
+    updated = client.request(method, "/tasks/1", json=body, headers={"If-Match": etag})
+    assert updated.status_code == 200
+    # L'ancienne version reste refusée
+    stale = client.request(method, "/tasks/1", json=body, headers={"If-Match": etag})
+    assert stale.status_code == 412
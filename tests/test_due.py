@@ -0,0 +1,200 @@
+"""
+Tests des échéances : listes des tâches en retard et à venir, planificateur.
+
+Ce module vérifie :
+- GET /tasks/overdue et GET /tasks/upcoming : bornes, statuts ouverts, propriétaire,
+  pagination par curseur sur (due_date, id) et validation de la fenêtre,
+- Via EXPLAIN QUERY PLAN, que la lecture d'un statut parcourt l'index (status, due_date) sans tri,
+- Que le planificateur publie un événement "due" par échéance atteinte, charge les
+  échéances par fenêtres et suit les écritures publiées sur le flux sans relire la table.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import models
+from events import EventBroker, task_event
+from scheduler import DueScheduler, due_query
+from tests.test_indexes import query_plan
+
+
+@pytest.fixture
+def now():
+    return datetime.utcnow()
+
+
+def add_tasks(db, owner_id, *specs):
+    """Ajoute des tâches (titre, échéance, statut) et retourne leurs identifiants."""
+    tasks = [models.Tache(title=title, due_date=due, status=status, owner_id=owner_id) for title, due, status in specs]
+    db.add_all(tasks)
+    db.commit()
+    return [task.id for task in tasks]
+
+
+def titles(response):
+    return [task["title"] for task in response.json()]
+
+
+def test_overdue_lists_open_tasks_past_their_due_date(client, db, user, now):
+    add_tasks(
+        db, user.id,
+        ("ancienne", now - timedelta(days=3), "todo"),
+        ("récente", now - timedelta(hours=1), "in_progress"),
+        ("terminée", now - timedelta(days=2), "done"),
+        ("à venir", now + timedelta(hours=1), "todo"),
+        ("sans échéance", None, "todo"),
+    )
+    response = client.get("/tasks/overdue")
+    assert response.status_code == 200
+    assert titles(response) == ["ancienne", "récente"]
+    assert "X-Next-Cursor" not in response.headers
+    assert titles(client.get("/tasks/overdue", params={"status": "done"})) == ["terminée"]
+    assert titles(client.get("/tasks/overdue", params={"owner_id": user.id + 1})) == []
+
+
+def test_upcoming_respects_the_window(client, db, user, now):
+    add_tasks(
+        db, user.id,
+        ("dans 2 h", now + timedelta(hours=2), "todo"),
+        ("dans 1 h", now + timedelta(hours=1), "in_progress"),
+        ("dans 3 jours", now + timedelta(days=3), "todo"),
+        ("en retard", now - timedelta(hours=1), "todo"),
+    )
+    assert titles(client.get("/tasks/upcoming")) == ["dans 1 h", "dans 2 h"]
+    assert titles(client.get("/tasks/upcoming", params={"within": "PT90M"})) == ["dans 1 h"]
+    assert titles(client.get("/tasks/upcoming", params={"within": "P7D"})) == ["dans 1 h", "dans 2 h", "dans 3 jours"]
+    assert client.get("/tasks/upcoming", params={"within": "PT0S"}).status_code == 400
+    assert client.get("/tasks/upcoming", params={"within": "P400D"}).status_code == 400
+    assert client.get("/tasks/upcoming", params={"within": "demain"}).status_code == 422
+
+
+def test_due_lists_paginate_across_statuses(client, db, user, now):
+    due = now + timedelta(hours=1)
+    # Même échéance pour plusieurs tâches : l'id départage les tâches entre deux pages
+    add_tasks(db, user.id, *((f"T{i}", due + timedelta(minutes=i // 2), ("todo", "in_progress")[i % 2]) for i in range(7)))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/tasks/upcoming", params=params)
+        seen.extend(titles(response))
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == [f"T{i}" for i in range(7)]
+    assert client.get("/tasks/upcoming", params={"cursor": "invalide"}).status_code == 400
+    assert client.get("/tasks/overdue", params={"status": [f"s{i}" for i in range(11)]}).status_code == 400
+
+
+def test_status_due_query_uses_index_without_sort(engine, now):
+    statement = due_query("todo", (models.Tache.id,), (now, 5), now + timedelta(days=1)).limit(51)
+    plan = query_plan(engine, statement)
+    assert "ix_taches_status_due" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(async_session_factory, broker, clock, **options):
+    return DueScheduler(async_session_factory, broker, clock=clock, **options)
+
+
+def due_events(broker):
+    return [(event["task_id"], event["owner_id"]) for event in map(json.loads, (e.data for e in broker.history))
+            if event["type"] == "due"]
+
+
+def test_scheduler_emits_due_events_in_windows(async_session_factory, db, user, now):
+    ids = add_tasks(db, user.id, *((f"T{i}", now + timedelta(minutes=i + 1), "todo") for i in range(5)))
+    add_tasks(db, user.id, ("terminée", now + timedelta(minutes=1), "done"), ("passée", now - timedelta(minutes=1), "todo"))
+    clock = Clock(now)
+    broker = EventBroker()
+    scheduler = make_scheduler(async_session_factory, broker, clock, window=2)
+
+    async def scenario():
+        await scheduler.reload()
+        loaded = sorted(scheduler.deadlines)
+        clock.now = now + timedelta(minutes=3, seconds=30)
+        fired = await scheduler.fire_due()
+        after_first = due_events(broker)
+        clock.now = now + timedelta(hours=1)
+        await scheduler.fire_due()
+        return loaded, fired, after_first
+
+    loaded, fired, after_first = asyncio.run(scenario())
+    assert loaded == ids[:2]
+    assert fired == 3
+    assert after_first == [(task_id, user.id) for task_id in ids[:3]]
+    assert due_events(broker) == [(task_id, user.id) for task_id in ids]
+    assert scheduler.stats() == {"pending": 0, "heap": 0, "emitted": 5, "loads": 3}
+
+
+def test_scheduler_follows_writes_without_reading_the_table(async_session_factory, db, user, now):
+    (moved, closed, kept) = add_tasks(db, user.id, *((f"T{i}", now + timedelta(minutes=10), "todo") for i in range(3)))
+    clock = Clock(now)
+    broker = EventBroker()
+    scheduler = make_scheduler(async_session_factory, broker, clock)
+
+    def task(due, status="todo"):
+        return {"due_date": due.isoformat(), "status": status}
+
+    async def scenario():
+        await scheduler.reload()
+        loads = scheduler.loads
+        await scheduler.apply([
+            task_event("updated", moved, user.id, task=task(now + timedelta(minutes=1))),
+            task_event("updated", closed, user.id, task=task(now + timedelta(minutes=2), status="done")),
+            task_event("created", 99, user.id, task=task(now + timedelta(minutes=5))),
+            task_event("deleted", 99, user.id),
+        ])
+        clock.now = now + timedelta(minutes=3)
+        await scheduler.fire_due()
+        return loads
+
+    loads = asyncio.run(scenario())
+    assert due_events(broker) == [(moved, user.id)]
+    assert scheduler.loads == loads
+    assert list(scheduler.deadlines) == [kept]
+
+
+def test_bulk_writes_refresh_only_their_tasks(async_session_factory, db, user, now):
+    (task_id,) = add_tasks(db, user.id, ("T", now + timedelta(minutes=10), "todo"))
+    scheduler = make_scheduler(async_session_factory, EventBroker(), Clock(now))
+
+    async def scenario():
+        await scheduler.reload()
+        task = db.get(models.Tache, task_id)
+        task.status = "done"
+        db.commit()
+        await scheduler.apply([task_event("updated", task_id, user.id)])
+
+    asyncio.run(scenario())
+    assert scheduler.deadlines == {}
+
+
+def test_running_scheduler_publishes_due_events(async_session_factory, event_broker, user):
+    scheduler = DueScheduler(async_session_factory, event_broker, max_sleep=5)
+
+    async def scenario():
+        subscription = event_broker.subscribe()
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        due = datetime.utcnow() + timedelta(milliseconds=200)
+        created = task_event("created", 1, user.id, task={"due_date": due.isoformat(), "status": "todo"})
+        await event_broker.publish(created)
+        events = [await asyncio.wait_for(subscription.get(), 2) for _ in range(2)]
+        await scheduler.stop()
+        return events
+
+    events = asyncio.run(scenario())
+    assert [event.type for event in events] == ["created", "due"]
+    assert json.loads(events[1].data)["task_id"] == 1
@@ -0,0 +1,104 @@
+"""
+Tests du chargement des relations User.tasks / Tache.owner.
+
+Ce module vérifie :
+- Que `?include=owner` charge les propriétaires en un nombre fixe de requêtes SQL,
+- Que GET /users/{id}/tasks pagine les tâches d'un utilisateur,
+- Qu'un accès implicite à une relation non chargée lève une erreur au lieu d'émettre une requête,
+- Que le budget de requêtes SQL fait échouer une requête qui le dépasse.
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+import models
+from instrumentation import QueryBudgetExceeded
+
+
+@pytest.fixture
+def statements(async_engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def owners(db):
+    """Trois utilisateurs de quatre tâches chacun, dans un ordre d'id entrelacé."""
+    users = [models.User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(3)]
+    db.add_all(users)
+    db.flush()
+    db.add_all(models.Tache(title=f"Tâche {n}", owner_id=users[n % 3].id) for n in range(12))
+    db.commit()
+    return users
+
+
+@pytest.mark.query_budget(2)
+def test_include_owner_loads_owners_in_one_extra_query(client, owners, statements):
+    response = client.get("/tasks/", params={"include": "owner", "limit": 50})
+    assert response.status_code == 200
+    tasks = response.json()
+    assert len(tasks) == 12
+    names = {user.id: user.username for user in owners}
+    for task in tasks:
+        assert task["owner"] == {"id": task["owner_id"], "username": names[task["owner_id"]], "is_active": True}
+    assert len(statements) == 2
+
+
+def test_owner_is_omitted_by_default(client, owners):
+    tasks = client.get("/tasks/").json()
+    assert tasks and all("owner" not in task for task in tasks)
+    task = client.get(f"/tasks/{tasks[0]['id']}").json()
+    assert "owner" not in task
+
+
+@pytest.mark.query_budget(2)
+def test_include_owner_is_paginated(client, owners):
+    first = client.get("/tasks/", params={"include": "owner", "limit": 5})
+    assert len(first.json()) == 5
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/tasks/", params={"include": "owner", "limit": 5, "cursor": cursor})
+    assert [task["id"] for task in second.json()] == [task["id"] + 5 for task in first.json()]
+    assert all(task["owner"] for task in second.json())
+
+
+@pytest.mark.query_budget(1)
+def test_include_owner_on_single_task(client, owners):
+    task_id = client.get("/tasks/", params={"limit": 1}).json()[0]["id"]
+    task = client.get(f"/tasks/{task_id}", params={"include": "owner"}).json()
+    assert task["owner"]["username"] == "user0"
+    assert client.get("/tasks/9999", params={"include": "owner"}).status_code == 404
+
+
+@pytest.mark.query_budget(2)
+def test_user_tasks(client, owners):
+    user = owners[1]
+    tasks = client.get(f"/users/{user.id}/tasks").json()
+    assert len(tasks) == 4
+    assert {task["owner_id"] for task in tasks} == {user.id}
+    assert client.get("/users/9999/tasks").status_code == 404
+
+
+def test_lazy_loading_is_refused(db, owners):
+    user_id = owners[0].id
+    # Session vide : le propriétaire ne peut pas venir de la carte d'identité
+    db.expunge_all()
+    task = db.query(models.Tache).first()
+    with pytest.raises(InvalidRequestError):
+        task.owner
+    user = db.get(models.User, user_id)
+    with pytest.raises(InvalidRequestError):
+        user.tasks
+
+
+@pytest.mark.query_budget(1)
+def test_query_budget_fails_requests_over_budget(client, owners):
+    # Existence de l'utilisateur puis page de tâches : deux requêtes
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(f"/users/{owners[0].id}/tasks")
@@ -0,0 +1,240 @@
+"""
+Tests du flux des changements de tâches.
+
+Ce module vérifie :
+- Que les routes d'écriture publient un événement par tâche créée, modifiée ou supprimée,
+- Le filtrage par propriétaire, y compris lorsqu'une tâche change de propriétaire,
+- La reprise après le dernier événement reçu, et l'événement "reset" lorsque
+  l'historique ne suffit plus,
+- La déconnexion d'un abonné trop lent,
+- Le format Server-Sent Events et la distribution entre workers via le backend Redis,
+- Le réabonnement après une coupure de la connexion Redis, signalé aux abonnés par un "reset".
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import models
+from events import EventBroker, RedisBackend, task_event
+from routes.tasks import TaskResponse, _sse_stream
+
+
+@pytest.fixture
+def owners(db):
+    users = [models.User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="x") for i in range(2)]
+    db.add_all(users)
+    db.commit()
+    return [user.id for user in users]
+
+
+def test_writes_publish_events(app, user):
+    with TestClient(app) as client, client.websocket_connect("/tasks/ws") as ws:
+        task_id = client.post("/tasks/", json={"title": "Tâche", "owner_id": user.id}).json()["id"]
+        created = ws.receive_json()
+        client.patch(f"/tasks/{task_id}", json={"status": "done"})
+        updated = ws.receive_json()
+        client.delete(f"/tasks/{task_id}")
+        deleted = ws.receive_json()
+
+    assert [created["id"], updated["id"], deleted["id"]] == [1, 2, 3]
+    assert created["type"] == "created" and created["task"]["title"] == "Tâche"
+    assert tuple(created["task"]) == tuple(TaskResponse.model_fields)
+    assert updated["type"] == "updated" and updated["task"]["status"] == "done"
+    assert updated["task"]["version"] == 2
+    assert deleted == {
+        "id": 3, "type": "deleted", "task_id": task_id, "owner_id": user.id, "previous_owner_id": None, "task": None,
+    }
+
+
+def test_bulk_writes_publish_one_event_per_task(app, event_broker, user):
+    client = TestClient(app)
+    tasks = [{"title": f"Tâche {i}", "owner_id": user.id} for i in range(3)]
+    ids = [item["id"] for item in client.post("/tasks/bulk", json=tasks).json()["results"]]
+    client.patch("/tasks/bulk", json=[{"id": ids[0], "status": "done"}, {"id": 999, "status": "done"}])
+    client.request("DELETE", "/tasks/bulk", json={"ids": ids[1:]})
+
+    history = [json.loads(event.data) for event in event_broker.history]
+    assert [(event["type"], event["task_id"]) for event in history] == [
+        ("created", ids[0]), ("created", ids[1]), ("created", ids[2]),
+        ("updated", ids[0]), ("deleted", ids[1]), ("deleted", ids[2]),
+    ]
+    assert [event["id"] for event in history] == [1, 2, 3, 4, 5, 6]
+
+
+def test_owner_filter_follows_owner_changes(app, owners):
+    alice, bob = owners
+    with TestClient(app) as client, client.websocket_connect(f"/tasks/ws?owner_id={bob}") as ws:
+        task_id = client.post("/tasks/", json={"title": "À Alice", "owner_id": alice}).json()["id"]
+        client.patch(f"/tasks/{task_id}", json={"owner_id": bob})
+        received_by_bob = ws.receive_json()
+        client.patch(f"/tasks/{task_id}", json={"owner_id": alice})
+        taken_from_bob = ws.receive_json()
+        client.patch(f"/tasks/{task_id}", json={"status": "done"})
+        client.post("/tasks/", json={"title": "À Bob", "owner_id": bob})
+        last = ws.receive_json()
+
+    assert (received_by_bob["owner_id"], received_by_bob["previous_owner_id"]) == (bob, alice)
+    assert (taken_from_bob["owner_id"], taken_from_bob["previous_owner_id"]) == (alice, bob)
+    # La modification suivante ne concerne plus que Alice
+    assert last["type"] == "created" and last["task"]["title"] == "À Bob"
+
+
+def test_resume_after_last_event_id(app, user):
+    with TestClient(app) as client:
+        for i in range(4):
+            client.post("/tasks/", json={"title": f"Tâche {i}", "owner_id": user.id})
+        with client.websocket_connect("/tasks/ws?last_event_id=2") as ws:
+            replayed = [ws.receive_json() for _ in range(2)]
+            client.post("/tasks/", json={"title": "Nouvelle", "owner_id": user.id})
+            live = ws.receive_json()
+    assert [event["id"] for event in replayed] == [3, 4]
+    assert live["id"] == 5
+
+
+def test_reset_when_history_is_too_short():
+    async def scenario():
+        broker = EventBroker(history_size=2)
+        await broker.publish(*(task_event("created", task_id, 1) for task_id in range(4)))
+        gap = broker.subscribe(last_event_id=1)
+        unknown = broker.subscribe(last_event_id=50)
+        replay = broker.subscribe(last_event_id=2)
+        return await gap.get(), await unknown.get(), await replay.get()
+
+    gap, unknown, replay = asyncio.run(scenario())
+    assert (gap.type, gap.id) == ("reset", 4)
+    assert (unknown.type, unknown.id) == ("reset", 4)
+    assert (replay.type, replay.id) == ("created", 3)
+
+
+def test_slow_consumer_is_dropped():
+    async def scenario():
+        broker = EventBroker(queue_size=2)
+        slow = broker.subscribe()
+        other_owner = broker.subscribe(owner_id=2)
+        await broker.publish(*(task_event("created", task_id, 1) for task_id in range(3)))
+        await broker.publish(task_event("created", 9, 2))
+        return broker, slow, other_owner
+
+    broker, slow, other_owner = asyncio.run(scenario())
+    assert slow.dropped and slow.queue.get_nowait() is None
+    assert slow not in broker.subscribers
+    assert other_owner.queue.get_nowait().owner_id == 2
+    assert broker.stats()["dropped"] == 1
+    assert broker.stats()["subscribers"] == 1
+
+
+def test_sse_stream_format_and_heartbeat():
+    async def scenario():
+        broker = EventBroker()
+        await broker.publish(task_event("created", 7, 1, task={"title": "é"}))
+        stream = _sse_stream(broker, None, 0, heartbeat=0.01)
+        messages = [await stream.__anext__() for _ in range(3)]
+        subscribed = len(broker.subscribers)
+        await stream.aclose()
+        return messages, subscribed, len(broker.subscribers)
+
+    messages, subscribed, remaining = asyncio.run(scenario())
+    assert messages[0] == "retry: 3000\n\n"
+    lines = messages[1].splitlines()
+    assert lines[:2] == ["id: 1", "event: created"]
+    assert json.loads(lines[2].removeprefix("data: "))["task"] == {"title": "é"}
+    assert messages[1].endswith("\n\n")
+    assert messages[2] == ": ping\n\n"
+    assert (subscribed, remaining) == (1, 0)
+
+
+class FakeRedis:
+    """Serveur Redis minimal en mémoire : INCRBY et pub/sub."""
+
+    def __init__(self):
+        self.counters = {}
+        self.subscribers = []
+
+    def drop_connections(self):
+        """Coupe les abonnements en cours : leur lecture lève ConnectionError."""
+        for queue in self.subscribers:
+            queue.put_nowait(ConnectionError("connexion perdue"))
+        self.subscribers.clear()
+
+    async def incrby(self, key, amount):
+        self.counters[key] = self.counters.get(key, 0) + amount
+        return self.counters[key]
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers:
+            queue.put_nowait({"type": "message", "channel": channel, "data": message.encode()})
+
+    def pubsub(self):
+        server = self
+
+        class PubSub:
+            def __init__(self):
+                self.queue = asyncio.Queue()
+
+            async def subscribe(self, channel):
+                server.subscribers.append(self.queue)
+
+            async def unsubscribe(self, channel):
+                if self.queue not in server.subscribers:
+                    raise ConnectionError("connexion perdue")
+                server.subscribers.remove(self.queue)
+
+            async def listen(self):
+                yield {"type": "subscribe", "data": 1}
+                while True:
+                    message = await self.queue.get()
+                    if isinstance(message, Exception):
+                        raise message
+                    yield message
+
+        return PubSub()
+
+
+def test_redis_backend_delivers_to_every_worker():
+    async def scenario():
+        server = FakeRedis()
+        workers = [EventBroker(RedisBackend(server)) for _ in range(2)]
+        for broker in workers:
+            await broker.start()
+        subscription = workers[1].subscribe(owner_id=1)
+        await workers[0].publish(task_event("created", 1, 1), task_event("created", 2, 2))
+        await workers[1].publish(task_event("deleted", 1, 1))
+        received = [await asyncio.wait_for(subscription.get(), 1) for _ in range(2)]
+        for broker in workers:
+            await broker.stop()
+        return workers, received, server
+
+    workers, received, server = asyncio.run(scenario())
+    assert [(event.id, event.type) for event in received] == [(1, "created"), (3, "deleted")]
+    assert [broker.last_id for broker in workers] == [3, 3]
+    assert server.subscribers == []
+
+
+def test_redis_listener_resubscribes_after_a_connection_drop(caplog):
+    async def scenario():
+        server = FakeRedis()
+        publisher = EventBroker(RedisBackend(server))
+        listener = EventBroker(RedisBackend(server, reconnect_delay=0.01))
+        await listener.start()
+        subscription = listener.subscribe(owner_id=1)
+        await publisher.publish(task_event("created", 1, 1))
+        first = await asyncio.wait_for(subscription.get(), 1)
+
+        server.drop_connections()
+        while not server.subscribers:
+            await asyncio.sleep(0.01)
+        await publisher.publish(task_event("updated", 1, 1))
+        received = [await asyncio.wait_for(subscription.get(), 1) for _ in range(2)]
+        await listener.stop()
+        return first, received, listener, server
+
+    first, received, listener, server = asyncio.run(scenario())
+    assert first.type == "created"
+    # Le "reset" signale les événements éventuellement perdus, puis la réception reprend
+    assert [event.type for event in received] == ["reset", "updated"]
+    assert listener.backend.reconnects == 1
+    assert "Réception interrompue sur le canal tasks:events" in caplog.text
+    assert server.subscribers == []
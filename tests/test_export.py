@@ -0,0 +1,54 @@
+"""
+Tests de l'export en flux GET /tasks/export.
+
+Ce module vérifie :
+- L'export NDJSON complet, lu par lots via le curseur serveur,
+- L'export CSV avec en-tête, y compris pour un résultat vide,
+- L'application des filtres sur le propriétaire et le statut.
+"""
+
+import csv
+import io
+import json
+
+from models import Tache, User
+from routes import tasks as tasks_route
+
+
+def seed(db, user, count):
+    db.add_all(Tache(title=f"Tâche {i}", status="done" if i % 2 else "todo", owner_id=user.id) for i in range(count))
+    db.commit()
+
+
+def test_ndjson_export_streams_all_rows(client, db, user, monkeypatch):
+    """Toutes les lignes sont exportées, dans l'ordre des id, sur plusieurs lots."""
+    monkeypatch.setattr(tasks_route, "EXPORT_BATCH_SIZE", 4)
+    seed(db, user, 10)
+    response = client.get("/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["title"] for line in lines] == [f"Tâche {i}" for i in range(10)]
+    assert set(lines[0]) == set(tasks_route.EXPORT_COLUMNS)
+
+
+def test_csv_export_with_filters(client, db, user):
+    """Le CSV commence par un en-tête et respecte les filtres."""
+    other = User(username="bob", email="bob@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    seed(db, user, 6)
+    seed(db, other, 3)
+
+    response = client.get("/tasks/export", params={"format": "csv", "owner_id": user.id, "status": "done"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+    assert {row["status"] for row in rows} == {"done"}
+    assert {row["owner_id"] for row in rows} == {str(user.id)}
+
+
+def test_empty_csv_export_has_header(client):
+    """Un export CSV vide contient tout de même la ligne d'en-tête."""
+    response = client.get("/tasks/export", params={"format": "csv"})
+    assert response.text.strip() == ",".join(tasks_route.EXPORT_COLUMNS)
@@ -0,0 +1,73 @@
+"""
+Tests du hachage des mots de passe dans un pool de processus borné.
+
+Ce module vérifie :
+- Le hachage et la vérification dans le pool de processus,
+- Le refus immédiat (503 + Retry-After) lorsque la file d'attente est pleine,
+- Le recalcul transparent, à la connexion, d'un hash produit avec un coût obsolète.
+"""
+
+import asyncio
+
+import pytest
+from passlib.hash import bcrypt
+
+import auth
+from hashing import BCRYPT_ROUNDS, HasherSaturated, PasswordHasher
+from models import User
+
+
+def test_hash_and_verify_in_process_pool():
+    """Le hash calculé dans un processus du pool se vérifie correctement."""
+    hasher = PasswordHasher(workers=1, max_pending=2)
+    try:
+        async def scenario():
+            hashed = await hasher.hash("secret123")
+            return hashed, await hasher.verify("secret123", hashed), await hasher.verify("mauvais", hashed)
+
+        hashed, good, bad = asyncio.run(scenario())
+        assert hashed.startswith("$2b$")
+        assert good == (True, None)
+        assert bad == (False, None)
+        assert hasher.pending == 0
+    finally:
+        hasher.shutdown()
+
+
+def test_saturated_pool_rejects_immediately():
+    """Au-delà de max_pending, la demande est refusée sans être mise en file."""
+    hasher = PasswordHasher(workers=1, max_pending=1)
+    try:
+        async def scenario():
+            return await asyncio.gather(hasher.hash("a"), hasher.hash("b"), return_exceptions=True)
+
+        first, second = asyncio.run(scenario())
+        assert isinstance(first, str)
+        assert isinstance(second, HasherSaturated)
+    finally:
+        hasher.shutdown()
+
+
+def test_register_returns_503_when_saturated(client, monkeypatch):
+    """La route d'inscription répond 503 avec Retry-After si le pool est saturé."""
+    monkeypatch.setattr(auth, "password_hasher", PasswordHasher(workers=1, max_pending=0))
+    response = client.post("/auth/register", json={
+        "username": "carol", "email": "carol@example.com", "password": "secret123",
+    })
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_login_rehashes_outdated_hash(client, db):
+    """Un hash moins coûteux que BCRYPT_ROUNDS est remplacé lors d'une connexion réussie."""
+    old_hash = bcrypt.using(rounds=BCRYPT_ROUNDS - 1).hash("secret123")
+    db.add(User(username="dave", email="dave@example.com", hashed_password=old_hash))
+    db.commit()
+
+    response = client.post("/auth/login", json={"username": "dave", "password": "secret123"})
+    assert response.status_code == 200
+
+    db.expire_all()
+    new_hash = db.query(User).filter(User.username == "dave").one().hashed_password
+    assert new_hash != old_hash
+    assert new_hash.startswith(f"$2b${BCRYPT_ROUNDS:02d}$")
@@ -0,0 +1,123 @@
+"""
+Tests du cache HTTP des lectures de tâches (ETag, Last-Modified, GET conditionnel).
+
+Ce module vérifie :
+- Qu'une tâche inchangée est revalidée en 304 par une seule requête légère,
+  ou sans requête si elle est dans le cache des réponses,
+- La prise en compte de If-Modified-Since,
+- Qu'une modification invalide l'ETag et le Last-Modified,
+- L'ETag des pages de la liste et sa revalidation.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from http_cache import http_date, is_not_modified
+from response_cache import NullBackend, ResponseCache, get_task_cache
+
+
+@pytest.fixture
+def task(client, user):
+    response = client.post("/tasks/", json={"title": "Cache", "owner_id": user.id})
+    return response.json()
+
+
+@pytest.fixture
+def statements(async_engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_get_task_sets_validators(client, task):
+    response = client.get(f"/tasks/{task['id']}")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{task["id"]}-1"'
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert response.headers["Last-Modified"].endswith("GMT")
+    assert response.json()["updated_at"] is not None
+
+
+def test_if_none_match_returns_304_with_one_light_query(app, client, task, statements):
+    app.dependency_overrides[get_task_cache] = lambda: ResponseCache(NullBackend())
+    etag = client.get(f"/tasks/{task['id']}").headers["ETag"]
+    statements.clear()
+
+    response = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    assert len(statements) == 1
+    assert statements[0].startswith("SELECT taches.version, taches.updated_at")
+
+
+def test_if_none_match_on_cached_task_needs_no_query(client, task, statements):
+    etag = client.get(f"/tasks/{task['id']}").headers["ETag"]
+    statements.clear()
+
+    response = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert statements == []
+
+
+def test_if_modified_since(client, task):
+    last_modified = client.get(f"/tasks/{task['id']}").headers["Last-Modified"]
+    response = client.get(f"/tasks/{task['id']}", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+    earlier = http_date(datetime.utcnow() - timedelta(days=1))
+    response = client.get(f"/tasks/{task['id']}", headers={"If-Modified-Since": earlier})
+    assert response.status_code == 200
+
+
+def test_change_invalidates_etag(client, task):
+    etag = client.get(f"/tasks/{task['id']}").headers["ETag"]
+    patched = client.patch(f"/tasks/{task['id']}", json={"status": "done"})
+    assert patched.headers["ETag"] != etag
+
+    response = client.get(f"/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == patched.headers["ETag"]
+
+
+def test_conditional_get_on_missing_task(client):
+    response = client.get("/tasks/999", headers={"If-None-Match": '"999-1"'})
+    assert response.status_code == 404
+
+
+def test_list_etag(client, user, task):
+    first = client.get("/tasks/", params={"limit": 10})
+    etag = first.headers["ETag"]
+
+    response = client.get("/tasks/", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post("/tasks/", json={"title": "Nouvelle", "owner_id": user.id})
+    response = client.get("/tasks/", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["ETag"] != etag
+
+
+def test_list_etag_keeps_next_cursor(client, user, task):
+    client.post("/tasks/", json={"title": "Deuxième", "owner_id": user.id})
+    first = client.get("/tasks/", params={"limit": 1})
+    response = client.get("/tasks/", params={"limit": 1}, headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 304
+    assert response.headers["X-Next-Cursor"] == first.headers["X-Next-Cursor"]
+
+
+def test_if_none_match_takes_precedence():
+    last_modified = datetime(2026, 1, 1)
+    since = http_date(last_modified)
+    assert is_not_modified('"1-1"', last_modified, None, since)
+    assert not is_not_modified('"1-2"', last_modified, '"1-1"', since)
+    assert is_not_modified('"1-1"', last_modified, 'W/"1-1", "x"', None)
+    assert is_not_modified('"1-1"', None, "*", None)
@@ -0,0 +1,49 @@
+"""
+Vérifie, via EXPLAIN QUERY PLAN sur SQLite, que les requêtes de liste de tâches
+s'appuient sur les index composites définis dans `models.Tache`.
+
+Les requêtes testées sont construites avec les mêmes fonctions que la route
+GET /tasks/ (filtres et pagination par curseur).
+"""
+
+from datetime import datetime
+
+from sqlalchemy import select, text
+
+from models import Tache
+from pagination import apply_keyset
+from routes.tasks import TaskFilters, apply_task_filters
+
+
+def query_plan(engine, statement):
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def listing(filters, sort="id", order="asc"):
+    statement = apply_task_filters(select(Tache), filters)
+    return apply_keyset(statement, Tache, sort, order, None).limit(51)
+
+
+def test_owner_status_listing_uses_composite_index(engine):
+    """Propriétaire + statut triés par created_at : index (owner_id, status, created_at), sans tri temporaire."""
+    plan = query_plan(engine, listing(TaskFilters(owner_id=1, status="todo"), sort="created_at"))
+    assert "ix_taches_owner_status_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_owner_due_range_uses_composite_index(engine):
+    """Propriétaire + intervalle d'échéance : index (owner_id, due_date)."""
+    filters = TaskFilters(owner_id=1, due_after=datetime(2025, 1, 1), due_before=datetime(2025, 2, 1))
+    plan = query_plan(engine, listing(filters))
+    assert "ix_taches_owner_due" in plan
+
+
+def test_redundant_primary_key_indexes_are_gone(engine):
+    """Les index ix_users_id et ix_taches_id, redondants avec les clés primaires, n'existent plus."""
+    with engine.connect() as conn:
+        names = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+    assert "ix_users_id" not in names
+    assert "ix_taches_id" not in names
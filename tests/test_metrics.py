@@ -0,0 +1,121 @@
+"""
+Tests de l'instrumentation : latence et statuts par route, requêtes SQL par
+requête HTTP, détection des requêtes lentes et des N+1, exposition Prometheus.
+"""
+
+import pytest
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import instrumentation
+from database import get_db
+from instrumentation import Metrics, MetricsMiddleware, PrometheusWriter, instrument_engine, write_metrics
+from metrics import Histogram
+from routes import metrics_route
+
+# Ces tests posent leur propre middleware : pas de budget de requêtes SQL (voir conftest)
+pytestmark = pytest.mark.query_budget(0)
+
+
+@pytest.fixture
+def registry(async_engine):
+    """Mesures propres au test, alimentées par le moteur de test."""
+    registry = Metrics()
+    instrument_engine(async_engine.sync_engine, registry)
+    return registry
+
+
+@pytest.fixture
+def measured_client(app, registry):
+    """Client d'une application mesurée, avec une route exécutant N fois la même requête SQL."""
+
+    @app.get("/repeat/{count}")
+    async def repeat(count: int, db=Depends(get_db)):
+        for task_id in range(count):
+            await db.execute(text("SELECT id FROM taches WHERE id = :id"), {"id": task_id})
+        return {"count": count}
+
+    @app.get("/boom")
+    async def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(MetricsMiddleware, registry=registry)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def create_task(client, user, title="Tâche"):
+    response = client.post("/tasks/", json={"title": title, "owner_id": user.id})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_latency_and_status_by_route_template(measured_client, registry, user):
+    task_id = create_task(measured_client, user)
+    measured_client.get(f"/tasks/{task_id}")
+    measured_client.get(f"/tasks/{task_id + 1000}")
+    measured_client.get("/inconnue")
+
+    assert registry.requests[("GET", "/tasks/{task_id}", 200)].value == 1
+    assert registry.requests[("GET", "/tasks/{task_id}", 404)].value == 1
+    assert registry.requests[("POST", "/tasks/", 200)].value == 1
+    assert registry.requests[("GET", "unmatched", 404)].value == 1
+    assert registry.latency[("GET", "/tasks/{task_id}")].count == 2
+    assert registry.in_flight == 0
+
+
+def test_unhandled_exception_counts_as_500(measured_client, registry):
+    assert measured_client.get("/boom").status_code == 500
+    assert registry.requests[("GET", "/boom", 500)].value == 1
+    assert registry.in_flight == 0
+
+
+def test_queries_are_counted_per_request(measured_client, registry):
+    measured_client.get("/repeat/3")
+    histogram = registry.queries_per_request["/repeat/{count}"]
+    assert histogram.count == 1
+    assert histogram.sum == 3
+    assert registry.query_time.count >= 3
+
+
+def test_n_plus_one_is_flagged(measured_client, registry, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "N_PLUS_ONE_THRESHOLD", 5)
+    measured_client.get("/repeat/4")
+    assert "/repeat/{count}" not in registry.n_plus_one
+
+    with caplog.at_level("WARNING", logger="instrumentation"):
+        measured_client.get("/repeat/5")
+    assert registry.n_plus_one["/repeat/{count}"].value == 1
+    assert "SELECT id FROM taches WHERE id = ?" in caplog.text
+
+
+def test_slow_queries_are_flagged(measured_client, registry, monkeypatch):
+    monkeypatch.setattr(instrumentation, "SLOW_QUERY_MS", 0)
+    measured_client.get("/repeat/2")
+    assert registry.slow_queries["/repeat/{count}"].value == 2
+
+
+def test_prometheus_exposition(registry):
+    registry.record_request("GET", '/a"b', 200, 0.02, instrumentation.RequestStats())
+    writer = PrometheusWriter()
+    write_metrics(writer, registry)
+    writer.histogram("custom_seconds", "Test.", (), {(): Histogram((0.1,))})
+    body = writer.render()
+
+    assert "# TYPE http_requests_total counter" in body
+    assert 'http_requests_total{method="GET",route="/a\\"b",status="200"} 1' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/a\\"b",le="0.025"} 1' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/a\\"b",le="0.01"} 0' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/a\\"b"} 1' in body
+    assert "http_requests_in_flight 0" in body
+    assert 'custom_seconds_bucket{le="+Inf"} 0' in body
+    assert body.endswith("\n")
+
+
+def test_metrics_endpoint(app):
+    app.include_router(metrics_route.router)
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE db_query_duration_seconds histogram" in response.text
+    assert 'cache_hits_total{cache="tasks"}' in response.text
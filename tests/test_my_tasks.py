@@ -0,0 +1,116 @@
+"""
+Tests des routes limitées à l'utilisateur authentifié (/tasks/mine).
+
+Ce module vérifie :
+- Que le propriétaire est déduit du token, en lecture comme en création,
+- Les compteurs par statut, issus d'une seule requête GROUP BY et invalidés par les écritures,
+- Via EXPLAIN QUERY PLAN, que ces requêtes parcourent un index commençant par owner_id, sans tri.
+"""
+
+import pytest
+from sqlalchemy import event
+
+import auth
+import models
+from routes.tasks import TaskFilters, status_counts_query
+from tests.test_indexes import listing, query_plan
+
+
+@pytest.fixture(autouse=True)
+def empty_user_cache():
+    auth.user_cache.clear()
+    yield
+    auth.user_cache.clear()
+
+
+@pytest.fixture
+def statements(async_engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def headers(user):
+    token = auth.create_access_token(data=auth.user_claims(user))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def other_user(db):
+    other = models.User(username="bob", email="bob@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    db.refresh(other)
+    return other
+
+
+def test_mine_requires_authentication(client):
+    assert client.get("/tasks/mine").status_code == 401
+    assert client.post("/tasks/mine", json={"title": "x"}).status_code == 401
+
+
+def test_mine_only_returns_own_tasks(client, user, other_user, headers):
+    created = client.post("/tasks/mine", json={"title": "À moi"}, headers=headers)
+    assert created.status_code == 200
+    assert created.json()["owner_id"] == user.id
+    client.post("/tasks/", json={"title": "À Bob", "owner_id": other_user.id})
+
+    response = client.get("/tasks/mine", headers=headers)
+    assert response.status_code == 200
+    assert [task["title"] for task in response.json()] == ["À moi"]
+    assert "ETag" in response.headers
+
+
+def test_mine_filters_and_pagination(client, headers):
+    for title, status in [("A", "todo"), ("B", "done"), ("C", "todo")]:
+        client.post("/tasks/mine", json={"title": title, "status": status}, headers=headers)
+
+    first = client.get("/tasks/mine", params={"status": "todo", "limit": 1}, headers=headers)
+    assert [task["title"] for task in first.json()] == ["A"]
+    second = client.get(
+        "/tasks/mine",
+        params={"status": "todo", "limit": 1, "cursor": first.headers["X-Next-Cursor"]},
+        headers=headers,
+    )
+    assert [task["title"] for task in second.json()] == ["C"]
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_stats_come_from_one_group_by(client, user, other_user, headers, statements):
+    for status in ["todo", "todo", "done"]:
+        client.post("/tasks/mine", json={"title": "t", "status": status}, headers=headers)
+    client.post("/tasks/", json={"title": "Bob", "status": "done", "owner_id": other_user.id})
+    statements.clear()
+
+    response = client.get("/tasks/mine/stats", headers=headers)
+    assert response.json() == {"total": 3, "by_status": {"done": 1, "todo": 2}}
+    grouped = [s for s in statements if "GROUP BY" in s]
+    assert len(grouped) == 1 and "taches.owner_id = ?" in grouped[0]
+
+    statements.clear()
+    client.get("/tasks/mine/stats", headers=headers)
+    assert not any("GROUP BY" in s for s in statements)
+
+    client.post("/tasks/mine", json={"title": "t", "status": "in_progress"}, headers=headers)
+    response = client.get("/tasks/mine/stats", headers=headers)
+    assert response.json()["by_status"]["in_progress"] == 1
+    assert response.json()["total"] == 4
+
+
+def test_stats_use_owner_index(engine):
+    plan = query_plan(engine, status_counts_query(1))
+    assert "COVERING INDEX ix_taches_owner_status_created" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_mine_listing_uses_owner_index(engine):
+    """Tri par défaut (id) : index (owner_id, id), parcouru dans l'ordre."""
+    plan = query_plan(engine, listing(TaskFilters(owner_id=1)))
+    assert "ix_taches_owner_id" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,94 @@
+"""
+Tests de la pagination par curseur, des filtres et du tri de GET /tasks/.
+
+Ce module vérifie :
+- Le parcours complet d'une liste page par page via l'en-tête X-Next-Cursor,
+- Le tri descendant sur created_at,
+- Les filtres sur le statut, le propriétaire et l'intervalle d'échéance,
+- Le rejet d'un curseur invalide ou émis pour un autre tri.
+"""
+
+from datetime import datetime, timedelta
+
+from models import Tache, User
+
+
+def seed_tasks(db, owner, count):
+    base = datetime(2025, 1, 1)
+    for i in range(count):
+        db.add(Tache(
+            title=f"Tâche {i}",
+            status="done" if i % 3 == 0 else "todo",
+            created_at=base + timedelta(minutes=i // 2),  # doublons volontaires sur created_at
+            due_date=base + timedelta(days=i),
+            owner_id=owner.id,
+        ))
+    db.commit()
+
+
+def collect_pages(client, params):
+    ids, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/tasks/", params=query)
+        assert response.status_code == 200
+        ids.extend(task["id"] for task in response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids, pages
+
+
+def test_pages_cover_every_task_once(client, db, user):
+    """Le parcours par curseur renvoie chaque tâche exactement une fois, dans l'ordre."""
+    seed_tasks(db, user, 23)
+    ids, pages = collect_pages(client, {"limit": 5})
+    assert ids == sorted(ids)
+    assert len(ids) == 23 == len(set(ids))
+    assert pages == 5
+
+
+def test_sort_created_at_desc(client, db, user):
+    """Le tri descendant sur created_at départage les égalités par id."""
+    seed_tasks(db, user, 11)
+    ids, _ = collect_pages(client, {"limit": 4, "sort": "created_at", "order": "desc"})
+    expected = [t.id for t in db.query(Tache).order_by(Tache.created_at.desc(), Tache.id.desc())]
+    assert ids == expected
+
+
+def test_filters(client, db, user):
+    """Les filtres sont appliqués côté serveur."""
+    other = User(username="bob", email="bob@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    seed_tasks(db, user, 9)
+    seed_tasks(db, other, 4)
+
+    response = client.get("/tasks/", params={"owner_id": other.id})
+    assert {t["owner_id"] for t in response.json()} == {other.id}
+    assert len(response.json()) == 4
+
+    response = client.get("/tasks/", params={"owner_id": user.id, "status": "done"})
+    assert [t["status"] for t in response.json()] == ["done"] * 3
+
+    response = client.get("/tasks/", params={
+        "owner_id": user.id,
+        "due_after": "2025-01-03T00:00:00",
+        "due_before": "2025-01-06T00:00:00",
+    })
+    assert len(response.json()) == 3
+
+
+def test_invalid_cursor(client, db, user):
+    """Un curseur illisible ou émis pour un autre tri est refusé avec une erreur 400."""
+    seed_tasks(db, user, 3)
+    assert client.get("/tasks/", params={"cursor": "pas-un-curseur"}).status_code == 400
+
+    cursor = client.get("/tasks/", params={"limit": 1}).headers["X-Next-Cursor"]
+    response = client.get("/tasks/", params={"cursor": cursor, "order": "desc"})
+    assert response.status_code == 400
+
+
+def test_page_size_is_bounded(client):
+    """Une taille de page hors bornes est refusée."""
+    assert client.get("/tasks/", params={"limit": 10_000}).status_code == 422
@@ -0,0 +1,150 @@
+"""
+Tests des mises à jour partielles (PATCH /tasks/{id}) et de la concurrence optimiste.
+
+Ce module vérifie :
+- Qu'un PATCH n'écrit que les champs fournis, en une seule instruction UPDATE ... RETURNING,
+- Le même comportement sans RETURNING (MySQL), avec une seule relecture,
+- Le refus (412) d'une modification fondée sur un ETag périmé, en PATCH comme en PUT,
+- Qu'un PUT sans If-Match devancé par une écriture concurrente est rejoué (dernier écrivain),
+  et qu'avec If-Match il reçoit 412,
+- Qu'un DELETE devancé par une suppression ou une modification concurrente répond 404
+  ou supprime la tâche, sans erreur 500,
+- L'incrémentation de la version par les mises à jour groupées.
+"""
+
+import pytest
+from sqlalchemy import delete, event, update
+
+from models import Tache, User
+from routes import tasks as tasks_route
+
+
+@pytest.fixture
+def task(client, user):
+    response = client.post("/tasks/", json={"title": "Initiale", "description": "Texte", "owner_id": user.id})
+    return response.json()
+
+
+@pytest.fixture
+def statements(async_engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def test_patch_updates_only_given_fields_in_one_statement(client, task, statements):
+    """Un seul UPDATE ... RETURNING, qui ne touche que le statut, la date de modification et la version."""
+    assert task["version"] == 1
+    response = client.patch(f"/tasks/{task['id']}", json={"status": "done"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "done"
+    assert body["title"] == "Initiale" and body["description"] == "Texte"
+    assert body["version"] == 2
+    assert response.headers["ETag"] == f'"{task["id"]}-2"'
+
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE taches SET status=?, updated_at=?, version=(taches.version + ?)")
+    assert "RETURNING" in statements[0]
+
+
+def test_patch_without_returning(client, task, statements, monkeypatch):
+    """Sans RETURNING : un UPDATE puis une seule relecture."""
+    monkeypatch.setattr(tasks_route, "_supports_update_returning", lambda db: False)
+    response = client.patch(f"/tasks/{task['id']}", json={"title": "Renommée"})
+    assert response.json()["title"] == "Renommée"
+    assert [s.split()[0] for s in statements] == ["UPDATE", "SELECT"]
+
+
+def test_patch_with_stale_etag(client, task):
+    """If-Match avec une version périmée : 412, et la tâche n'est pas modifiée."""
+    etag = client.get(f"/tasks/{task['id']}").headers["ETag"]
+    assert client.patch(f"/tasks/{task['id']}", json={"status": "done"}, headers={"If-Match": etag}).status_code == 200
+
+    response = client.patch(f"/tasks/{task['id']}", json={"status": "todo"}, headers={"If-Match": etag})
+    assert response.status_code == 412
+    assert client.get(f"/tasks/{task['id']}").json()["status"] == "done"
+
+
+def test_patch_errors(client, task):
+    """Tâche inconnue : 404 ; corps vide : 400 ; titre null : 422."""
+    assert client.patch("/tasks/999999", json={"status": "done"}).status_code == 404
+    assert client.patch(f"/tasks/{task['id']}", json={}).status_code == 400
+    assert client.patch(f"/tasks/{task['id']}", json={"title": None}).status_code == 422
+
+
+def test_put_honours_if_match(client, task, user):
+    """PUT incrémente la version et refuse un ETag périmé."""
+    body = {"title": "Remplacée", "owner_id": user.id}
+    first = client.put(f"/tasks/{task['id']}", json=body, headers={"If-Match": f'"{task["id"]}-1"'})
+    assert first.status_code == 200
+    assert first.json()["version"] == 2
+    stale = client.put(f"/tasks/{task['id']}", json=body, headers={"If-Match": f'"{task["id"]}-1"'})
+    assert stale.status_code == 412
+
+
+@pytest.fixture
+def concurrent_write(async_engine, db):
+    """
+    Fait précéder les `count` prochaines instructions `before` de la route par une
+    écriture d'un autre client (`write`, par défaut une modification de la tâche).
+    """
+    remaining = []
+
+    def write_first(conn, cursor, statement, parameters, context, executemany):
+        if remaining and statement.startswith(remaining[-1][0]):
+            _, write = remaining.pop()
+            db.execute(write)
+            db.commit()
+
+    def schedule(count=1, before="UPDATE taches", write=None):
+        if write is None:
+            write = update(Tache).values(description="Concurrente", version=Tache.version + 1)
+        remaining.extend([(before, write)] * count)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", write_first)
+    yield schedule
+    event.remove(async_engine.sync_engine, "before_cursor_execute", write_first)
+
+
+def test_put_without_if_match_replays_a_lost_race(client, task, user, concurrent_write):
+    concurrent_write()
+    response = client.put(f"/tasks/{task['id']}", json={"title": "Remplacée", "owner_id": user.id})
+    assert response.status_code == 200
+    # Relue après l'écriture concurrente (version 2), la tâche est remplacée entièrement
+    assert (response.json()["description"], response.json()["version"]) == (None, 3)
+
+
+def test_put_race_with_if_match_or_endless_contention(client, task, user, concurrent_write):
+    body = {"title": "Remplacée", "owner_id": user.id}
+    concurrent_write()
+    assert client.put(f"/tasks/{task['id']}", json=body, headers={"If-Match": f'"{task["id"]}-1"'}).status_code == 412
+    concurrent_write(tasks_route.PUT_RETRIES)
+    assert client.put(f"/tasks/{task['id']}", json=body).status_code == 409
+
+
+@pytest.mark.parametrize("write, status", [(delete(Tache), 404), (None, 200)])
+def test_delete_racing_another_write(client, task, concurrent_write, write, status):
+    concurrent_write(before="DELETE FROM taches", write=write)
+    assert client.delete(f"/tasks/{task['id']}").status_code == status
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+
+
+def test_delete_racing_an_owner_change(client, task, db, concurrent_write):
+    other = User(username="bob", email="bob@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    concurrent_write(before="DELETE FROM taches", write=update(Tache).values(owner_id=other.id))
+    assert client.delete(f"/tasks/{task['id']}").status_code == 409
+    assert client.get(f"/tasks/{task['id']}").json()["owner_id"] == other.id
+
+
+def test_bulk_patch_bumps_version(client, task):
+    """Les mises à jour groupées incrémentent aussi la version."""
+    client.patch("/tasks/bulk", json=[{"id": task["id"], "status": "done"}])
+    assert client.get(f"/tasks/{task['id']}").json()["version"] == 2
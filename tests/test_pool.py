@@ -0,0 +1,64 @@
+"""
+Tests de l'instrumentation du pool de connexions (database.TimedQueuePool).
+
+Ce module vérifie :
+- L'application des options de pool issues de la configuration,
+- L'enregistrement des temps d'attente et des connexions empruntées,
+- Le comptage des dépassements de DB_POOL_TIMEOUT,
+- L'exposition des statistiques par la route /monitoring/pool.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from database import TimedQueuePool, pool_options, pool_status
+from routes import monitoring
+
+
+def test_pool_options_for_server_and_memory_urls():
+    """Les options de pool sont appliquées sauf pour SQLite en mémoire."""
+    options = pool_options("mysql+pymysql://u:p@h/db", TimedQueuePool)
+    assert options["poolclass"] is TimedQueuePool
+    assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping"} <= set(options)
+    assert set(pool_options("sqlite://", TimedQueuePool)) == {"pool_pre_ping"}
+
+
+def test_wait_time_and_checked_out(db_path):
+    """Chaque emprunt est mesuré et les connexions empruntées sont visibles."""
+    engine = create_engine(f"sqlite:///{db_path}", poolclass=TimedQueuePool, pool_size=2, max_overflow=0)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        status = pool_status(engine)
+        assert status["checked_out"] == 1
+    status = pool_status(engine)
+    assert status["checked_out"] == 0
+    assert status["wait_seconds"]["count"] == 1
+
+    engine.dispose()
+    with engine.connect():
+        pass
+    assert pool_status(engine)["wait_seconds"]["count"] == 2  # conservé après dispose()
+
+
+def test_timeouts_are_counted(db_path):
+    """Un emprunt qui dépasse pool_timeout est compté."""
+    engine = create_engine(
+        f"sqlite:///{db_path}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    assert pool_status(engine)["timeouts"] == 1
+
+
+def test_pool_endpoint():
+    """La route expose l'état des engines et du routage des lectures sans ouvrir de connexion."""
+    app = FastAPI()
+    app.include_router(monitoring.router, prefix="/monitoring")
+    data = TestClient(app).get("/monitoring/pool").json()
+    assert set(data) == {"async", "sync", "replicas", "routing"}
+    assert data["replicas"] == []
+    assert {"checked_out", "overflow", "wait_seconds"} <= set(data["async"])
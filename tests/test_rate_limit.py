@@ -0,0 +1,258 @@
+"""
+Tests de la limitation du débit et de la concurrence.
+
+Ce module vérifie :
+- Qu'une connexion au-delà de la limite reçoit un 429 avec Retry-After, sans requête
+  SQL ni hachage, et que le seau se remplit de nouveau avec le temps,
+- Les clés par nom d'utilisateur (corps rejoué à la route), par sujet du token et par adresse IP,
+- L'adresse du client derrière un proxy de confiance (en-tête X-Forwarded-For),
+- La limite de requêtes simultanées et la libération des places,
+- Qu'une requête refusée par une règle ne consomme pas les jetons des autres règles,
+- Que le corps n'est pas lu au-delà de MAX_KEY_BODY_SIZE pour en extraire le nom d'utilisateur,
+- La lecture des débits configurés et le backend Redis.
+"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+import auth
+import routes.auth_route
+from rate_limit import (
+    MemoryBackend, RateLimiter, RateLimitMiddleware, RedisBackend, _buffer_body, client_address, default_rules,
+    parse_networks, parse_rate, rule,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def statements(async_engine):
+    """Liste des requêtes SQL exécutées par les routes pendant le test."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    """Nombre de vérifications de mot de passe lancées par /auth/login."""
+    calls = []
+    verify = routes.auth_route.verify_password_async
+
+    async def counting(*args):
+        calls.append(args)
+        return await verify(*args)
+
+    monkeypatch.setattr(routes.auth_route, "verify_password_async", counting)
+    return calls
+
+
+def limited_client(app, *rules, clock=None):
+    limiter = RateLimiter(MemoryBackend(clock=clock or Clock()), rules=list(rules))
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(app), limiter
+
+
+def login(client, username="bob", password="mauvais"):
+    return client.post("/auth/login", json={"username": username, "password": password})
+
+
+def test_login_is_rejected_before_any_query_or_hash(app, db, user, clock, statements, hashes):
+    user.hashed_password = auth.get_password_hash("secret123")
+    db.commit()
+    client, limiter = limited_client(app, rule("login_user", "/auth/login", {"POST"}, "username", "2/minute"), clock=clock)
+    assert [login(client, "alice").status_code for _ in range(2)] == [401, 401]
+    queries, checks = len(statements), len(hashes)
+    assert checks == 2
+
+    rejected = login(client, "alice")
+    assert rejected.status_code == 429
+    assert rejected.headers["Retry-After"] == "30"
+    assert (len(statements), len(hashes)) == (queries, checks)
+    # Autre nom d'utilisateur : autre seau
+    assert login(client, "carol").status_code == 401
+    assert limiter.stats()["rejected"] == {"login_user:rate": 1}
+
+    clock.now += 30
+    assert login(client, "alice").status_code == 401
+    assert login(client, "alice").status_code == 429
+
+
+def test_accepted_request_receives_the_buffered_body(app):
+    client, _ = limited_client(app, rule("login_user", "/auth/login", {"POST"}, "username", "5/minute"))
+    client.post("/auth/register", json={"username": "bob", "email": "bob@example.com", "password": "secret123"})
+    response = login(client, password="secret123")
+    assert response.status_code == 200
+    assert "access_token" in response.json()
+
+
+def test_writes_are_limited_per_token_subject(app, db, user, clock):
+    other = type(user)(username="dave", email="dave@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    client, _ = limited_client(app, rule("task_writes", "/tasks", {"POST"}, "subject", "1/minute", prefix=True), clock=clock)
+
+    def create(owner, token=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        return client.post("/tasks/", json={"title": "T", "owner_id": owner.id}, headers=headers).status_code
+
+    alice_token = auth.create_access_token(auth.user_claims(user))
+    dave_token = auth.create_access_token(auth.user_claims(other))
+    assert [create(user, alice_token), create(user, alice_token)] == [200, 429]
+    assert create(other, dave_token) == 200
+    # Sans token (ou avec un token invalide), la clé est l'adresse IP
+    assert [create(user), create(user, "invalide")] == [200, 429]
+    # Les lectures ne sont pas concernées
+    assert client.get("/tasks/").status_code == 200
+
+
+def test_concurrency_limit_releases_its_slots():
+    limiter = RateLimiter(MemoryBackend(), rules=[rule("auth", "/auth/", {"POST"}, "ip", concurrency=2, prefix=True)])
+    scope = {"type": "http", "method": "POST", "path": "/auth/login", "client": ("10.0.0.1", 1234), "headers": []}
+    other = {**scope, "client": ("10.0.0.2", 1234)}
+
+    async def scenario():
+        rules = limiter.match("POST", "/auth/login")
+        first, second = [await limiter.admit(scope, rules, None) for _ in range(2)]
+        third = await limiter.admit(scope, rules, None)
+        elsewhere = await limiter.admit(other, rules, None)
+        limiter.release(first[1])
+        fourth = await limiter.admit(scope, rules, None)
+        for admitted in (second, elsewhere, fourth):
+            limiter.release(admitted[1])
+        return first, third, elsewhere, fourth
+
+    first, third, elsewhere, fourth = asyncio.run(scenario())
+    assert first[0] == 0 and third == (1, [])
+    assert elsewhere[0] == 0 and fourth[0] == 0
+    assert limiter.in_flight == {}
+    assert limiter.stats()["rejected"] == {"auth:concurrency": 1}
+
+
+def test_rejected_request_gives_back_the_tokens_of_earlier_rules(clock):
+    limiter = RateLimiter(MemoryBackend(clock=clock), rules=[
+        rule("login_ip", "/auth/login", {"POST"}, "ip", "2/minute"),
+        rule("login_user", "/auth/login", {"POST"}, "username", "1/minute"),
+    ])
+    scope = {"type": "http", "method": "POST", "path": "/auth/login", "client": ("10.0.0.1", 1234), "headers": []}
+
+    async def scenario():
+        rules = limiter.match("POST", "/auth/login")
+        return [
+            (await limiter.admit(scope, rules, f'{{"username": "{name}"}}'.encode()))[0]
+            for name in ("alice", "alice", "bob", "carol")
+        ]
+
+    waits = asyncio.run(scenario())
+    # Le deuxième essai d'alice, refusé par login_user, ne compte pas pour l'adresse IP
+    assert waits[:3] == [0, 60, 0] and waits[3] > 0
+    assert limiter.stats()["rejected"] == {"login_user:rate": 1, "login_ip:rate": 1}
+
+
+def test_large_body_is_not_buffered_beyond_the_key_limit():
+    chunks = [{"type": "http.request", "body": b"x" * 40_000, "more_body": True} for _ in range(3)]
+    chunks.append({"type": "http.request", "body": b"", "more_body": False})
+    pending = list(chunks)
+
+    async def receive():
+        return pending.pop(0)
+
+    async def scenario():
+        body, replay = await _buffer_body(receive, limit=64 * 1024)
+        read_ahead = len(chunks) - len(pending)
+        return body, read_ahead, [await replay() for _ in range(len(chunks))]
+
+    body, read_ahead, replayed = asyncio.run(scenario())
+    assert body is None and read_ahead == 2
+    # La route reçoit tout le corps : les morceaux déjà lus, puis la suite
+    assert replayed == chunks
+
+
+def test_client_address_behind_trusted_proxies():
+    proxies = parse_networks("10.0.0.0/8, 192.168.1.1")
+
+    def scope(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return {"client": (peer, 1234), "headers": headers}
+
+    assert client_address(scope("10.0.0.1", "203.0.113.7")) == "10.0.0.1"
+    assert client_address(scope("10.0.0.1", "203.0.113.7"), proxies) == "203.0.113.7"
+    # L'adresse ajoutée par le dernier proxy de confiance l'emporte sur celles du client
+    assert client_address(scope("10.0.0.1", "1.2.3.4, 203.0.113.7, 192.168.1.1"), proxies) == "203.0.113.7"
+    # En-tête ignoré si la requête ne vient pas d'un proxy de confiance
+    assert client_address(scope("198.51.100.2", "203.0.113.7"), proxies) == "198.51.100.2"
+    assert client_address(scope("10.0.0.1"), proxies) == "10.0.0.1"
+    assert client_address({"headers": []}, proxies) is None
+
+    limiter = RateLimiter(MemoryBackend(), rules=[], trusted_proxies=proxies)
+    item = rule("login_ip", "/auth/login", {"POST"}, "ip", "1/minute")
+    assert limiter.client_key(item, scope("10.0.0.1", "203.0.113.7"), None) == "login_ip:ip:203.0.113.7"
+
+
+def test_memory_buckets_refill_and_are_forgotten_when_full(clock):
+    backend = MemoryBackend(maxsize=2, clock=clock)
+
+    async def scenario():
+        waits = [await backend.take("k", rate=0.5, burst=2) for _ in range(3)]
+        clock.now += 1
+        refilled = await backend.take("k", rate=0.5, burst=2)
+        for key in ("a", "b"):
+            await backend.take(key, rate=1, burst=1)
+        return waits, refilled
+
+    waits, refilled = asyncio.run(scenario())
+    assert waits == [0.0, 0.0, 2.0]
+    assert refilled == 1.0
+    assert len(backend.buckets) == 2
+
+
+def test_parse_rate_and_default_rules(monkeypatch):
+    assert parse_rate("5/minute") == (5 / 60, 5)
+    assert parse_rate("10/s") == (10, 10)
+    assert parse_rate("0") is None
+    for invalid in ("5", "5/day", "-1/minute", "x/minute"):
+        with pytest.raises(ValueError):
+            parse_rate(invalid)
+    with pytest.raises(ValueError):
+        rule("r", "/", {"GET"}, "cookie", "1/s")
+
+    import rate_limit
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_LOGIN_USER", "0")
+    names = [item.name for item in default_rules()]
+    assert names == ["login_ip", "register_ip", "auth_concurrency", "task_writes"]
+
+
+def test_redis_backend_runs_the_token_bucket_script():
+    class FakeRedis:
+        def __init__(self):
+            self.calls = []
+
+        async def eval(self, script, numkeys, *args):
+            self.calls.append((numkeys, args))
+            return b"0.5"
+
+    client = FakeRedis()
+    backend = RedisBackend(client, clock=lambda: 42.0)
+    assert asyncio.run(backend.take("login_ip:ip:1.2.3.4", rate=1, burst=5)) == 0.5
+    assert client.calls == [(1, ("ratelimit:login_ip:ip:1.2.3.4", 1, 5, 42.0, 1.0))]
+    asyncio.run(backend.refund("login_ip:ip:1.2.3.4", rate=1, burst=5))
+    assert client.calls[-1] == (1, ("ratelimit:login_ip:ip:1.2.3.4", 1, 5, 42.0, -1.0))
@@ -0,0 +1,148 @@
+"""
+Tests du routage des lectures vers les réplicas.
+
+Deux (ou trois) fichiers SQLite jouent le primaire et les réplicas. Ils ne sont
+pas répliqués : chacun reçoit des données différentes, ce qui permet de voir
+quelle base a servi chaque lecture.
+
+Ce module vérifie :
+- Que les routes en lecture seule lisent sur un réplica, tour à tour,
+- Que les écritures vont au primaire, y compris depuis une session de lecture,
+- Que le client qui vient d'écrire relit ses écritures sur le primaire pendant la fenêtre prévue,
+- Qu'une page ou une tâche lue sur un réplica juste après une écriture n'est pas
+  mise en cache, et ne masque pas l'écriture au client qui l'a faite,
+- Que sans réplica, tout passe par le primaire.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from database import Base, ReplicaRouter, get_session_factory, make_session_factory
+from models import Tache, User
+from response_cache import MemoryBackend, NullBackend, ResponseCache, get_task_cache
+from routes import tasks, users
+
+
+def make_database(path, title):
+    """Crée une base SQLite avec un utilisateur et une tâche dont le titre identifie la base."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        session.add(User(id=1, username="alice", email="alice@example.com", hashed_password="x"))
+        session.add(Tache(id=1, title=title, owner_id=1))
+        session.commit()
+    return engine
+
+
+def titles(engine):
+    with Session(engine) as session:
+        return list(session.scalars(select(Tache.title).order_by(Tache.id)))
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """Moteurs synchrones du primaire et de deux réplicas."""
+    engines = {name: make_database(tmp_path / f"{name}.db", name) for name in ("primary", "replica_a", "replica_b")}
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+def async_engine_for(engine):
+    return create_async_engine(str(engine.url).replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool)
+
+
+def build_client(databases, replicas, sticky_seconds=5.0, cache=None):
+    router = ReplicaRouter([async_engine_for(databases[name]) for name in replicas], sticky_seconds=sticky_seconds)
+    session_factory = make_session_factory(async_engine_for(databases["primary"]), router)
+    app = FastAPI()
+    app.include_router(tasks.router, prefix="/tasks")
+    app.include_router(users.router, prefix="/users")
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    cache = cache if cache is not None else ResponseCache(NullBackend())
+    app.dependency_overrides[get_task_cache] = lambda: cache
+    return TestClient(app), router, session_factory
+
+
+def test_reads_go_to_replicas_round_robin(databases):
+    client, router, _ = build_client(databases, ["replica_a", "replica_b"])
+    served = [client.get("/tasks/1").json()["title"] for _ in range(4)]
+    assert served == ["replica_a", "replica_b", "replica_a", "replica_b"]
+    assert client.get("/users/1/tasks").json()[0]["title"] == "replica_a"
+    assert router.stats()["replica_reads"] == 5
+
+
+def test_writes_go_to_primary(databases):
+    client, _, _ = build_client(databases, ["replica_a"])
+    created = client.post("/tasks/", json={"title": "nouvelle", "owner_id": 1})
+    assert created.status_code == 200
+    patched = client.patch("/tasks/1", json={"status": "done"})
+    assert patched.json()["title"] == "primary"
+    assert titles(databases["primary"]) == ["primary", "nouvelle"]
+    assert titles(databases["replica_a"]) == ["replica_a"]
+
+
+def test_client_reads_its_own_writes_during_window(databases):
+    client, router, _ = build_client(databases, ["replica_a"], sticky_seconds=0.3)
+    assert client.get("/tasks/").json()[0]["title"] == "replica_a"
+
+    client.post("/tasks/", json={"title": "nouvelle", "owner_id": 1})
+    assert [task["title"] for task in client.get("/tasks/").json()] == ["primary", "nouvelle"]
+    assert router.stats()["sticky_reads"] == 1
+
+    time.sleep(0.35)
+    assert [task["title"] for task in client.get("/tasks/").json()] == ["replica_a"]
+
+
+def test_replica_reads_after_a_write_are_not_cached(databases):
+    writer, _, _ = build_client(databases, ["replica_a"], cache=ResponseCache(MemoryBackend()))
+    # Deux clients (adresses) distincts sur la même application et le même cache
+    reader = TestClient(writer.app, client=("10.0.0.2", 50000))
+    assert [task["title"] for task in reader.get("/tasks/").json()] == ["replica_a"]
+
+    writer.post("/tasks/", json={"title": "nouvelle", "owner_id": 1})
+    writer.patch("/tasks/1", json={"status": "done"})
+    # Le réplica en retard sert le lecteur, sans remplir le cache...
+    assert [task["title"] for task in reader.get("/tasks/").json()] == ["replica_a"]
+    assert reader.get("/tasks/1").json()["version"] == 1
+    # ... et l'auteur des écritures les relit sur le primaire
+    assert [task["title"] for task in writer.get("/tasks/").json()] == ["primary", "nouvelle"]
+    assert writer.get("/tasks/1").json()["status"] == "done"
+
+
+def test_failed_write_does_not_stick(databases):
+    client, router, _ = build_client(databases, ["replica_a"])
+    assert client.patch("/tasks/999", json={"status": "done"}).status_code == 404
+    client.get("/tasks/1")
+    assert router.stats()["sticky_reads"] == 0
+
+
+def test_write_in_read_session_goes_to_primary(databases):
+    _, router, session_factory = build_client(databases, ["replica_a"])
+
+    async def scenario():
+        async with session_factory() as db:
+            db.info["client"] = "script"
+            db.info["replica"] = router.read_engine("script").sync_engine
+            read = await db.scalar(select(Tache.title).where(Tache.id == 1))
+            db.add(Tache(title="écrite", owner_id=1))
+            await db.commit()
+            return read
+
+    assert asyncio.run(scenario()) == "replica_a"
+    assert titles(databases["primary"]) == ["primary", "écrite"]
+    assert router.read_engine("script") is None
+
+
+def test_without_replicas_everything_reads_primary(databases):
+    client, router, _ = build_client(databases, [])
+    assert client.get("/tasks/1").json()["title"] == "primary"
+    assert router.stats() == {"replicas": 0, "replica_reads": 0, "sticky_reads": 0, "sticky_clients": 0}
@@ -0,0 +1,291 @@
+"""
+Tests du cache de lecture des tâches (response_cache).
+
+Ce module vérifie :
+- Que les lectures répétées d'une tâche ou d'une page sont servies sans requête SQL,
+- L'invalidation après création, modification et suppression, unitaires ou groupées,
+- Que l'invalidation d'une liste est limitée aux propriétaires concernés,
+- La fusion des chargements concurrents d'une même clé,
+- La barrière posée par une écriture : une lecture antérieure n'est pas remise en cache,
+- Le backend Redis, avec un faux client en mémoire.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from response_cache import MemoryBackend, RedisBackend, ResponseCache, get_task_cache
+
+
+class FakeRedis:
+    """Sous-ensemble de l'API de `redis.asyncio.Redis` utilisé par RedisBackend (sans expiration)."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        value = self.data.get(key)
+        return value.encode() if isinstance(value, str) else value
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Pipeline du faux client : les commandes sont exécutées par `execute`."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands.clear()
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+
+    async def execute(self):
+        for key, value, ex in self.commands:
+            await self.client.set(key, value, ex=ex)
+
+
+@pytest.fixture
+def statements(async_engine):
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def other_user(db):
+    import models
+
+    other = models.User(username="bob", email="bob@example.com", hashed_password="x")
+    db.add(other)
+    db.commit()
+    db.refresh(other)
+    return other
+
+
+def create(client, owner_id, title="Tâche"):
+    return client.post("/tasks/", json={"title": title, "owner_id": owner_id}).json()
+
+
+def test_repeated_reads_hit_the_cache(client, user, task_cache, statements):
+    task = create(client, user.id)
+    statements.clear()
+
+    first = client.get(f"/tasks/{task['id']}")
+    second = client.get(f"/tasks/{task['id']}")
+    assert first.json() == second.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert len(statements) == 1
+
+    client.get("/tasks/", params={"owner_id": user.id})
+    client.get("/tasks/", params={"owner_id": user.id})
+    assert len(statements) == 2
+    stats = task_cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_rate"] == 0.5
+
+
+def test_missing_task_is_not_cached(client, user):
+    assert client.get("/tasks/42").status_code == 404
+    create(client, user.id)
+    assert client.get("/tasks/1").status_code == 200
+
+
+def test_writes_invalidate_task_and_lists(client, user):
+    task = create(client, user.id)
+    client.get(f"/tasks/{task['id']}")
+    assert len(client.get("/tasks/").json()) == 1
+
+    create(client, user.id, "Deuxième")
+    assert len(client.get("/tasks/").json()) == 2
+
+    client.patch(f"/tasks/{task['id']}", json={"status": "done"})
+    assert client.get(f"/tasks/{task['id']}").json()["status"] == "done"
+
+    client.put(f"/tasks/{task['id']}", json={"title": "Remplacée", "owner_id": user.id})
+    assert client.get(f"/tasks/{task['id']}").json()["title"] == "Remplacée"
+
+    client.delete(f"/tasks/{task['id']}")
+    assert client.get(f"/tasks/{task['id']}").status_code == 404
+    assert [t["title"] for t in client.get("/tasks/").json()] == ["Deuxième"]
+
+
+def test_bulk_writes_invalidate(client, user):
+    ids = [r["id"] for r in client.post("/tasks/bulk", json=[
+        {"title": "A", "owner_id": user.id}, {"title": "B", "owner_id": user.id},
+    ]).json()["results"]]
+    assert len(client.get("/tasks/", params={"owner_id": user.id}).json()) == 2
+    client.get(f"/tasks/{ids[0]}")
+
+    client.patch("/tasks/bulk", json=[{"id": ids[0], "status": "done"}])
+    assert client.get(f"/tasks/{ids[0]}").json()["status"] == "done"
+    assert client.get("/tasks/", params={"owner_id": user.id}).json()[0]["status"] == "done"
+
+    client.request("DELETE", "/tasks/bulk", json={"ids": ids})
+    assert client.get(f"/tasks/{ids[0]}").status_code == 404
+    assert client.get("/tasks/", params={"owner_id": user.id}).json() == []
+
+
+def test_invalidation_is_scoped_to_owners(client, user, other_user, statements):
+    create(client, user.id)
+    client.get("/tasks/", params={"owner_id": user.id})
+    client.get("/tasks/", params={"owner_id": other_user.id})
+
+    create(client, other_user.id)
+    statements.clear()
+    client.get("/tasks/", params={"owner_id": user.id})
+    assert statements == []
+    assert len(client.get("/tasks/", params={"owner_id": other_user.id}).json()) == 1
+
+
+def test_owner_change_invalidates_both_owners(client, user, other_user):
+    task = create(client, user.id)
+    assert len(client.get("/tasks/", params={"owner_id": user.id}).json()) == 1
+    assert client.get("/tasks/", params={"owner_id": other_user.id}).json() == []
+
+    client.patch(f"/tasks/{task['id']}", json={"owner_id": other_user.id})
+    assert client.get("/tasks/", params={"owner_id": user.id}).json() == []
+    assert len(client.get("/tasks/", params={"owner_id": other_user.id}).json()) == 1
+
+
+def test_concurrent_misses_are_coalesced():
+    cache = ResponseCache(MemoryBackend())
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"id": 1}
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load("task:1", loader, 30) for _ in range(20)))
+
+    results = asyncio.run(scenario())
+    assert calls == 1
+    assert all(result == {"id": 1} for result in results)
+    assert cache.misses == 20 and cache.coalesced == 19
+
+
+def test_loader_errors_reach_every_waiter():
+    cache = ResponseCache(MemoryBackend())
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("base indisponible")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(cache.get_or_load("task:1", loader, 30) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache._inflight == {}
+
+
+def test_read_started_before_a_write_is_not_cached():
+    cache = ResponseCache(MemoryBackend())
+    loaded = asyncio.Event()
+
+    async def stale_loader():
+        # Lecture de la version 1, terminée après l'écriture de la version 2
+        loaded.set()
+        await asyncio.sleep(0.05)
+        return {"id": 1, "version": 1}
+
+    async def scenario():
+        reader = asyncio.create_task(cache.load("task:1", stale_loader, 30, fence=cache.fence_key(1)))
+        await loaded.wait()
+        await cache.invalidate(task_ids=[1], versions={1: 2})
+        assert await reader == {"id": 1, "version": 1}
+        return await cache.get("task:1")
+
+    assert asyncio.run(scenario()) is None
+
+
+@pytest.mark.parametrize("versions, cached", [({1: 2}, [False, True]), (None, [False, False])])
+def test_fence_lets_only_the_new_version_in(versions, cached):
+    cache = ResponseCache(MemoryBackend())
+    fence = cache.fence_key(1)
+
+    async def scenario():
+        await cache.invalidate(task_ids=[1], versions=versions)
+        results = []
+        # Réplica en retard, puis réplica à jour
+        for version in (1, 2):
+            async def loader():
+                return {"id": 1, "version": version}
+
+            await cache.load("task:1", loader, 30, fence=fence)
+            results.append(await cache.get("task:1") is not None)
+            await cache.backend.delete("task:1")
+        return results
+
+    assert asyncio.run(scenario()) == cached
+
+
+def test_fence_expires_after_the_settle_window():
+    cache = ResponseCache(MemoryBackend(), settle_ttl=0.05)
+
+    async def loader():
+        return {"id": 1, "version": 1}
+
+    async def scenario():
+        await cache.invalidate(task_ids=[1])
+        await asyncio.sleep(0.1)
+        await cache.load("task:1", loader, 30, fence=cache.fence_key(1))
+        return await cache.get("task:1")
+
+    assert asyncio.run(scenario()) == {"id": 1, "version": 1}
+
+
+def test_redis_backend(app, client, user, statements):
+    redis = FakeRedis()
+    cache = ResponseCache(RedisBackend(redis), task_ttl=30, list_ttl=0.5)
+    app.dependency_overrides[get_task_cache] = lambda: cache
+
+    task = create(client, user.id)
+    client.get(f"/tasks/{task['id']}")
+    client.get("/tasks/")
+    assert redis.ttls["tasks:task:1"] == 30
+    assert min(redis.ttls.values()) == 1
+
+    statements.clear()
+    assert client.get(f"/tasks/{task['id']}").json()["title"] == "Tâche"
+    client.get("/tasks/")
+    assert statements == []
+
+    client.patch(f"/tasks/{task['id']}", json={"title": "Modifiée"})
+    assert "tasks:task:1" not in redis.data
+    assert redis.data["tasks:fence:task:1"] == "2"
+    assert client.get(f"/tasks/{task['id']}").json()["version"] == 2
+    assert "tasks:task:1" in redis.data
+    assert client.get("/tasks/").json()[0]["title"] == "Modifiée"
+    assert int(redis.data["tasks:gen:all"]) == 2
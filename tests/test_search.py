@@ -0,0 +1,102 @@
+"""
+Tests de la recherche plein texte (GET /tasks/search).
+
+Ce module vérifie :
+- Le classement par pertinence et la présence obligatoire de tous les mots,
+- La mise à jour de l'index FTS5 (SQLite) après création, modification et suppression,
+- La pagination par curseur et les filtres,
+- Via EXPLAIN QUERY PLAN, que la recherche passe par la table FTS5 et non par un parcours de `taches`,
+- La requête et l'index FULLTEXT générés pour MySQL.
+"""
+
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateIndex
+
+from models import Tache
+from search import search_query, search_terms
+from tests.test_indexes import query_plan
+
+
+def create(client, user, title, description=None, status="todo"):
+    return client.post("/tasks/", json={
+        "title": title, "description": description, "status": status, "owner_id": user.id,
+    }).json()
+
+
+def search(client, q, **params):
+    return client.get("/tasks/search", params={"q": q, **params})
+
+
+def test_results_are_ranked(client, user):
+    create(client, user, "Courses", "Acheter du pain")
+    create(client, user, "Rapport mensuel", "Rapport des ventes, rapport des achats")
+    create(client, user, "Réunion", "Préparer le rapport")
+
+    response = search(client, "rapport")
+    assert response.status_code == 200
+    results = response.json()
+    assert [task["title"] for task in results] == ["Rapport mensuel", "Réunion"]
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_all_terms_are_required(client, user):
+    create(client, user, "Rapport mensuel")
+    create(client, user, "Rapport annuel")
+    assert [t["title"] for t in search(client, "rapport annuel").json()] == ["Rapport annuel"]
+
+
+def test_query_syntax_is_neutralised(client, user):
+    create(client, user, "Réunion d'équipe")
+    assert [t["title"] for t in search(client, 'reunion" *').json()] == ["Réunion d'équipe"]
+    assert search_terms('a-b "c" NEAR(d)') == ["a", "b", "c", "near", "d"]
+    assert search(client, "?!").status_code == 400
+
+
+def test_index_follows_writes(client, user):
+    task = create(client, user, "Ancien titre")
+    client.patch(f"/tasks/{task['id']}", json={"title": "Nouveau titre"})
+    assert search(client, "ancien").json() == []
+    assert [t["id"] for t in search(client, "nouveau").json()] == [task["id"]]
+
+    client.post("/tasks/bulk", json=[{"title": "Nouveau lot", "owner_id": user.id}])
+    assert len(search(client, "nouveau").json()) == 2
+
+    client.delete(f"/tasks/{task['id']}")
+    assert [t["title"] for t in search(client, "nouveau").json()] == ["Nouveau lot"]
+
+
+def test_pagination_and_filters(client, user):
+    for i in range(5):
+        create(client, user, f"Facture {i}", status="done" if i % 2 else "todo")
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = search(client, "facture", **params)
+        seen += [task["id"] for task in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(set(seen)) and len(seen) == 5
+
+    done = search(client, "facture", status="done").json()
+    assert sorted(task["title"] for task in done) == ["Facture 1", "Facture 3"]
+    assert search(client, "facture", cursor="invalide").status_code == 400
+
+
+def test_search_uses_fts_table(engine):
+    query, rank = search_query(select(Tache.id), "sqlite", ["rapport"])
+    plan = query_plan(engine, query.add_columns(rank.label("rank")))
+    assert "SCAN taches_fts VIRTUAL TABLE INDEX" in plan
+    assert "SEARCH taches USING INTEGER PRIMARY KEY" in plan
+
+
+def test_mysql_fulltext():
+    query, rank = search_query(select(Tache.id), "mysql", ["le", "rapport", "mensuel"])
+    sql = str(query.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "MATCH (taches.title, taches.description) AGAINST ('+rapport +mensuel' IN BOOLEAN MODE)" in sql
+
+    index = next(index for index in Tache.__table__.indexes if index.name == "ix_taches_fulltext")
+    ddl = str(CreateIndex(index).compile(dialect=mysql.dialect()))
+    assert ddl.startswith("CREATE FULLTEXT INDEX ix_taches_fulltext ON taches (title, description)")
@@ -0,0 +1,54 @@
+"""
+Tests de la sérialisation rapide des listes et de l'export.
+
+Ce module vérifie :
+- Que TaskRow décrit les mêmes champs que TaskResponse, dans le même ordre,
+- Que le JSON produit depuis les lignes de colonnes est identique à celui de TaskResponse,
+- Que les pages servies par le cache et l'export NDJSON gardent le même contenu.
+"""
+
+import json
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from models import Tache
+from routes.tasks import LIST_COLUMNS, TASK_LIST_JSON, TaskResponse, _ndjson_lines, rows_json
+
+
+def test_task_row_matches_task_response():
+    assert LIST_COLUMNS == tuple(TaskResponse.model_fields)
+
+
+def test_rows_json_matches_model_serialization():
+    rows = [
+        ("Tâche é", None, "todo", None, 3, 1, datetime(2026, 10, 18, 9, 30), None, 1),
+        ('Titre "cité"', "desc", None, datetime(2026, 11, 1, 12), 4, 2,
+         datetime(2026, 10, 18, 9, 30, 0, 123456), datetime(2026, 10, 19), 7),
+    ]
+    models = [TaskResponse(**dict(zip(LIST_COLUMNS, row))) for row in rows]
+    expected = TypeAdapter(List[TaskResponse]).dump_json(models).decode()
+    assert rows_json(rows) == expected
+    assert TASK_LIST_JSON.validate_json(expected)[1]["due_date"] == datetime(2026, 11, 1, 12)
+
+
+def test_list_body_is_the_same_from_cache(client, db, user):
+    db.add_all(Tache(title=f"Tâche {i}", owner_id=user.id) for i in range(3))
+    db.commit()
+    first = client.get("/tasks/")
+    cached = client.get("/tasks/")
+    assert first.headers["content-type"] == "application/json"
+    assert cached.content == first.content
+    assert [task["title"] for task in cached.json()] == ["Tâche 0", "Tâche 1", "Tâche 2"]
+    assert first.headers["ETag"] == cached.headers["ETag"]
+
+
+def test_ndjson_lines():
+    created = datetime(2026, 10, 18, 9, 30)
+    body = _ndjson_lines([(1, "é", None, "todo", created, None, 2)])
+    assert body.endswith(b"\n")
+    assert json.loads(body) == {
+        "id": 1, "title": "é", "description": None, "status": "todo",
+        "created_at": "2026-10-18T09:30:00", "due_date": None, "owner_id": 2,
+    }
@@ -0,0 +1,60 @@
+"""
+Tests du cache des tokens JWT décodés (auth.decode_token).
+
+Ce module vérifie :
+- Qu'un token réutilisé n'est décodé qu'une fois (compteurs de succès/échecs),
+- Qu'un token expiré est refusé même après avoir été mis en cache,
+- Que les tokens invalides ne sont pas mis en cache.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+import auth
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    auth.token_cache.clear()
+    auth.token_cache.hits = auth.token_cache.misses = 0
+    yield
+    auth.token_cache.clear()
+
+
+def test_reused_token_is_decoded_once(monkeypatch):
+    """Les appels suivants sont servis par le cache, sans appel à jwt.decode."""
+    token = auth.create_access_token(data={"sub": "alice"})
+    calls = []
+    original = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: calls.append(1) or original(*a, **kw))
+
+    for _ in range(5):
+        assert auth.decode_token(token)["sub"] == "alice"
+    assert len(calls) == 1
+    assert auth.token_cache.stats()["hits"] == 4
+    assert auth.token_cache.stats()["misses"] == 1
+
+
+def test_expired_token_is_rejected_after_caching():
+    """L'entrée expire avec le token : un token expiré est refusé."""
+    expire = datetime.utcnow() + timedelta(seconds=1)
+    token = jwt.encode({"sub": "alice", "exp": expire}, auth.SECRET_KEY, algorithm=auth.ALGORITHM)
+    assert auth.decode_token(token)["sub"] == "alice"
+
+    time.sleep(2.1)  # exp est exprimé en secondes entières
+    with pytest.raises(HTTPException) as error:
+        auth.decode_token(token)
+    assert error.value.status_code == 401
+
+
+def test_invalid_tokens_are_not_cached():
+    """Un token à la signature invalide est refusé à chaque fois et n'entre pas dans le cache."""
+    forged = jwt.encode({"sub": "alice", "exp": datetime.utcnow() + timedelta(minutes=5)}, "autre_cle")
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            auth.decode_token(forged)
+    assert len(auth.token_cache) == 0